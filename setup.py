@@ -32,6 +32,14 @@ packages = [
 
 # TODO: also requires PySide or PyQt, need to show that.
 requirements = open('requirements.txt').readlines()
+extras = {
+    # Needed for Specter.screenshot_array().
+    'numpy': ['numpy'],
+    # Needed to measure memory use where /proc isn't available.
+    'psutil': ['psutil'],
+    # Needed for specter.aio on Python 2.
+    'trollius': ['trollius'],
+}
 tests_requirements = requirements + open('test-requirements.txt').readlines()
 
 
@@ -48,6 +56,7 @@ setup(
     package_dir={'specter': 'specter'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require=extras,
     license=open('LICENSE').read(),
     zip_safe=False,
     classifiers=(
@@ -2,5 +2,6 @@ __author__ = 'Andrew Dunham (andrew@du.nham.ca)'
 __version__ = '0.0.1'
 
 from .specter import Specter
+from .pool import SpecterPool
 from .exceptions import *
 from .signals import *
@@ -0,0 +1,332 @@
+"""
+An asyncio front-end for Specter.  On Python 2, the ``trollius`` backport of
+asyncio is used instead.
+
+Qt's event loop is driven from asyncio by a :class:`QtEventPump`, which
+processes pending Qt events from callbacks on the asyncio loop.  Waits return
+futures that are resolved directly from the relevant Qt signals, so any number
+of pages can be driven concurrently from coroutines, without threads and
+without blocking the asyncio loop::
+
+    async def scrape(pool, url):
+        with pool.page() as page:
+            page = AsyncPage(page)
+            await page.open(url)
+            await page.wait_for_selector('#results')
+            return await page.evaluate('document.title')
+"""
+
+try:
+    import asyncio
+except ImportError:                                         # pragma: no cover
+    import trollius as asyncio
+
+from weakref import WeakKeyDictionary
+
+from . import metrics, tracing
+from .exceptions import TimeoutError
+from .specter import _text_patterns
+
+
+class QtEventPump(object):
+    """
+    Processes Qt events from an asyncio event loop.  While any asynchronous
+    wait is in progress, events are processed every :attr:`interval` seconds,
+    and every :attr:`idle_interval` seconds otherwise.
+
+    Use :meth:`for_loop` to get the (shared) pump for a given event loop.
+    """
+    _pumps = WeakKeyDictionary()
+
+    def __init__(self, app, loop=None, interval=0.002, idle_interval=0.05):
+        self.app = app
+        self.loop = loop or asyncio.get_event_loop()
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.busy = 0
+        self._handle = None
+
+    @classmethod
+    def for_loop(cls, app, loop=None):
+        """
+        Returns the pump for the given event loop (or the current one),
+        creating and starting it if necessary.
+        """
+        loop = loop or asyncio.get_event_loop()
+        pump = cls._pumps.get(loop)
+        if pump is None:
+            pump = cls._pumps[loop] = cls(app, loop)
+        pump.start()
+        return pump
+
+    @property
+    def running(self):
+        return self._handle is not None
+
+    def start(self):
+        if not self.running:
+            self._schedule()
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _process_events(self):
+        with tracing.span('process-events', 'qt'):
+            self.app.processEvents()
+
+    def _schedule(self):
+        if self.busy:
+            interval = self.interval
+        else:
+            interval = self.idle_interval
+        self._handle = self.loop.call_later(interval, self._tick)
+
+    def _tick(self):
+        self._process_events()
+        self._schedule()
+
+    def wake(self):
+        """
+        Process any pending Qt events as soon as possible.
+        """
+        self.loop.call_soon(self._process_events)
+
+
+class AsyncPage(object):
+    """
+    Wraps a :class:`SpecterWebPage` (or a :class:`Specter` instance), exposing
+    versions of its blocking methods that return asyncio futures.  Any other
+    attributes are passed through to the underlying page.
+
+    :param page: the page to wrap.
+    :param pump: the :class:`QtEventPump` to use.  Defaults to the pump for
+                 the current event loop.
+    """
+    def __init__(self, page, pump=None):
+        # Accept a Specter instance as well as a page.
+        page = getattr(page, 'page', page)
+
+        self.page = page
+        self.pump = pump or QtEventPump.for_loop(page.app)
+
+    def __getattr__(self, name):
+        return getattr(self.page, name)
+
+    @property
+    def main_frame(self):
+        return self.page.main_frame
+
+    def _future(self):
+        return asyncio.Future(loop=self.pump.loop)
+
+    def _call(self, func, *args):
+        """
+        Returns a future holding the result of calling the given function.
+        """
+        future = self._future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _then(self, future, func):
+        """
+        Returns a future for the result of calling the given function with
+        the result of another future.  Cancelling it cancels the other
+        future too.
+        """
+        result = self._future()
+
+        def done(f):
+            if result.done():
+                return
+            if f.cancelled():
+                result.cancel()
+            elif f.exception() is not None:
+                result.set_exception(f.exception())
+            else:
+                try:
+                    result.set_result(func(f.result()))
+                except Exception as e:
+                    result.set_exception(e)
+
+        def cancelled(r):
+            if r.cancelled():
+                future.cancel()
+
+        future.add_done_callback(done)
+        result.add_done_callback(cancelled)
+        return result
+
+    def _wait(self, predicate, timeout=None, signals=(),
+              poll_interval=None):
+        if timeout is None:
+            timeout = self.main_frame.timeout
+
+        loop = self.pump.loop
+        future = self._future()
+
+        def check(*args):
+            if future.done():
+                return
+            try:
+                if predicate():
+                    future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+
+        def poll():
+            check()
+            if not future.done():
+                handles[1] = loop.call_later(poll_interval, poll)
+
+        def expire():
+            if not future.done():
+                metrics.WAIT_TIMEOUTS.inc()
+                future.set_exception(TimeoutError("Wait timed out"))
+
+        def finish(f):
+            self.pump.busy -= 1
+            for signal in signals:
+                signal.disconnect(check)
+            for handle in handles:
+                if handle is not None:
+                    handle.cancel()
+
+        check()
+        if future.done():
+            return future
+
+        handles = [loop.call_later(timeout, expire), None]
+        for signal in signals:
+            signal.connect(check)
+        if poll_interval:
+            handles[1] = loop.call_later(poll_interval, poll)
+
+        self.pump.busy += 1
+        future.add_done_callback(finish)
+        return future
+
+    def wait_for(self, predicate, timeout=None):
+        """
+        Wait for the given predicate to be true.  See
+        :meth:`SpecterWebFrame.wait_for`.
+        """
+        frame = self.main_frame
+        return self._wait(predicate, timeout, frame._change_signals(),
+                          frame.poll_interval)
+
+    def wait_for_page_load(self, timeout=None):
+        """
+        Wait until the page has finished loading.  The future's result is the
+        :class:`LoadResult`.
+        """
+        page = self.page
+        future = self._wait(lambda: page.loaded is True, timeout,
+                            [page.loadFinished])
+        return self._then(future, lambda _: page.load_result)
+
+    def open(self, address, method="GET", wait=True, timeout=None,
+             **kwargs):
+        """
+        Open the given URL, and (by default) wait for it to finish loading.
+        The future's result is the :class:`LoadResult`.  See
+        :meth:`SpecterWebFrame.open`.
+        """
+        result = self.page.open(address, method, **kwargs)
+        self.pump.wake()
+        if not wait:
+            return self._call(lambda: result)
+        return self._then(self.wait_for_page_load(timeout),
+                          lambda _: result)
+
+    def _wait_for_selector_state(self, selector, present, timeout):
+        frame = self.main_frame
+        watcher = frame.selector_watcher
+        ident = watcher.watch(selector)
+        if watcher.present(ident) is None:
+            watcher.unwatch(ident)
+            return self.wait_for(
+                lambda: frame.exists(selector) is present, timeout)
+
+        future = self._then(
+            self._wait(lambda: watcher.present(ident) is present, timeout,
+                       [watcher.bridge.selectorChanged,
+                        self.page.loadFinished]),
+            lambda _: None)
+        future.add_done_callback(lambda _: watcher.unwatch(ident))
+        return future
+
+    def wait_for_selector(self, selector, timeout=None):
+        """
+        Wait for an element matching the given CSS selector to exist.
+        """
+        return self._wait_for_selector_state(selector, True, timeout)
+
+    def wait_while_selector(self, selector, timeout=None):
+        """
+        Wait until no element matches the given CSS selector.
+        """
+        return self._wait_for_selector_state(selector, False, timeout)
+
+    def wait_for_text(self, text, timeout=None):
+        """
+        Wait for the given text (or any of a list of patterns) to be present
+        in the page.  The future's result is the pattern that matched.  See
+        :meth:`SpecterWebFrame.wait_for_text`.
+        """
+        patterns = _text_patterns(text)
+
+        frame = self.main_frame
+        watcher = frame.text_watcher
+        ident = watcher.watch(patterns)
+        if watcher.matched(ident) is None:
+            watcher.unwatch(ident)
+            found = []
+
+            def predicate():
+                found[:] = [frame._match_content(patterns)]
+                return found[0] is not None
+
+            return self._then(self.wait_for(predicate, timeout),
+                              lambda _: found[0])
+
+        future = self._then(
+            self._wait(lambda: watcher.matched(ident) != -1, timeout,
+                       [watcher.bridge.textMatched, self.page.loadFinished]),
+            lambda _: patterns[watcher.matched(ident)])
+        future.add_done_callback(lambda _: watcher.unwatch(ident))
+        return future
+
+    def evaluate(self, script):
+        """
+        Evaluate the given JavaScript.  The future's result is the value of
+        the script.
+        """
+        return self._call(self.page.evaluate, script)
+
+    def evaluate_many(self, scripts):
+        """
+        Evaluate a number of scripts.  The future's result is a list of their
+        values.
+        """
+        return self._call(self.page.evaluate_many, scripts)
+
+    def screenshot(self, path=None, selector=None, full_page=False,
+                   format='png', quality=-1):
+        """
+        Take a screenshot, encoding it on a background thread while the
+        event loop carries on.  See :meth:`SpecterWebFrame.screenshot_async`.
+        """
+        future = self.page.screenshot_async(path, selector, full_page, format,
+                                            quality)
+        return asyncio.wrap_future(future, loop=self.pump.loop)
+
+    def sleep(self, duration):
+        """
+        Pause the calling coroutine, while Qt events continue to be processed.
+        """
+        return asyncio.sleep(duration)
@@ -0,0 +1,311 @@
+"""
+Network caches: an in-memory cache whose store can be shared by every page in
+a process, and an on-disk cache that several processes can share.
+"""
+
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:                                         # pragma: no cover
+    fcntl = None
+
+from .qt import QtCore, QByteArray, QDateTime, QAbstractNetworkCache, \
+    QNetworkCacheMetaData, QNetworkDiskCache
+from .util import compile_url_pattern, _matches_any
+
+
+class CacheStore(object):
+    """
+    An in-memory store of HTTP responses, with a fixed memory budget and
+    least-recently-used eviction.  A single store can be shared by the
+    :class:`MemoryCache` of every network manager in a process - see
+    :meth:`shared`.
+
+    :param max_bytes: the maximum total size of the stored response bodies.
+    """
+    _shared = None
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()       # url -> (metadata, data)
+        self.size = 0
+        self.reset_stats()
+
+    @classmethod
+    def shared(cls, max_bytes=None):
+        """
+        Returns the process-wide shared store, creating it if necessary.  If
+        given, the store's memory budget is updated.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        if max_bytes is not None:
+            cls._shared.max_bytes = max_bytes
+            cls._shared._evict()
+        return cls._shared
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        self.bytes_stored = 0
+
+    @property
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bytes_served': self.bytes_served,
+            'bytes_stored': self.bytes_stored,
+            'entries': len(self._entries),
+            'size': self.size,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        return url in self._entries
+
+    def get(self, url, touch=True):
+        """
+        Returns the (metadata, data) tuple for the given URL, or None.
+        """
+        entry = self._entries.get(url)
+        if entry is not None and touch:
+            # Move to the most-recently-used end.
+            del self._entries[url]
+            self._entries[url] = entry
+        return entry
+
+    def put(self, url, metadata, data):
+        self.remove(url)
+        if len(data) > self.max_bytes:
+            return
+
+        self._entries[url] = (metadata, data)
+        self.size += len(data)
+        self.bytes_stored += len(data)
+        self._evict()
+
+    def update_metadata(self, url, metadata):
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries[url] = (metadata, entry[1])
+
+    def remove(self, url):
+        entry = self._entries.pop(url, None)
+        if entry is None:
+            return False
+
+        self.size -= len(entry[1])
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._entries:
+            _, (_, data) = self._entries.popitem(last=False)
+            self.size -= len(data)
+            self.evictions += 1
+
+
+# Expiry given to force-cached responses.
+FORCE_CACHE_LIFETIME = 365 * 24 * 60 * 60
+
+
+def _forced_metadata(metadata):
+    """
+    Returns a copy of the given cache metadata, modified so that the response
+    is always cached.
+    """
+    metadata = QNetworkCacheMetaData(metadata)
+    metadata.setSaveToDisk(True)
+    metadata.setExpirationDate(QDateTime.currentDateTime().addSecs(
+        FORCE_CACHE_LIFETIME))
+    return metadata
+
+
+class MemoryCache(QAbstractNetworkCache):
+    """
+    A network cache that keeps responses in a :class:`CacheStore` in memory.
+    By default, the process-wide shared store is used, so every page in the
+    process benefits from responses fetched by any other.
+
+    Responses to URLs matching any of the :attr:`force_cache` patterns are
+    cached (and served from the cache) even if their headers forbid it, which
+    is useful for static assets.
+
+    :param store: the :class:`CacheStore` to use.
+    :param force_cache: URL patterns - glob-style strings, or compiled
+                        regular expressions.
+    """
+    def __init__(self, store=None, force_cache=(), parent=None):
+        super(MemoryCache, self).__init__(parent)
+        self.store = store if store is not None else CacheStore.shared()
+        self.force_cache = [compile_url_pattern(p) for p in force_cache]
+
+        # Devices returned from prepare() that haven't been inserted yet.
+        self._preparing = {}
+
+    @staticmethod
+    def _key(url):
+        return url.toString()
+
+    def is_forced(self, url):
+        """
+        Returns whether the given URL (a string) matches a force-cache rule.
+        """
+        return _matches_any(self.force_cache, url)
+
+    def metaData(self, url):
+        entry = self.store.get(self._key(url), touch=False)
+        if entry is None:
+            self.store.misses += 1
+            return QNetworkCacheMetaData()
+        return QNetworkCacheMetaData(entry[0])
+
+    def updateMetaData(self, metadata):
+        self.store.update_metadata(self._key(metadata.url()),
+                                   QNetworkCacheMetaData(metadata))
+
+    def data(self, url):
+        entry = self.store.get(self._key(url))
+        if entry is None:
+            return None
+
+        self.store.hits += 1
+        self.store.bytes_served += len(entry[1])
+
+        buf = QtCore.QBuffer()
+        buf.setData(QByteArray(entry[1]))
+        buf.open(QtCore.QIODevice.ReadOnly)
+        return buf
+
+    def remove(self, url):
+        key = self._key(url)
+        for device, (metadata, _) in list(self._preparing.items()):
+            if metadata.url() == url:
+                del self._preparing[device]
+        return self.store.remove(key)
+
+    def cacheSize(self):
+        return self.store.size
+
+    def prepare(self, metadata):
+        key = self._key(metadata.url())
+        if self.is_forced(key):
+            metadata = _forced_metadata(metadata)
+        elif not metadata.saveToDisk():
+            return None
+
+        buf = QtCore.QBuffer()
+        buf.open(QtCore.QIODevice.ReadWrite)
+        self._preparing[buf] = (QNetworkCacheMetaData(metadata), key)
+        return buf
+
+    def insert(self, device):
+        prepared = self._preparing.pop(device, None)
+        if prepared is None:
+            return
+
+        metadata, key = prepared
+        self.store.put(key, metadata, bytes(device.data()))
+
+    def clear(self):
+        self._preparing.clear()
+        self.store.clear()
+
+
+class SharedDiskCache(QNetworkDiskCache):
+    """
+    An on-disk network cache that several processes (e.g. the workers of a
+    :class:`specter.workers.WorkerFarm`) can safely share, so that freshly
+    started processes benefit from responses already fetched by others.
+
+    QNetworkDiskCache already writes each entry to a temporary file and
+    renames it into place, so readers never see partial entries.  On top of
+    that, eviction is serialized between processes with a lock file, and the
+    cache directory is periodically re-scanned, so that the size cap applies
+    to the total size of the cache rather than only to what this process has
+    written.
+
+    :param directory: the cache directory.
+    :param max_size: the maximum size of the cache, in bytes.
+    :param force_cache: URL patterns of responses that should always be
+                        cached - see :class:`MemoryCache`.
+    """
+    LOCK_NAME = '.specter-lock'
+
+    # Re-scan the cache directory after this many inserts, to account for
+    # entries written by other processes.
+    RESCAN_INTERVAL = 50
+
+    def __init__(self, directory, max_size=50 * 1024 * 1024, force_cache=(),
+                 parent=None):
+        super(SharedDiskCache, self).__init__(parent)
+
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process may have created it in the meantime.
+                if not os.path.isdir(directory):
+                    raise
+
+        self.force_cache = [compile_url_pattern(p) for p in force_cache]
+        self._lock_path = os.path.join(directory, self.LOCK_NAME)
+        self._inserts = 0
+
+        # The size of the cache as of the last eviction.  This is what's
+        # reported while another process holds the lock, since cacheSize()
+        # itself calls expire() when the size isn't known yet.
+        self._last_size = 0
+
+        self.setCacheDirectory(directory)
+        self.setMaximumCacheSize(max_size)
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:                                   # pragma: no cover
+            yield True
+            return
+
+        with open(self._lock_path, 'a') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError):
+                # Another process is already evicting entries.
+                yield False
+                return
+
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def expire(self):
+        with self._locked() as acquired:
+            if not acquired:
+                return self._last_size
+            self._last_size = super(SharedDiskCache, self).expire()
+            return self._last_size
+
+    def prepare(self, metadata):
+        if _matches_any(self.force_cache, metadata.url().toString()):
+            metadata = _forced_metadata(metadata)
+        return super(SharedDiskCache, self).prepare(metadata)
+
+    def insert(self, device):
+        super(SharedDiskCache, self).insert(device)
+
+        self._inserts += 1
+        if self._inserts % self.RESCAN_INTERVAL == 0:
+            self.expire()
@@ -0,0 +1,187 @@
+"""
+A cookie jar that persists cookies to an SQLite database, which can be shared
+between processes.
+"""
+
+import time
+import sqlite3
+
+from .qt import QByteArray, QNetworkCookie, QNetworkCookieJar
+
+
+class SQLiteCookieJar(QNetworkCookieJar):
+    """
+    A cookie jar that persists cookies to an SQLite database.  Changes are
+    written to the database as they happen, and cookies are loaded lazily for
+    each domain the first time they're needed.  Several cookie jars (in the
+    same or in different processes) can share a database: if the database is
+    changed by another connection, cookies are re-loaded from it the next time
+    they're needed.
+
+    :param path: the path to the SQLite database.
+    :param session_cookies: whether to persist session cookies (those with no
+                            expiry date).  Defaults to True, so that logged-in
+                            sessions can be reused.
+    """
+    def __init__(self, path, session_cookies=True, parent=None):
+        super(SQLiteCookieJar, self).__init__(parent)
+        self.path = path
+        self.session_cookies = session_cookies
+
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS cookies (
+                domain  TEXT NOT NULL,
+                path    TEXT NOT NULL,
+                name    BLOB NOT NULL,
+                raw     BLOB NOT NULL,
+                expires REAL,
+                PRIMARY KEY (domain, path, name)
+            )
+        """)
+
+        self._loaded = set()
+        self._version = self._data_version()
+
+    def _data_version(self):
+        return self._db.execute('PRAGMA data_version').fetchone()[0]
+
+    @staticmethod
+    def _domains(host):
+        """
+        Returns all the cookie domains that could apply to the given host.
+        """
+        host = host.lower()
+        parts = host.split('.')
+        ret = []
+        for i in range(len(parts)):
+            domain = '.'.join(parts[i:])
+            ret.append(domain)
+            ret.append('.' + domain)
+        return ret
+
+    @staticmethod
+    def _name(cookie):
+        return bytes(cookie.name())
+
+    @classmethod
+    def _key(cls, cookie):
+        return (cookie.domain().lower(), cookie.path(), cls._name(cookie))
+
+    def _persisted(self, cookie):
+        return self.session_cookies or not cookie.isSessionCookie()
+
+    def _check_version(self):
+        # If another connection has changed the database, everything we've
+        # loaded may be stale.
+        version = self._data_version()
+        if version != self._version:
+            self._version = version
+            self._loaded.clear()
+
+    def _load(self, host):
+        domains = [d for d in self._domains(host) if d not in self._loaded]
+        if not domains:
+            return
+
+        query = 'SELECT raw, expires FROM cookies WHERE domain IN (%s)' % (
+            ','.join('?' * len(domains)),)
+        now = time.time()
+        loaded = []
+        for raw, expires in self._db.execute(query, domains):
+            if expires is not None and expires < now:
+                continue
+            loaded.extend(QNetworkCookie.parseCookies(QByteArray(raw)))
+
+        # The database is authoritative for the persisted cookies of the
+        # domains we've just loaded.  Cookies that are never persisted only
+        # exist in memory, so they're kept unless the database has a cookie
+        # with the same key.
+        wanted = set(domains)
+        keys = set(self._key(c) for c in loaded)
+        cookies = [c for c in self.allCookies()
+                   if c.domain().lower() not in wanted or
+                   (not self._persisted(c) and self._key(c) not in keys)]
+        cookies.extend(loaded)
+        self.setAllCookies(cookies)
+
+        self._db.execute(
+            'DELETE FROM cookies WHERE expires IS NOT NULL AND expires < ?',
+            (now,))
+        self._loaded.update(domains)
+
+    def cookiesForUrl(self, url):
+        self._check_version()
+        self._load(url.host())
+        return super(SQLiteCookieJar, self).cookiesForUrl(url)
+
+    def setCookiesFromUrl(self, cookies, url):
+        self._check_version()
+        self._load(url.host())
+        ret = super(SQLiteCookieJar, self).setCookiesFromUrl(cookies, url)
+
+        # Write the cookies as they were accepted (and normalized) by the
+        # jar, and delete any that were removed (e.g. because they expired).
+        domains = set(self._domains(url.host()))
+        names = set(self._name(c) for c in cookies)
+        current = [c for c in self.allCookies()
+                   if c.domain().lower() in domains and self._name(c) in names]
+
+        with self._db:
+            self._db.execute('BEGIN')
+            for name in names:
+                self._db.execute(
+                    'DELETE FROM cookies WHERE name = ? AND domain IN (%s)' % (
+                        ','.join('?' * len(domains)),),
+                    [sqlite3.Binary(name)] + list(domains))
+            self._write(current)
+
+        # Our own write shouldn't invalidate what we've loaded.
+        self._version = self._data_version()
+        return ret
+
+    def _write(self, cookies):
+        for cookie in cookies:
+            if not self._persisted(cookie):
+                continue
+            if cookie.isSessionCookie():
+                expires = None
+            else:
+                expires = cookie.expirationDate().toTime_t()
+
+            self._db.execute(
+                'INSERT OR REPLACE INTO cookies VALUES (?, ?, ?, ?, ?)',
+                (cookie.domain().lower(), cookie.path(),
+                 sqlite3.Binary(self._name(cookie)),
+                 sqlite3.Binary(bytes(cookie.toRawForm())), expires))
+
+    def add_cookies(self, cookies):
+        """
+        Add the given cookies (which must already have their domain and path
+        set) to the jar, and persist them.
+        """
+        self._check_version()
+        for cookie in cookies:
+            self._load(cookie.domain().lstrip('.'))
+
+        keys = set(self._key(c) for c in cookies)
+        existing = [c for c in self.allCookies() if self._key(c) not in keys]
+        self.setAllCookies(existing + list(cookies))
+
+        with self._db:
+            self._db.execute('BEGIN')
+            self._write(cookies)
+
+        self._version = self._data_version()
+
+    def clear(self):
+        """
+        Remove all cookies, both in memory and from the database.
+        """
+        self.setAllCookies([])
+        self._db.execute('DELETE FROM cookies')
+        self._version = self._data_version()
+
+    def close(self):
+        self._db.close()
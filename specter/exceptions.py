@@ -16,3 +16,13 @@ class InteractionError(SpecterError):
 class ElementError(SpecterError):
     """Error raised when Specter is unable to find an element."""
     pass
+
+
+class JavaScriptError(SpecterError):
+    """Error raised when evaluated JavaScript throws an exception."""
+    pass
+
+
+class WorkerError(SpecterError):
+    """Error raised when a job could not be completed by a worker process."""
+    pass
@@ -0,0 +1,249 @@
+"""
+Records network traffic in the HTTP Archive (HAR) 1.2 format, which can be
+loaded into browser developer tools and HAR viewers.
+"""
+
+import io
+import json
+import time
+import itertools
+from datetime import datetime
+from collections import deque
+from weakref import WeakKeyDictionary
+
+from .qt import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+from .six import PY3, string_types
+
+
+def _har_time(timestamp):
+    dt = datetime.utcfromtimestamp(timestamp)
+    return '%s.%03dZ' % (dt.strftime('%Y-%m-%dT%H:%M:%S'),
+                         dt.microsecond // 1000)
+
+
+def _har_text(value):
+    # Header values and some attributes are QByteArrays.
+    if value is None:
+        return ''
+    if hasattr(value, 'data'):
+        value = value.data()
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    return value
+
+
+def _har_headers(obj):
+    return [{'name': _har_text(h), 'value': _har_text(obj.rawHeader(h))}
+            for h in obj.rawHeaderList()]
+
+
+class HARRecorder(object):
+    """
+    Records the requests made through a :class:`NetworkAccessManager` as HAR
+    1.2 entries, including their headers, status, size and timings.  At most
+    :attr:`max_entries` entries are kept in memory, with the oldest being
+    discarded first.  For long sessions, entries can also be streamed to a
+    file as they finish, which becomes a complete HAR file once the recorder
+    is closed::
+
+        recorder = HARRecorder(stream='session.har')
+        specter = Specter(har_recorder=recorder)
+        ...
+        recorder.close()
+
+    Qt doesn't expose DNS, connect or SSL timings, so these are given as -1
+    (i.e. unknown), and the time until the response headers arrive is
+    reported as the 'wait' phase.
+
+    :param max_entries: the maximum number of entries kept in memory.
+    :param stream: a path or file object to stream entries to.
+    """
+    VERSION = '1.2'
+
+    _methods = {
+        QNetworkAccessManager.HeadOperation: 'HEAD',
+        QNetworkAccessManager.GetOperation: 'GET',
+        QNetworkAccessManager.PutOperation: 'PUT',
+        QNetworkAccessManager.PostOperation: 'POST',
+        QNetworkAccessManager.DeleteOperation: 'DELETE',
+    }
+
+    def __init__(self, max_entries=1000, stream=None):
+        self.entries = deque(maxlen=max_entries)
+
+        # HAR pages, and the ID of the current HAR page for each web page.  A
+        # new HAR page is started each time a web page starts loading.
+        self._pages = deque(maxlen=max_entries)
+        self._current = WeakKeyDictionary()
+        self._page_ids = itertools.count(1)
+
+        self._stream = None
+        self._own_stream = False
+        self._streamed = 0
+        if stream is not None:
+            if isinstance(stream, string_types):
+                stream = io.open(stream, 'w', encoding='utf-8')
+                self._own_stream = True
+            self._stream = stream
+            self._write('{"log": {"version": %s, "creator": %s, '
+                        '"entries": [' % (json.dumps(self.VERSION),
+                                          json.dumps(self._creator())))
+
+    @staticmethod
+    def _creator():
+        from . import __version__
+        return {'name': 'Specter', 'version': __version__}
+
+    def _write(self, text):
+        if not PY3 and isinstance(text, str):
+            text = text.decode('utf-8')
+        self._stream.write(text)
+
+    def _page_ref(self, page, url, started):
+        if page is None:
+            return None
+
+        ref = self._current.get(page)
+        if ref is None:
+            ref = self._current[page] = 'page_%d' % (next(self._page_ids),)
+            self._pages.append({
+                'startedDateTime': _har_time(started),
+                'id': ref,
+                'title': url,
+                'pageTimings': {'onContentLoad': -1, 'onLoad': -1},
+            })
+        return ref
+
+    def load_started(self, page):
+        """
+        Called when a page starts loading, so that its subsequent requests
+        are filed under a new HAR page.
+        """
+        self._current.pop(page, None)
+
+    def start(self, record, operation, request):
+        """
+        Start an entry for a request that's just been made.
+        """
+        method = self._methods.get(operation)
+        if method is None:
+            method = _har_text(request.attribute(
+                QNetworkRequest.CustomVerbAttribute)) or 'GET'
+
+        url = request.url()
+        record.entry = {
+            'pageref': self._page_ref(record.page, record.url,
+                                      record.started),
+            'startedDateTime': _har_time(record.started),
+            'request': {
+                'method': method,
+                'url': record.url,
+                'httpVersion': 'HTTP/1.1',
+                'headers': _har_headers(request),
+                'queryString': [{'name': k, 'value': v}
+                                for k, v in url.queryItems()],
+                'cookies': [],
+                'headersSize': -1,
+                'bodySize': -1,
+            },
+            'cache': {},
+        }
+
+    def finish(self, record):
+        """
+        Complete the entry for a finished reply, and store it.
+        """
+        entry = record.entry
+        if entry is None:
+            return
+        record.entry = None
+
+        reply = record.reply
+        finished = time.time()
+        responded = record.responded or finished
+
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        reason = reply.attribute(QNetworkRequest.HttpReasonPhraseAttribute)
+        redirect = reply.attribute(QNetworkRequest.RedirectionTargetAttribute)
+        mime_type = reply.header(QNetworkRequest.ContentTypeHeader)
+
+        entry['response'] = {
+            'status': int(status or 0),
+            'statusText': _har_text(reason),
+            'httpVersion': 'HTTP/1.1',
+            'headers': _har_headers(reply),
+            'cookies': [],
+            'content': {
+                'size': record.received,
+                'mimeType': mime_type or '',
+            },
+            'redirectURL': redirect.toString() if redirect else '',
+            'headersSize': -1,
+            'bodySize': record.received,
+        }
+        if reply.error() != QNetworkReply.NoError:
+            entry['response']['_error'] = reply.errorString()
+
+        entry['timings'] = {
+            'blocked': -1,
+            'dns': -1,
+            'connect': -1,
+            'ssl': -1,
+            'send': 0,
+            'wait': (responded - record.started) * 1000,
+            'receive': (finished - responded) * 1000,
+        }
+        entry['time'] = (finished - record.started) * 1000
+
+        self.entries.append(entry)
+        if self._stream is not None:
+            if self._streamed:
+                self._write(',\n')
+            self._write(json.dumps(entry))
+            self._streamed += 1
+
+    @property
+    def pages(self):
+        return list(self._pages)
+
+    def har(self):
+        """
+        Returns the entries that are held in memory as a HAR dictionary.
+        """
+        return {
+            'log': {
+                'version': self.VERSION,
+                'creator': self._creator(),
+                'pages': self.pages,
+                'entries': list(self.entries),
+            }
+        }
+
+    def save(self, path):
+        """
+        Write the entries that are held in memory to a HAR file.
+        """
+        with io.open(path, 'w', encoding='utf-8') as f:
+            data = json.dumps(self.har(), indent=2)
+            if not PY3 and isinstance(data, str):
+                data = data.decode('utf-8')
+            f.write(data)
+
+    def clear(self):
+        self.entries.clear()
+        self._pages.clear()
+        self._current.clear()
+
+    def close(self):
+        """
+        Finish the streamed HAR file, if any.
+        """
+        if self._stream is None:
+            return
+
+        self._write('], "pages": %s}}' % (json.dumps(self.pages),))
+        if self._own_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
+        self._stream = None
@@ -0,0 +1,243 @@
+"""
+Helpers for encoding rendered images.
+
+Qt can only encode a complete QImage, which means that a screenshot of a very
+tall page needs a single buffer big enough to hold every pixel of it.  The
+:class:`PNGWriter` in this module instead compresses rows as they're produced,
+so only one strip of the image needs to be in memory at a time.  Complete
+images can be encoded on background threads with an :class:`ImageEncoder`.
+"""
+
+import zlib
+import struct
+
+try:
+    import numpy
+except ImportError:                                         # pragma: no cover
+    numpy = None
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:                                         # pragma: no cover
+    ThreadPoolExecutor = None
+
+from . import tracing
+from .qt import PYSIDE, QByteArray, QBuffer, QIODevice, QImage
+from .exceptions import SpecterError
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PNG colour types, by number of channels.
+_COLOR_TYPES = {
+    1: 0,       # Greyscale
+    3: 2,       # RGB
+    4: 6,       # RGBA
+}
+
+
+def _tobytes(data):
+    # Python 2's buffer objects slice to strings, but memoryviews don't.
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    return bytes(data)
+
+
+class PNGWriter(object):
+    """
+    Writes an 8-bit PNG image to a file object, a number of rows at a time::
+
+        writer = PNGWriter(f, width, height)
+        for strip in strips:
+            writer.write_rows(strip)
+        writer.close()
+
+    :param fileobj: a file-like object opened for writing in binary mode.
+    :param width: the width of the image, in pixels.
+    :param height: the height of the image, in pixels.
+    :param channels: the number of bytes per pixel - 1 (greyscale), 3 (RGB) or
+                     4 (RGBA).
+    :param level: the zlib compression level to use.
+    """
+    def __init__(self, fileobj, width, height, channels=3, level=6):
+        if channels not in _COLOR_TYPES:
+            raise ValueError("Invalid number of channels: %r" % (channels,))
+        if width < 1 or height < 1:
+            raise ValueError("Invalid image size: %dx%d" % (width, height))
+
+        self.fileobj = fileobj
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+
+        self._compressor = zlib.compressobj(level)
+
+        self.fileobj.write(PNG_SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack(
+            '>IIBBBBB', width, height, 8, _COLOR_TYPES[channels], 0, 0, 0))
+
+    @property
+    def row_bytes(self):
+        return self.width * self.channels
+
+    def _write_chunk(self, tag, data):
+        self.fileobj.write(struct.pack('>I', len(data)))
+        self.fileobj.write(tag)
+        self.fileobj.write(data)
+        crc = zlib.crc32(tag)
+        crc = zlib.crc32(data, crc) & 0xffffffff
+        self.fileobj.write(struct.pack('>I', crc))
+
+    def write_rows(self, data, stride=None):
+        """
+        Write a number of rows of pixel data.
+
+        :param data: an object supporting the buffer protocol, containing the
+                     rows one after another.
+        :param stride: the number of bytes from the start of one row to the
+                       start of the next, if the rows are padded.  Defaults to
+                       :attr:`row_bytes`.
+        """
+        row_bytes = self.row_bytes
+        if stride is None:
+            stride = row_bytes
+
+        # The last row needn't be padded out to the full stride.
+        count = (len(data) - row_bytes) // stride + 1
+        if len(data) < row_bytes:
+            count = 0
+        if self.rows_written + count > self.height:
+            raise ValueError("Too many rows written to image")
+
+        parts = []
+        for i in range(count):
+            start = i * stride
+            parts.append(b'\x00')       # Filter type: none
+            parts.append(_tobytes(data[start:start + row_bytes]))
+
+        compressed = self._compressor.compress(b''.join(parts))
+        if compressed:
+            self._write_chunk(b'IDAT', compressed)
+        self.rows_written += count
+
+    def close(self):
+        """
+        Finish writing the image.  This doesn't close the underlying file.
+        """
+        if self.rows_written != self.height:
+            raise ValueError("Only %d of %d rows were written" % (
+                self.rows_written, self.height))
+
+        self._write_chunk(b'IDAT', self._compressor.flush())
+        self._write_chunk(b'IEND', b'')
+
+
+def image_buffer(image):
+    """
+    Returns an object exposing the pixel data of the given QImage through the
+    buffer protocol, without copying it.
+    """
+    bits = image.constBits()
+    if hasattr(bits, 'setsize'):
+        # PyQt4 returns a sip.voidptr, which must be told its size.
+        bits.setsize(image.byteCount())
+    try:
+        return memoryview(bits)
+    except TypeError:
+        # Python 2's old-style buffer objects.
+        return bits
+
+
+def array_image(array):
+    """
+    Returns a QImage that renders directly into the memory of the given
+    H x W x 4 uint8 NumPy array.  The array must outlive the image.
+    """
+    if numpy is None:
+        raise SpecterError("NumPy is required for array screenshots")
+    if (array.dtype != numpy.uint8 or array.ndim != 3 or
+            array.shape[2] != 4 or not array.flags['C_CONTIGUOUS'] or
+            not array.flags['WRITEABLE']):
+        raise ValueError("Array must be a writeable, C-contiguous H x W x 4 "
+                         "array of uint8")
+
+    height, width = array.shape[:2]
+    if PYSIDE:
+        data = array.data
+    else:
+        import sip
+        data = sip.voidptr(array.ctypes.data)
+    return QImage(data, width, height, width * 4, QImage.Format_ARGB32)
+
+
+def encode_image(image, format='png', quality=-1):
+    """
+    Encode the given QImage in the given format, returning the bytes.
+    """
+    data = QByteArray()
+    buf = QBuffer(data)
+    buf.open(QIODevice.WriteOnly)
+    if not image.save(buf, format.upper(), quality):
+        raise SpecterError("Unable to encode image as %s" % (format,))
+    buf.close()
+    return bytes(data.data())
+
+
+class ImageEncoder(object):
+    """
+    Encodes rendered images on a pool of background threads, so that the Qt
+    thread can carry on loading pages while large images are compressed.  Qt
+    and zlib both release the GIL while encoding, so this gives real
+    parallelism.
+
+    On Python 2, this requires the 'futures' backport.
+
+    :param workers: the number of encoding threads.
+    """
+    _shared = None
+
+    def __init__(self, workers=2):
+        if ThreadPoolExecutor is None:
+            raise SpecterError("Background encoding requires the "
+                               "concurrent.futures module")
+        self._executor = ThreadPoolExecutor(workers)
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the process-wide shared encoder, creating it if necessary.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def submit(self, image, path=None, format='png', quality=-1):
+        """
+        Encode the given QImage in the background, returning a
+        :class:`concurrent.futures.Future`.  Its result is the encoded bytes,
+        or the path that the image was written to, if one was given.
+        """
+        # QImage is implicitly shared with an atomic reference count, so the
+        # worker thread can safely hold its own handle to the pixels.
+        return self._executor.submit(self._encode, QImage(image), path,
+                                     format, quality)
+
+    @staticmethod
+    def _encode(image, path, format, quality):
+        with tracing.span('encode-image', format=format):
+            data = encode_image(image, format, quality)
+        if path is None:
+            return data
+
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def shutdown(self, wait=True):
+        """
+        Stop the encoding threads, optionally waiting for pending images to
+        be encoded first.
+        """
+        self._executor.shutdown(wait)
+        if ImageEncoder._shared is self:
+            ImageEncoder._shared = None
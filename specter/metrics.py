@@ -0,0 +1,302 @@
+"""
+Metrics for monitoring long-running Specter processes.  Specter keeps a
+registry of counters and histograms for page loads, load latency, wait
+timeouts, network traffic, blocked requests, SSL errors, JavaScript console
+messages and memory recycling.  These can be read as a dictionary, or served
+in Prometheus' text format from a small local HTTP endpoint::
+
+    from specter import metrics
+
+    metrics.serve(9100)             # http://127.0.0.1:9100/metrics
+    print(metrics.REGISTRY.as_dict())
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:                                         # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from .signals import load_started, load_finished, ssl_error, js_console
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return repr(int(value))
+    return repr(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')
+                                .replace('\n', '\\n'))
+        for k, v in labels)
+
+
+class Metric(object):
+    """
+    Base class for metrics.  Values are kept per combination of label values.
+    """
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError("Expected labels %r for %s, got %r" % (
+                self.labelnames, self.name, sorted(labels)))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return list(zip(self.labelnames, key))
+
+    def samples(self):
+        """
+        Yields a (name, labels, value) tuple for each sample of this metric,
+        where labels is a list of (name, value) pairs.
+        """
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """
+    A value that only goes up.
+    """
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(Metric):
+    """
+    Counts observations into buckets, and tracks their count and sum.
+    """
+    type = 'histogram'
+
+    DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets),
+                                                   0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(self._key(labels), ([0], 0))
+        return counts[-1]
+
+    def sum(self, **labels):
+        return self._values.get(self._key(labels), (None, 0))[1]
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(c), s))
+                           for k, (c, s) in self._values.items())
+        for key, (counts, total) in items:
+            labels = self._labels(key)
+            for bound, count in zip(self.buckets, counts):
+                yield (self.name + '_bucket',
+                       labels + [('le', _format_value(float(bound)))], count)
+            yield self.name + '_count', labels, counts[-1]
+            yield self.name + '_sum', labels, total
+
+
+class MetricsRegistry(object):
+    """
+    A collection of metrics that can be exported together.
+    """
+    def __init__(self):
+        self._metrics = OrderedDict()
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError("Duplicate metric: %s" % (metric.name,))
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), **kwargs):
+        return self.register(Histogram(name, help, labelnames, **kwargs))
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def as_dict(self):
+        """
+        Returns a dictionary mapping each sample, named as in the Prometheus
+        format (e.g. ``specter_page_loads_total{result="success"}``), to its
+        value.
+        """
+        ret = OrderedDict()
+        for metric in self._metrics.values():
+            for name, labels, value in metric.samples():
+                ret[name + _format_labels(labels)] = value
+        return ret
+
+    def exposition(self):
+        """
+        Returns all the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append('# HELP %s %s' % (metric.name, metric.help))
+            lines.append('# TYPE %s %s' % (metric.name, metric.type))
+            for name, labels, value in metric.samples():
+                lines.append('%s%s %s' % (name, _format_labels(labels),
+                                          _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+PAGE_LOADS = REGISTRY.counter(
+    'specter_page_loads_total', 'Page loads, by result.', ['result'])
+LOAD_SECONDS = REGISTRY.histogram(
+    'specter_page_load_seconds',
+    'Time from a page starting to load until it finished loading.')
+WAIT_TIMEOUTS = REGISTRY.counter(
+    'specter_wait_timeouts_total', 'Waits that timed out.')
+BYTES_RECEIVED = REGISTRY.counter(
+    'specter_received_bytes_total', 'Bytes received from the network.')
+REQUESTS_BLOCKED = REGISTRY.counter(
+    'specter_blocked_requests_total', 'Requests blocked by block rules.')
+SSL_ERRORS = REGISTRY.counter(
+    'specter_ssl_errors_total', 'SSL errors encountered.')
+CONSOLE_MESSAGES = REGISTRY.counter(
+    'specter_console_messages_total', 'JavaScript console messages.')
+MEMORY_CACHE_CLEARS = REGISTRY.counter(
+    'specter_memory_cache_clears_total',
+    'Times WebKit\'s memory caches were cleared for exceeding memory limits.')
+PAGES_RECYCLED = REGISTRY.counter(
+    'specter_pages_recycled_total', 'Pages replaced with fresh ones.')
+
+
+# Page -> the time its current load started.
+_load_starts = WeakKeyDictionary()
+
+
+def _on_load_started(page):
+    _load_starts[page] = time.time()
+
+
+def _on_load_finished(page, ok):
+    PAGE_LOADS.inc(result='success' if ok else 'failure')
+
+    started = _load_starts.pop(page, None)
+    if started is not None:
+        LOAD_SECONDS.observe(time.time() - started)
+
+
+def _on_ssl_error(sender, errors):
+    SSL_ERRORS.inc()
+
+
+def _on_console(sender, message, line, source):
+    CONSOLE_MESSAGES.inc()
+
+
+_installed = False
+
+
+def install():
+    """
+    Start collecting the metrics that are derived from Specter's signals.
+    This is called by every :class:`Specter` instance, and is idempotent.
+    """
+    global _installed
+    if _installed:
+        return
+
+    load_started.add_listener(_on_load_started, _internal=True)
+    load_finished.add_listener(_on_load_finished, _internal=True)
+    ssl_error.add_listener(_on_ssl_error, _internal=True)
+    js_console.add_listener(_on_console, _internal=True)
+    _installed = True
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+
+        body = self.registry.exposition().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# (host, port, registry ID) -> running server.
+_servers = {}
+
+
+def serve(port=9100, host='127.0.0.1', registry=REGISTRY):
+    """
+    Serve the given registry in the Prometheus text format, from a daemon
+    thread.  Returns the HTTP server, whose ``shutdown()`` method stops it.
+
+    If the registry is already being served on the given port, the existing
+    server is returned.
+
+    :param port: the port to listen on.  If this is 0, a free port is chosen,
+                 which is available as ``server.server_address[1]``.
+    :param host: the address to listen on.  Defaults to localhost only.
+    """
+    key = (host, port, id(registry))
+    if port and key in _servers:
+        return _servers[key]
+
+    handler = type('MetricsHandler', (_MetricsHandler,),
+                   {'registry': registry})
+    server = HTTPServer((host, port), handler)
+
+    thread = threading.Thread(target=server.serve_forever,
+                              name='specter-metrics')
+    thread.daemon = True
+    thread.start()
+
+    if port:
+        _servers[key] = server
+    return server
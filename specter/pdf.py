@@ -0,0 +1,68 @@
+"""
+Printing pages to PDF files.
+"""
+
+from numbers import Number
+
+from .qt import QSizeF, QPrinter
+from .six import string_types
+
+
+class PDFPrinter(object):
+    """
+    Prints frames to PDF files.  Setting up a QPrinter is relatively
+    expensive, so a single printer is reused for any number of documents -
+    use :meth:`get` to share printers with the same settings.
+
+    :param page_size: the name of a paper size (e.g. 'A4' or 'Letter'), or a
+                      (width, height) tuple in millimetres.
+    :param margins: the page margins in millimetres, either as a single number
+                    or as a (left, top, right, bottom) tuple.
+    :param landscape: whether to print in landscape orientation.
+    """
+    _cache = {}
+
+    def __init__(self, page_size='A4', margins=10, landscape=False):
+        printer = QPrinter(QPrinter.HighResolution)
+        printer.setOutputFormat(QPrinter.PdfFormat)
+
+        if isinstance(page_size, string_types):
+            size = getattr(QPrinter, page_size.capitalize(), None)
+            if not isinstance(size, QPrinter.PageSize):
+                raise ValueError("Unknown page size: %s" % (page_size,))
+            printer.setPaperSize(size)
+        else:
+            printer.setPaperSize(QSizeF(*page_size), QPrinter.Millimeter)
+
+        if isinstance(margins, Number):
+            margins = (margins,) * 4
+        printer.setPageMargins(*(tuple(margins) + (QPrinter.Millimeter,)))
+
+        if landscape:
+            printer.setOrientation(QPrinter.Landscape)
+
+        self.printer = printer
+
+    @classmethod
+    def get(cls, page_size='A4', margins=10, landscape=False):
+        """
+        Returns a shared printer with the given settings, creating it if
+        necessary.
+        """
+        if not isinstance(page_size, string_types):
+            page_size = tuple(page_size)
+        if not isinstance(margins, Number):
+            margins = tuple(margins)
+        key = (page_size, margins, bool(landscape))
+
+        printer = cls._cache.get(key)
+        if printer is None:
+            printer = cls._cache[key] = cls(page_size, margins, landscape)
+        return printer
+
+    def print_frame(self, frame, path):
+        """
+        Print the given QWebFrame to a PDF file at the given path.
+        """
+        self.printer.setOutputFileName(path)
+        frame.print_(self.printer)
@@ -0,0 +1,231 @@
+from collections import deque
+from contextlib import contextmanager
+
+from . import metrics
+from .specter import Specter, EventWaiter, QtCore, QtSignal
+from .pdf import PDFPrinter
+from .exceptions import SpecterError, TimeoutError
+
+
+class SpecterPool(QtCore.QObject):
+    """
+    A pool of pages that all live within a single Specter instance, and are
+    thus driven by the same QApplication and event loop.  Since Qt's network
+    access is asynchronous, loads in all the pages of the pool can be in
+    flight at the same time, which gives far more throughput than running one
+    process per page.
+
+    Pages can be checked out and returned manually::
+
+        pool = SpecterPool(4)
+        with pool.page() as page:
+            page.open('http://www.google.com')
+            page.wait_for_page_load()
+
+    Or a number of URLs can be loaded concurrently with :meth:`map`.
+
+    :param size: the number of pages in the pool.
+    :param specter: the :class:`Specter` instance that pages are created from.
+                    If not given, a new one is created, and any remaining
+                    options are passed to it.
+
+    If the Specter instance has ``memory_limits``, each page's memory usage is
+    checked as it's returned, and a page that's over the per-page limits is
+    replaced with a fresh one (see :meth:`Specter.recycle_page`).
+    """
+    # Emitted whenever a page is returned to the pool.
+    pageReturned = QtSignal()
+
+    def __init__(self, size=4, specter=None, **options):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        super(SpecterPool, self).__init__()
+
+        if specter is None:
+            specter = Specter(**options)
+        self.specter = specter
+
+        self.pages = [self.specter.new_page() for _ in range(size)]
+        self._free = deque(self.pages)
+
+    @property
+    def app(self):
+        return self.specter.app
+
+    @property
+    def size(self):
+        """
+        Returns the total number of pages in the pool.
+        """
+        return len(self.pages)
+
+    @property
+    def available(self):
+        """
+        Returns the number of pages that are currently available for checkout.
+        """
+        return len(self._free)
+
+    def checkout(self, timeout=None):
+        """
+        Take a page from the pool.  If no pages are available, this will wait
+        (running the event loop) for up to :attr:`timeout` seconds for one to
+        be returned, and raise a :class:`TimeoutError` if none is.
+
+        :param timeout: a timeout value, in seconds.  If this is 0, then an
+                        error is raised immediately if no page is available.
+        """
+        if not self._free:
+            if timeout is None:
+                timeout = self.pages[0].main_frame.timeout
+            waiter = EventWaiter(lambda: len(self._free) > 0, timeout,
+                                 [self.pageReturned])
+            if not waiter.run():
+                metrics.WAIT_TIMEOUTS.inc()
+                raise TimeoutError("No page was returned to the pool")
+
+        return self._free.popleft()
+
+    def checkin(self, page, reset=True):
+        """
+        Return a page to the pool.  If the page is over its memory limits, it
+        is recycled, and the fresh page takes its place in the pool.
+
+        :param page: the page to return.
+        :param reset: whether to reset the page to a blank state (see
+                      :meth:`SpecterWebPage.reset`) before it's reused.
+                      Defaults to True.
+        """
+        if page not in self.pages:
+            raise SpecterError("Page does not belong to this pool")
+        if page in self._free:
+            raise SpecterError("Page has already been returned to the pool")
+
+        limits = self.specter.memory_limits
+        if limits is not None and page.check_memory(limits) == 'exceeded':
+            page = self.recycle(page)
+        elif reset:
+            page.reset()
+
+        self._free.append(page)
+        self.pageReturned.emit()
+
+    def recycle(self, page):
+        """
+        Replace a page in the pool with a fresh one, and return the new page.
+        """
+        index = self.pages.index(page)
+        new = self.specter.recycle_page(page)
+        self.pages[index] = new
+        if page in self._free:
+            self._free[self._free.index(page)] = new
+        return new
+
+    @contextmanager
+    def page(self, timeout=None, reset=True):
+        """
+        A context manager that checks out a page, and returns it to the pool
+        when the block exits.
+        """
+        page = self.checkout(timeout)
+        try:
+            yield page
+        finally:
+            self.checkin(page, reset)
+
+    def map(self, func, urls, timeout=None):
+        """
+        Load each of the given URLs in a page from the pool, and call the given
+        function with each page once it's finished loading.  As many URLs are
+        loaded concurrently as there are available pages.  Returns a list of
+        the function's return values, in the same order as the URLs.
+
+        :param func: a callable that's given a loaded page.
+        :param urls: an iterable of URLs to load.
+        :param timeout: a timeout value, in seconds, to wait for any load to
+                        finish, or for a page to be returned if they're all
+                        checked out.
+        """
+        return self._map(lambda index, page: func(page), urls, timeout)
+
+    def render_pdfs(self, urls, paths, page_size='A4', margins=10,
+                    landscape=False, timeout=None):
+        """
+        Load each of the given URLs in a page from the pool, and print each
+        one to a PDF file as soon as it has finished loading.  A single
+        printer is used for every document.  Returns the list of paths.
+
+        :param urls: a list of URLs to load.
+        :param paths: a list of the files to write, one for each URL.
+        :param timeout: a timeout value, in seconds, to wait for any load to
+                        finish.
+
+        See :class:`PDFPrinter` for the remaining arguments.
+        """
+        urls = list(urls)
+        paths = list(paths)
+        if len(urls) != len(paths):
+            raise ValueError("Expected %d paths, got %d" % (len(urls),
+                                                            len(paths)))
+
+        printer = PDFPrinter.get(page_size, margins, landscape)
+
+        def render(index, page):
+            printer.print_frame(page.mainFrame(), paths[index])
+            return paths[index]
+
+        return self._map(render, urls, timeout)
+
+    def _map(self, func, urls, timeout):
+        """
+        Implements :meth:`map`, calling the function with both the index of
+        the URL and the page.
+        """
+        pending = deque(enumerate(urls))
+        results = [None] * len(pending)
+        active = {}
+
+        if timeout is None:
+            timeout = self.pages[0].main_frame.timeout
+
+        def dispatch():
+            while pending and self._free:
+                index, url = pending.popleft()
+                page = self._free.popleft()
+                active[page] = index
+                page.open(url)
+
+        try:
+            dispatch()
+            while active or pending:
+                if active:
+                    waiter = EventWaiter(
+                        lambda: any(page.loaded for page in active),
+                        timeout,
+                        [page.loadFinished for page in active]
+                    )
+                else:
+                    # Every page is checked out elsewhere, so wait for one
+                    # to be returned before going on.
+                    waiter = EventWaiter(lambda: len(self._free) > 0,
+                                         timeout, [self.pageReturned])
+                if not waiter.run():
+                    metrics.WAIT_TIMEOUTS.inc()
+                    raise TimeoutError("Wait timed out")
+
+                for page in [p for p in active if p.loaded]:
+                    index = active.pop(page)
+                    try:
+                        results[index] = func(index, page)
+                    finally:
+                        self.checkin(page)
+
+                dispatch()
+        finally:
+            # If something went wrong, don't leak the pages still in use.
+            for page in list(active):
+                del active[page]
+                self.checkin(page)
+
+        return results
@@ -0,0 +1,61 @@
+"""
+Imports the parts of Qt that Specter uses, from PySide if it's available, or
+PyQt4 otherwise.
+"""
+
+PYSIDE = False
+try:
+    from PySide import QtWebKit
+    from PySide.QtNetwork import QNetworkRequest, QNetworkAccessManager, \
+                                 QNetworkCookieJar, QNetworkDiskCache, \
+                                 QNetworkProxy, QNetworkCookie, \
+                                 QNetworkReply, QAbstractNetworkCache, \
+                                 QNetworkCacheMetaData, QNetworkProxyFactory
+    from PySide import QtCore
+    from PySide.QtCore import QSize, QSizeF, QPoint, QRect, QByteArray, \
+                              QBuffer, QIODevice, QUrl, QDateTime, \
+                              QtCriticalMsg, QtDebugMsg, QtFatalMsg, \
+                              QtWarningMsg, qInstallMsgHandler
+    from PySide.QtGui import QApplication, QImage, QPainter, QPrinter, \
+                             QRegion, QMouseEvent, QKeyEvent
+    QtSignal = QtCore.Signal
+    QtSlot = QtCore.Slot
+    PYSIDE = True
+except ImportError:
+    try:
+        import sip
+        sip.setapi('QVariant', 2)
+        from PyQt4 import QtWebKit
+        from PyQt4.QtNetwork import QNetworkRequest, QNetworkAccessManager, \
+                                    QNetworkCookieJar, QNetworkDiskCache,  \
+                                    QNetworkProxy, QNetworkCookie, \
+                                    QNetworkReply, QAbstractNetworkCache, \
+                                    QNetworkCacheMetaData, \
+                                    QNetworkProxyFactory
+        from PyQt4 import QtCore
+        from PyQt4.QtCore import QSize, QSizeF, QPoint, QRect, QByteArray, \
+                                 QBuffer, QIODevice, QUrl, QDateTime, \
+                                 QtCriticalMsg, QtDebugMsg, QtFatalMsg, \
+                                 QtWarningMsg, qInstallMsgHandler
+        from PyQt4.QtGui import QApplication, QImage, QPainter, QPrinter, \
+                                QRegion, QMouseEvent, QKeyEvent
+        QtSignal = QtCore.pyqtSignal
+        QtSlot = QtCore.pyqtSlot
+    except ImportError:
+        raise Exception("Specter.py requires PySide or PyQt4")
+
+
+__all__ = [
+    'PYSIDE', 'QtCore', 'QtWebKit', 'QtSignal', 'QtSlot',
+
+    'QNetworkRequest', 'QNetworkAccessManager', 'QNetworkCookieJar',
+    'QNetworkDiskCache', 'QNetworkProxy', 'QNetworkCookie', 'QNetworkReply',
+    'QAbstractNetworkCache', 'QNetworkCacheMetaData', 'QNetworkProxyFactory',
+
+    'QSize', 'QSizeF', 'QPoint', 'QRect', 'QByteArray', 'QBuffer',
+    'QIODevice', 'QUrl', 'QDateTime', 'QtCriticalMsg', 'QtDebugMsg',
+    'QtFatalMsg', 'QtWarningMsg', 'qInstallMsgHandler',
+
+    'QApplication', 'QImage', 'QPainter', 'QPrinter', 'QRegion',
+    'QMouseEvent', 'QKeyEvent',
+]
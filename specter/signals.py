@@ -1,6 +1,8 @@
 import itertools
 from contextlib import contextmanager
 
+from . import tracing
+
 
 class _Signal(object):
     """
@@ -72,6 +74,13 @@ class _Signal(object):
         if self.callback is None and self.cb_required:
             raise ValueError("No callback set for signal '%s'" % (self.name,))
 
+        if tracing.current_tracer() is None:
+            return self._emit(sender, *args, **kwargs)
+
+        with tracing.span('signal:' + self.name):
+            return self._emit(sender, *args, **kwargs)
+
+    def _emit(self, sender, *args, **kwargs):
         # Order matters - notify internal listeners first.
         for f in itertools.chain(self.internal_listeners, self.listeners):
             f(sender, *args, **kwargs)
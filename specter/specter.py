@@ -1,47 +1,59 @@
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import base64
 import time
 import logging
+import tempfile
+import functools
 from numbers import Number
+from contextlib import contextmanager
+from collections import OrderedDict, deque
 from weakref import WeakKeyDictionary
 from enum import IntEnum
 
-from .util import proxy_factory, patch
-from .signals import *
-from .exceptions import *
-from .six import PY3, string_types, byte2int
+try:
+    import psutil
+except ImportError:                                         # pragma: no cover
+    psutil = None
 
-PYSIDE = False
 try:
-    from PySide import QtWebKit
-    from PySide.QtNetwork import QNetworkRequest, QNetworkAccessManager, \
-                                 QNetworkCookieJar, QNetworkDiskCache, \
-                                 QNetworkProxy, QNetworkCookie
-    from PySide import QtCore
-    from PySide.QtCore import QSize, QPoint, QByteArray, QUrl, QDateTime, \
-                              QtCriticalMsg, QtDebugMsg, QtFatalMsg, \
-                              QtWarningMsg, qInstallMsgHandler
-    from PySide.QtGui import QApplication, QImage, QPainter, QPrinter, \
-                             QMouseEvent, QKeyEvent
-    PYSIDE = True
-except ImportError:
-    try:
-        import sip
-        sip.setapi('QVariant', 2)
-        from PyQt4 import QtWebKit
-        from PyQt4.QtNetwork import QNetworkRequest, QNetworkAccessManager, \
-                                    QNetworkCookieJar, QNetworkDiskCache,  \
-                                    QNetworkProxy, QNetworkCookie
-        from PyQt4 import QtCore
-        from PyQt4.QtCore import QSize, QByteArray, QUrl, QDateTime, \
-                                 QtCriticalMsg, QtDebugMsg, QtFatalMsg, \
-                                 QtWarningMsg, qInstallMsgHandler
-        from PyQt4.QtGui import QApplication, QImage, QPainter, QPrinter
-    except ImportError:
-        raise Exception("Specter.py requires PySide or PyQt4")
+    import numpy
+except ImportError:                                         # pragma: no cover
+    numpy = None
+
+from . import metrics, tracing
+from .util import proxy_factory, patch, compile_url_pattern, _matches_any
+from .cache import CacheStore, MemoryCache, SharedDiskCache
+from .cookies import SQLiteCookieJar
+from .proxy import ProxyPool, ProxyFactory, make_proxy, _QtProxyFactory
+from .har import HARRecorder
+from .pdf import PDFPrinter
+from .imaging import PNGWriter, ImageEncoder, image_buffer, array_image, \
+    encode_image
+from .tracing import traced
+from .signals import *
+from .exceptions import *
+from .six import PY3, string_types, byte2int, reraise
+from .qt import *
 
 
 logger = logging.getLogger('specter')
 
 
+def _load_script(name):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    with open(path, 'r') as f:
+        return f.read()
+
+
+# JavaScript that's injected into each frame to watch for DOM changes.
+WATCHER_JS = _load_script('watcher.js')
+
+
 class QtMessageProxy(object):
     _mapping = {
         QtDebugMsg: logging.DEBUG,
@@ -61,13 +73,606 @@ class QtMessageProxy(object):
         logger.log(level, "QT: " + msg)
 
 
+@contextmanager
+def _atomic_file(path):
+    """
+    A context manager that yields a temporary file, opened for writing in
+    binary mode, which replaces the given path if the block succeeds and is
+    deleted otherwise.  Readers never see a partially-written file.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.',
+                               suffix='.tmp',
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.rename(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:                                     # pragma: no cover
+            pass
+        raise
+
+
+class NetworkStats(object):
+    """
+    Counters for the network activity of a page (or of an entire
+    :class:`NetworkAccessManager`).
+    """
+    def __init__(self):
+        # The number of requests that are currently in progress.  This is a
+        # gauge rather than a counter, so it isn't cleared by reset().
+        self.in_flight = 0
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.blocked = 0
+        self.bytes_received = 0
+
+        # An estimate of the bytes that blocking requests has saved, based on
+        # the size of the responses when they were last fetched (if ever).
+        self.bytes_saved = 0
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'blocked': self.blocked,
+            'bytes_received': self.bytes_received,
+            'bytes_saved': self.bytes_saved,
+            'in_flight': self.in_flight,
+        }
+
+    def __repr__(self):
+        return "NetworkStats(%r)" % (self.as_dict(),)
+
+
+class BlockRules(object):
+    """
+    A set of rules that decide which requests a :class:`NetworkAccessManager`
+    should block.  A request is blocked if it matches any of the given URL
+    patterns or resource types, if its host is in the denied domains, or if
+    allowed domains are given and its host isn't one of them.  Domains also
+    match their subdomains.  For example::
+
+        rules = BlockRules(
+            patterns=['*/analytics.js', re.compile('doubleclick')],
+            resource_types=['image', 'font', 'media'],
+            deny_domains=['facebook.net'],
+        )
+        s = Specter(block_rules=rules)
+
+    :param patterns: URL patterns - either glob-style strings, or compiled
+                     regular expressions.
+    :param resource_types: classes of resource to block; see
+                           :attr:`RESOURCE_TYPES`.
+    :param allow_domains: if given, only requests to these domains are
+                          allowed.
+    :param deny_domains: requests to these domains are blocked.
+    """
+    # Resource types are inferred from a request's Accept header (as set by
+    # WebKit), and from the extension of the URL's path.
+    RESOURCE_TYPES = {
+        'image': (('image/',), ('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg',
+                                'ico', 'bmp')),
+        'stylesheet': (('text/css',), ('css',)),
+        'script': ((), ('js',)),
+        'font': ((), ('woff', 'woff2', 'ttf', 'otf', 'eot')),
+        'media': (('video/', 'audio/'), ('mp4', 'webm', 'ogg', 'ogv', 'mp3',
+                                         'wav', 'm4a', 'flv', 'mov', 'avi')),
+    }
+
+    def __init__(self, patterns=(), resource_types=(), allow_domains=None,
+                 deny_domains=()):
+        self._patterns = []
+        for pattern in patterns:
+            self.add_pattern(pattern)
+
+        for ty in resource_types:
+            if ty not in self.RESOURCE_TYPES:
+                raise ValueError("Unknown resource type: %s" % (ty,))
+        self.resource_types = frozenset(resource_types)
+
+        if allow_domains is not None:
+            allow_domains = [d.lower().lstrip('.') for d in allow_domains]
+        self.allow_domains = allow_domains
+        self.deny_domains = [d.lower().lstrip('.') for d in deny_domains]
+
+    def add_pattern(self, pattern):
+        """
+        Add a URL pattern to block.  Strings are treated as glob-style
+        patterns that must match the whole URL.
+        """
+        self._patterns.append(compile_url_pattern(pattern))
+
+    @staticmethod
+    def _domain_in(host, domains):
+        for domain in domains:
+            if host == domain or host.endswith('.' + domain):
+                return True
+        return False
+
+    def resource_type(self, url, accept=''):
+        """
+        Returns the inferred resource type of a request, or None.
+        """
+        path = url.path().lower()
+        ext = path.rsplit('.', 1)[-1] if '.' in path else ''
+
+        for ty, (mimetypes, extensions) in self.RESOURCE_TYPES.items():
+            if ext in extensions:
+                return ty
+            for mimetype in mimetypes:
+                if accept.startswith(mimetype):
+                    return ty
+        return None
+
+    def should_block(self, request):
+        """
+        Returns whether the given QNetworkRequest should be blocked.
+        """
+        url = request.url()
+        host = url.host().lower()
+
+        if self.allow_domains is not None and \
+                not self._domain_in(host, self.allow_domains):
+            return True
+        if self._domain_in(host, self.deny_domains):
+            return True
+
+        if self.resource_types:
+            accept = bytes(request.rawHeader(b'Accept')).decode('latin-1')
+            if self.resource_type(url, accept) in self.resource_types:
+                return True
+
+        if self._patterns:
+            url_str = url.toString()
+            for pattern in self._patterns:
+                if pattern.search(url_str):
+                    return True
+
+        return False
+
+
+class BlockedReply(QNetworkReply):
+    """
+    An empty reply that's returned in place of a blocked request.  It
+    finishes immediately, with an 'operation canceled' error.
+    """
+    def __init__(self, parent, request, operation):
+        super(BlockedReply, self).__init__(parent)
+        self.setRequest(request)
+        self.setUrl(request.url())
+        self.setOperation(operation)
+        self.setError(QNetworkReply.OperationCanceledError,
+                      "Request blocked by Specter")
+        self.open(QtCore.QIODevice.ReadOnly)
+
+        # WebKit connects to our signals after we've been created, so these
+        # must be emitted asynchronously.
+        QtCore.QTimer.singleShot(0, self._finish)
+
+    def _finish(self):
+        self.metaDataChanged.emit()
+        self.finished.emit()
+
+    def abort(self):
+        pass
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        return 0
+
+    def readData(self, maxlen):
+        return b''
+
+
+class CapturedResponse(object):
+    """
+    A response body captured by a :class:`ResponseCapture`, along with the
+    response's status and headers.  Data is stored as the chunks received from
+    the network, which are shared with the data passed on to WebKit, so the
+    body is only copied once, when it's first accessed.
+    """
+    def __init__(self, url, page, max_size):
+        self.url = url
+        self.page = page
+        self.max_size = max_size
+        self.status = None
+        self.headers = {}
+        self.error = None
+        self.size = 0
+        self.truncated = False
+        self.finished = False
+
+        # Whether this response has been returned by wait_for_response().
+        self.claimed = False
+
+        self._chunks = []
+        self._body = None
+
+    def append(self, chunk):
+        if self.size + len(chunk) > self.max_size:
+            chunk = chunk[:self.max_size - self.size]
+            self.truncated = True
+        if chunk:
+            self._chunks.append(chunk)
+            self.size += len(chunk)
+
+    @property
+    def body(self):
+        """
+        Returns the captured body, as bytes.
+        """
+        if self._body is None:
+            if len(self._chunks) == 1:
+                self._body = self._chunks[0]
+            else:
+                self._body = b''.join(self._chunks)
+            self._chunks = [self._body]
+        return self._body
+
+    def json(self):
+        """
+        Returns the body, decoded as JSON.
+        """
+        return json.loads(self.body.decode('utf-8'))
+
+    def __repr__(self):
+        return "CapturedResponse(%r, status=%r, size=%d)" % (
+            self.url, self.status, self.size)
+
+
+class ResponseCapture(object):
+    """
+    Decides which responses a :class:`NetworkAccessManager` copies the bodies
+    of, and holds the captured responses.  Memory use is bounded: only the
+    most recent :attr:`max_responses` responses are kept, and each body is
+    truncated to :attr:`max_body_size` bytes.
+
+    :param patterns: URL patterns for the responses to capture, either as
+                     glob-style strings, or compiled regular expressions.
+    :param max_body_size: the maximum number of bytes kept for each body.
+    :param max_responses: the maximum number of responses kept.
+    """
+    def __init__(self, patterns, max_body_size=10 * 1024 * 1024,
+                 max_responses=100):
+        self.patterns = [compile_url_pattern(p) for p in patterns]
+        self.max_body_size = max_body_size
+        self.responses = deque(maxlen=max_responses)
+
+    def add_pattern(self, pattern):
+        self.patterns.append(compile_url_pattern(pattern))
+
+    def matches(self, url):
+        return _matches_any(self.patterns, url)
+
+    def start(self, url, page):
+        """
+        Start capturing a response, returning the :class:`CapturedResponse`.
+        """
+        response = CapturedResponse(url, page, self.max_body_size)
+        self.responses.append(response)
+        return response
+
+    def clear(self):
+        self.responses.clear()
+
+
+class TeeReply(QNetworkReply):
+    """
+    Wraps a QNetworkReply, passing its data on to WebKit unchanged while
+    also copying it into a :class:`CapturedResponse`.
+    """
+    _attributes = [
+        QNetworkRequest.HttpStatusCodeAttribute,
+        QNetworkRequest.HttpReasonPhraseAttribute,
+        QNetworkRequest.RedirectionTargetAttribute,
+        QNetworkRequest.SourceIsFromCacheAttribute,
+    ]
+
+    def __init__(self, parent, reply, captured):
+        super(TeeReply, self).__init__(parent)
+        self._reply = reply
+        self.captured = captured
+
+        # Data that hasn't been read by WebKit yet.
+        self._chunks = deque()
+        self._available = 0
+
+        self.setRequest(reply.request())
+        self.setUrl(reply.url())
+        self.setOperation(reply.operation())
+        self.open(QtCore.QIODevice.ReadOnly | QtCore.QIODevice.Unbuffered)
+
+        reply.metaDataChanged.connect(self._on_metadata)
+        reply.readyRead.connect(self._on_ready_read)
+        reply.finished.connect(self._on_finished)
+        reply.downloadProgress.connect(self.downloadProgress.emit)
+        reply.uploadProgress.connect(self.uploadProgress.emit)
+        reply.sslErrors.connect(self.sslErrors.emit)
+
+    def _copy_metadata(self):
+        reply = self._reply
+        for header in reply.rawHeaderList():
+            self.setRawHeader(header, reply.rawHeader(header))
+        for attribute in self._attributes:
+            value = reply.attribute(attribute)
+            if value is not None:
+                self.setAttribute(attribute, value)
+
+    def _on_metadata(self):
+        self._copy_metadata()
+        self.metaDataChanged.emit()
+
+    def _on_ready_read(self):
+        chunk = self._reply.readAll().data()
+        if not chunk:
+            return
+
+        self._chunks.append(chunk)
+        self._available += len(chunk)
+        self.captured.append(chunk)
+        self.readyRead.emit()
+
+    def _on_finished(self):
+        self._copy_metadata()
+        self._on_ready_read()
+
+        reply = self._reply
+        captured = self.captured
+        captured.status = reply.attribute(
+            QNetworkRequest.HttpStatusCodeAttribute)
+        captured.headers = dict(
+            (h.data().decode('latin-1'),
+             reply.rawHeader(h).data().decode('latin-1'))
+            for h in reply.rawHeaderList())
+        if reply.error() != QNetworkReply.NoError:
+            captured.error = reply.errorString()
+            self.setError(reply.error(), reply.errorString())
+        captured.finished = True
+
+        self.setFinished(True)
+        self.finished.emit()
+
+    def abort(self):
+        self._reply.abort()
+
+    def ignoreSslErrors(self, *args):
+        self._reply.ignoreSslErrors(*args)
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        return self._available + super(TeeReply, self).bytesAvailable()
+
+    def readData(self, maxlen):
+        parts = []
+        while self._chunks and maxlen > 0:
+            chunk = self._chunks[0]
+            if len(chunk) <= maxlen:
+                parts.append(self._chunks.popleft())
+            else:
+                parts.append(chunk[:maxlen])
+                self._chunks[0] = chunk[maxlen:]
+            maxlen -= len(parts[-1])
+
+        data = b''.join(parts)
+        self._available -= len(data)
+        return data
+
+
+class ReplyRecord(object):
+    """
+    Information that a :class:`NetworkAccessManager` keeps about each reply
+    while it's in flight.
+    """
+    def __init__(self, reply, page):
+        self.reply = reply
+        self.page = page
+        self.url = reply.request().url().toString()
+        self.started = time.time()
+        self.responded = None
+        self.received = 0
+
+        # The (ProxyFactory, key) that the request's proxy was assigned by, if
+        # it was sent through a proxy pool.
+        self.proxy = None
+
+        # The in-progress HAR entry, if requests are being recorded.
+        self.entry = None
+
+    def on_progress(self, received, total):
+        self.received = received
+
+    def on_metadata(self):
+        if self.responded is None:
+            self.responded = time.time()
+
+
 class NetworkAccessManager(QNetworkAccessManager):
+    # Emitted with the page (or None) whenever a request starts or finishes.
+    activityChanged = QtSignal(object)
+
+    # Emitted with the CapturedResponse when a captured response finishes.
+    responseCaptured = QtSignal(object)
+
+    # Maximum number of response sizes remembered, for estimating the number
+    # of bytes saved by blocking requests.
+    KNOWN_SIZES_LIMIT = 4096
+
     def __init__(self, parent=None):
         QNetworkAccessManager.__init__(self, parent=parent)
         self._ignore_ssl_errors = False
 
+        self.block_rules = None
+        self.capture = None
+        self.recorder = None
+        self.stats = NetworkStats()
+        self.force_cache = []
+
+        # Headers that are added to every request (unless the request already
+        # has a value for the header).
+        self.headers = {}
+
+        self._proxy = None
+        self._proxy_factory = None
+        self._known_sizes = OrderedDict()
+
         self.sslErrors.connect(self.handleSslErrors)
 
+    @staticmethod
+    def page_for_request(request):
+        """
+        Returns the page that made the given request, or None if it wasn't
+        made by a page (or the page is unknown).
+        """
+        origin = request.originatingObject()
+        if isinstance(origin, QtWebKit.QWebFrame):
+            return origin.page()
+        return None
+
+    def _page_stats(self, page):
+        return getattr(page, 'network_stats', None)
+
+    def createRequest(self, operation, request, data=None):
+        page = self.page_for_request(request)
+        page_stats = self._page_stats(page)
+
+        # The first request from the main frame during a load is for the
+        # document itself.
+        result = getattr(page, 'load_result', None)
+        if (result is not None and not result.finished and
+                result.requested_url is None and
+                request.originatingObject() is page.mainFrame()):
+            result.requested_url = request.url().toString()
+
+        self.stats.requests += 1
+        if page_stats is not None:
+            page_stats.requests += 1
+
+        if self.block_rules is not None and \
+                self.block_rules.should_block(request):
+            saved = self._known_sizes.get(request.url().toString(), 0)
+            metrics.REQUESTS_BLOCKED.inc()
+            for stats in (self.stats, page_stats):
+                if stats is not None:
+                    stats.blocked += 1
+                    stats.bytes_saved += saved
+
+            return BlockedReply(self, request, operation)
+
+        if self.headers:
+            request = QNetworkRequest(request)
+            for header, val in self.headers.items():
+                if not request.hasRawHeader(header):
+                    request.setRawHeader(header, val)
+
+        if self.force_cache and \
+                _matches_any(self.force_cache, request.url().toString()):
+            request = QNetworkRequest(request)
+            request.setAttribute(QNetworkRequest.CacheLoadControlAttribute,
+                                 QNetworkRequest.PreferCache)
+
+        # The proxy must be chosen before Qt asks the factory for it.
+        factory = self._proxy_factory
+        proxy_key = None
+        if factory is not None:
+            proxy_key = factory.assign(request.url())
+
+        reply = QNetworkAccessManager.createRequest(self, operation, request,
+                                                    data)
+
+        record = ReplyRecord(reply, page)
+        if proxy_key is not None:
+            record.proxy = (factory, proxy_key)
+        reply.downloadProgress.connect(record.on_progress)
+        if self.recorder is not None:
+            reply.metaDataChanged.connect(record.on_metadata)
+            self.recorder.start(record, operation, request)
+        reply.finished.connect(
+            functools.partial(self._on_reply_finished, record))
+
+        self.stats.in_flight += 1
+        if page_stats is not None:
+            page_stats.in_flight += 1
+        self.activityChanged.emit(page)
+
+        if self.capture is not None and self.capture.matches(record.url):
+            reply = TeeReply(self, reply, self.capture.start(record.url,
+                                                             page))
+            reply.finished.connect(functools.partial(
+                self.responseCaptured.emit, reply.captured))
+        return reply
+
+    # Errors that count against a proxy's health.
+    _proxy_errors = frozenset(int(e) for e in [
+        QNetworkReply.ProxyConnectionRefusedError,
+        QNetworkReply.ProxyConnectionClosedError,
+        QNetworkReply.ProxyNotFoundError,
+        QNetworkReply.ProxyTimeoutError,
+        QNetworkReply.ProxyAuthenticationRequiredError,
+        QNetworkReply.TimeoutError,
+    ])
+
+    @property
+    def proxy(self):
+        """
+        Returns the proxy configuration, as given to the setter.
+        """
+        return self._proxy
+
+    @proxy.setter
+    def proxy(self, val):
+        """
+        Set the proxy to use.  This may be a proxy URL (e.g.
+        ``http://host:8080``), a QNetworkProxy, a list of proxy URLs or a
+        :class:`ProxyPool` (to rotate between several proxies), a
+        :class:`ProxyFactory` (to route per-host), or None for no proxy.
+        """
+        self._proxy = val
+        self._proxy_factory = None
+
+        if isinstance(val, (list, tuple, ProxyPool)):
+            val = ProxyFactory(val)
+        if isinstance(val, ProxyFactory):
+            self._proxy_factory = val
+            self.setProxyFactory(_QtProxyFactory(val))
+        else:
+            self.setProxyFactory(None)
+            self.setProxy(make_proxy(val))
+
+    def _on_reply_finished(self, record):
+        if record.entry is not None and self.recorder is not None:
+            self.recorder.finish(record)
+
+        if record.proxy is not None:
+            factory, key = record.proxy
+            error = record.reply.error()
+            factory.release(key, time.time() - record.started,
+                            int(error) not in self._proxy_errors)
+
+        size = record.received
+
+        self.stats.bytes_received += size
+        self.stats.in_flight -= 1
+        metrics.BYTES_RECEIVED.inc(size)
+        page_stats = self._page_stats(record.page)
+        if page_stats is not None:
+            page_stats.bytes_received += size
+            page_stats.in_flight -= 1
+
+        if size:
+            self._known_sizes[record.url] = size
+            if len(self._known_sizes) > self.KNOWN_SIZES_LIMIT:
+                self._known_sizes.popitem(last=False)
+
+        self.activityChanged.emit(record.page)
+
     def handleSslErrors(self, reply, errors):
         ssl_error.emit(self, errors)
         if self._ignore_ssl_errors:
@@ -90,6 +695,371 @@ class Modifiers(IntEnum):
     No = int(QtCore.Qt.KeyboardModifier.NoModifier)
 
 
+class EventWaiter(object):
+    """
+    Runs a nested Qt event loop until a predicate becomes true, or until a
+    timeout expires.  Rather than repeatedly sleeping and polling, the
+    predicate is only re-checked when one of the given Qt signals fires (or,
+    optionally, when a fallback poll timer fires), so the process sleeps inside
+    the event loop whenever there's nothing to do.
+    """
+    def __init__(self, predicate, timeout, signals=(), poll_interval=None):
+        self.predicate = predicate
+        self.timeout = timeout
+        self.signals = list(signals)
+        self.poll_interval = poll_interval
+        self.done = False
+        self._error = None
+        self._loop = None
+
+    def check(self, *args):
+        """
+        Re-evaluate the predicate, stopping the event loop if it's satisfied.
+        Any arguments (e.g. from the signal that triggered the check) are
+        ignored.
+        """
+        if self.done:
+            return
+
+        try:
+            self.done = bool(self.predicate())
+        except Exception:
+            # Exceptions raised inside a Qt slot would otherwise be swallowed,
+            # so save it and re-raise once we're out of the event loop.
+            self._error = sys.exc_info()
+            self.done = True
+
+        if self.done and self._loop is not None:
+            self._loop.quit()
+
+    def wake_in(self, seconds):
+        """
+        Schedule an additional check of the predicate after the given number
+        of seconds.
+        """
+        QtCore.QTimer.singleShot(max(0, int(seconds * 1000)), self.check)
+
+    def run(self):
+        """
+        Run the event loop.  Returns True if the predicate was satisfied, and
+        False if the timeout expired first.
+        """
+        self.check()
+
+        if not self.done:
+            loop = self._loop = QtCore.QEventLoop()
+
+            deadline = QtCore.QTimer()
+            deadline.setSingleShot(True)
+            deadline.timeout.connect(loop.quit)
+
+            poller = None
+            if self.poll_interval:
+                poller = QtCore.QTimer()
+                poller.timeout.connect(self.check)
+                poller.start(max(1, int(self.poll_interval * 1000)))
+
+            for signal in self.signals:
+                signal.connect(self.check)
+
+            deadline.start(max(0, int(self.timeout * 1000)))
+            try:
+                with tracing.span('event-loop', 'qt'):
+                    loop.exec_()
+            finally:
+                for signal in self.signals:
+                    signal.disconnect(self.check)
+
+                deadline.stop()
+                if poller is not None:
+                    poller.stop()
+
+                self._loop = None
+
+            # Give the predicate one final chance, since the deadline may have
+            # fired right as the condition became true.
+            self.check()
+
+        if self._error is not None:
+            reraise(*self._error)
+
+        return self.done
+
+
+class JavaScriptBridge(QtCore.QObject):
+    """
+    An object that's exposed to JavaScript in each frame (as
+    ``window.__specterBridge``), which lets scripts injected by Specter notify
+    Python of changes, rather than Python having to poll the page.
+    """
+    selectorChanged = QtSignal(int, bool)
+    textMatched = QtSignal(int, int)
+
+    @QtSlot(int, bool)
+    def notifySelector(self, ident, present):
+        self.selectorChanged.emit(ident, present)
+
+    @QtSlot(int, int)
+    def notifyText(self, ident, index):
+        self.textMatched.emit(ident, index)
+
+
+class SelectorWatcher(object):
+    """
+    Keeps track of whether a set of CSS selectors currently match anything in
+    a frame.  The tracking is done by an injected MutationObserver (or, in
+    older versions of WebKit, DOM mutation events), which only re-checks a
+    selector when the relevant part of the DOM changes, and notifies Python
+    through the frame's :class:`JavaScriptBridge`.  Any number of selectors
+    can be watched at once.
+    """
+    def __init__(self, frame, bridge):
+        self._frame = frame
+        self.bridge = bridge
+        self.bridge.selectorChanged.connect(self._on_changed)
+
+        self._next_id = 0
+        self._ids = {}          # selector -> id
+        self._counts = {}       # id -> number of active watches
+        self._present = {}      # id -> bool, or None if unknown
+
+    def _on_changed(self, ident, present):
+        if ident in self._present:
+            self._present[ident] = bool(present)
+
+    def _register(self, ident, selector):
+        ret = self._frame.evaluateJavaScript(
+            'window.__specterWatcher ? '
+            'window.__specterWatcher.watch(%d, %s) : null' % (
+                ident, json.dumps(selector)))
+        if ret is None:
+            self._present[ident] = None
+        else:
+            self._present[ident] = bool(ret)
+
+    def reinstall(self):
+        """
+        Re-register all watched selectors, after the frame's JavaScript window
+        object has been cleared (e.g. due to navigation).
+        """
+        for selector, ident in self._ids.items():
+            self._register(ident, selector)
+            if self._present[ident] is not None:
+                self.bridge.selectorChanged.emit(ident, self._present[ident])
+
+    def watch(self, selector):
+        """
+        Start watching the given selector, returning an identifier that can be
+        given to :meth:`present` and :meth:`unwatch`.
+        """
+        ident = self._ids.get(selector)
+        if ident is None:
+            ident = self._ids[selector] = self._next_id
+            self._next_id += 1
+            self._counts[ident] = 0
+            self._register(ident, selector)
+
+        self._counts[ident] += 1
+        return ident
+
+    def unwatch(self, ident):
+        self._counts[ident] -= 1
+        if self._counts[ident] > 0:
+            return
+
+        selector = [k for k, v in self._ids.items() if v == ident][0]
+        del self._ids[selector]
+        del self._counts[ident]
+        del self._present[ident]
+        self._frame.evaluateJavaScript(
+            'window.__specterWatcher && '
+            'window.__specterWatcher.unwatch(%d)' % (ident,))
+
+    @contextmanager
+    def watching(self, selector):
+        ident = self.watch(selector)
+        try:
+            yield ident
+        finally:
+            self.unwatch(ident)
+
+    def present(self, ident):
+        """
+        Returns whether the selector with the given identifier currently
+        matches an element, or None if this is unknown (e.g. because the
+        watcher script could not be injected).
+        """
+        return self._present.get(ident)
+
+
+class TextWatcher(object):
+    """
+    Watches a frame for any of a set of text patterns to appear.  The document
+    is scanned once when a watch is registered, and afterwards the injected
+    watcher script only checks the text of elements whose children are added
+    or changed, rather than re-serializing the whole document.
+    """
+    def __init__(self, frame, bridge):
+        self._frame = frame
+        self.bridge = bridge
+        self.bridge.textMatched.connect(self._on_matched)
+
+        self._next_id = 0
+        self._patterns = {}     # id -> list of JSON-able pattern specs
+        self._matched = {}      # id -> index of matching pattern, -1 if none
+                                # has matched, or None if unknown
+
+    @staticmethod
+    def _spec(pattern):
+        if hasattr(pattern, 'pattern'):
+            # A compiled regular expression.  Note that this will be evaluated
+            # by JavaScript, so the syntax must be compatible.
+            flags = ''
+            if pattern.flags & re.IGNORECASE:
+                flags += 'i'
+            if pattern.flags & re.MULTILINE:
+                flags += 'm'
+            return {'regex': pattern.pattern, 'flags': flags}
+
+        return {'text': pattern}
+
+    def _on_matched(self, ident, index):
+        if self._matched.get(ident) == -1:
+            self._matched[ident] = index
+
+    def _register(self, ident):
+        ret = self._frame.evaluateJavaScript(
+            'window.__specterWatcher ? '
+            'window.__specterWatcher.watchText(%d, %s) : null' % (
+                ident, json.dumps(self._patterns[ident])))
+        if ret is None:
+            self._matched[ident] = None
+        else:
+            self._matched[ident] = int(ret)
+
+    def reinstall(self):
+        """
+        Re-register all text watches that haven't yet matched, after the
+        frame's JavaScript window object has been cleared.
+        """
+        for ident in self._patterns:
+            if self._matched[ident] in (-1, None):
+                self._register(ident)
+                if self._matched[ident] not in (-1, None):
+                    self.bridge.textMatched.emit(ident, self._matched[ident])
+
+    def watch(self, patterns):
+        """
+        Start watching for the given patterns (strings or compiled regular
+        expressions), returning an identifier for use with :meth:`matched` and
+        :meth:`unwatch`.
+        """
+        ident = self._next_id
+        self._next_id += 1
+
+        self._patterns[ident] = [self._spec(p) for p in patterns]
+        self._register(ident)
+        return ident
+
+    def unwatch(self, ident):
+        del self._patterns[ident]
+        del self._matched[ident]
+        self._frame.evaluateJavaScript(
+            'window.__specterWatcher && '
+            'window.__specterWatcher.unwatchText(%d)' % (ident,))
+
+    @contextmanager
+    def watching(self, patterns):
+        ident = self.watch(patterns)
+        try:
+            yield ident
+        finally:
+            self.unwatch(ident)
+
+    def matched(self, ident):
+        """
+        Returns the index of the pattern that matched for the given watch, -1
+        if nothing has matched yet, or None if this is unknown (e.g. because
+        the watcher script could not be injected).
+        """
+        return self._matched.get(ident)
+
+
+# Regular expression flags that JavaScript supports.  UNICODE is set by
+# default for Python 3 string patterns, and doesn't change the meaning of
+# patterns that are valid in JavaScript.
+_JS_REGEX_FLAGS = (re.IGNORECASE | re.MULTILINE | re.UNICODE |
+                   getattr(re, 'ASCII', 0))
+
+
+def _check_js_regex(regex):
+    """
+    Raises a ValueError if the given compiled regular expression uses flags
+    or syntax that JavaScript's RegExp doesn't support, such as named groups,
+    inline flags, lookbehind or ``\\A`` and ``\\Z``.
+    """
+    source = regex.pattern
+    if not isinstance(source, string_types):
+        source = source.decode('latin-1')
+
+    if regex.flags & ~_JS_REGEX_FLAGS:
+        raise ValueError("Only the IGNORECASE and MULTILINE flags can be "
+                         "used in regular expressions: %r" % (source,))
+
+    in_class = False
+    i = 0
+    while i < len(source):
+        c = source[i]
+        following = source[i + 1:i + 3]
+        if c == '\\':
+            if following[:1] in ('A', 'Z'):
+                raise ValueError("Unsupported escape in regular expression: "
+                                 "%r" % (source,))
+            i += 2
+            continue
+
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+            # A ']' at the start of a class is a literal.
+            if following[:1] == '^':
+                i += 1
+                following = source[i + 1:i + 3]
+            if following[:1] == ']':
+                i += 1
+        elif c == '(' and following[:1] == '?' and \
+                following[1:] not in (':', '=', '!'):
+            raise ValueError("Unsupported group in regular expression: %r"
+                             % (source,))
+        elif c in '*+?' and following[:1] == '+':
+            raise ValueError("Unsupported quantifier in regular expression: "
+                             "%r" % (source,))
+        i += 1
+
+
+def _text_patterns(text):
+    """
+    Returns the patterns given to :meth:`SpecterWebFrame.wait_for_text` as a
+    list, checking that each is a string or a compiled regular expression.
+    """
+    if isinstance(text, (list, tuple)):
+        patterns = list(text)
+    else:
+        patterns = [text]
+
+    if not patterns:
+        raise ValueError("No patterns given")
+    for pattern in patterns:
+        if hasattr(pattern, 'pattern'):
+            _check_js_regex(pattern)
+        elif not isinstance(pattern, string_types):
+            raise TypeError("Expected a string or regular expression, got "
+                            "%r" % (pattern,))
+    return patterns
+
+
 class SpecterWebFrame(object):
     def __init__(self, underlying, registry, app):
         self._frame = underlying
@@ -98,6 +1068,19 @@ class SpecterWebFrame(object):
         self._timeout = 90      # Matches 'network.http.connection-timeout'
                                 # from Firefox
 
+        # Interval at which arbitrary predicates given to wait_for() are
+        # re-checked, in addition to whenever the page signals a change.
+        self.poll_interval = 0.05
+
+        # Height, in pixels, of the strips that full-page screenshots are
+        # rendered in.  This bounds the memory used to capture tall pages.
+        self.screenshot_tile_height = 1024
+
+        # Created on-demand - see the 'bridge' property.
+        self._bridge = None
+        self._selector_watcher = None
+        self._text_watcher = None
+
     # ----------------------------------------------------------------------
     # ----------------------------- Properties -----------------------------
     # ----------------------------------------------------------------------
@@ -192,13 +1175,59 @@ class SpecterWebFrame(object):
 
         return ret
 
+    @property
+    def bridge(self):
+        """
+        Returns the :class:`JavaScriptBridge` for this frame, creating it and
+        injecting Specter's scripts into the frame if necessary.
+        """
+        if self._bridge is None:
+            self._bridge = JavaScriptBridge()
+            self._frame.javaScriptWindowObjectCleared.connect(
+                self._on_window_cleared)
+            self._install_scripts()
+
+        return self._bridge
+
+    @property
+    def selector_watcher(self):
+        """
+        Returns the :class:`SelectorWatcher` for this frame.
+        """
+        if self._selector_watcher is None:
+            self._selector_watcher = SelectorWatcher(self._frame, self.bridge)
+        return self._selector_watcher
+
+    @property
+    def text_watcher(self):
+        """
+        Returns the :class:`TextWatcher` for this frame.
+        """
+        if self._text_watcher is None:
+            self._text_watcher = TextWatcher(self._frame, self.bridge)
+        return self._text_watcher
+
+    def _install_scripts(self):
+        self._frame.addToJavaScriptWindowObject('__specterBridge',
+                                                self._bridge)
+        self._frame.evaluateJavaScript(WATCHER_JS)
+
+    def _on_window_cleared(self):
+        self._install_scripts()
+        if self._selector_watcher is not None:
+            self._selector_watcher.reinstall()
+        if self._text_watcher is not None:
+            self._text_watcher.reinstall()
+
     # ----------------------------------------------------------------------
     # ------------------------------ Methods -------------------------------
     # ----------------------------------------------------------------------
 
+    @traced()
     def open(self, address, method="GET", **kwargs):
         """
-        Open a URL in the current frame.
+        Open a URL in the current frame.  Returns a :class:`LoadResult`,
+        which is filled in once the load has finished.
 
         :param address: the url to open
         :param method: the HTTP method to use.  Defaults to 'GET'.
@@ -218,30 +1247,171 @@ class SpecterWebFrame(object):
             for header, val in kwargs['headers'].items():
                 request.setRawHeader(header, val)
 
+        # Mark the page as loading straight away, so that a subsequent wait
+        # doesn't see the state from the previous load.
+        page = self._frame.page()
+        page.loaded = False
+        result = page.load_result = LoadResult(address)
+
         self._frame.load(request, method, body)
+        return result
 
+    def _change_signals(self):
+        """
+        Returns the Qt signals that indicate that the content of this frame
+        may have changed, and thus that a wait predicate should be re-checked.
+        """
+        page = self._frame.page()
+        return [
+            page.loadStarted,
+            page.loadProgress,
+            page.loadFinished,
+            page.contentsChanged,
+            page.repaintRequested,
+        ]
+
+    def _wait(self, predicate, timeout=None, signals=(), poll_interval=None):
+        if timeout is None:
+            timeout = self._timeout
+
+        waiter = EventWaiter(predicate, timeout, signals, poll_interval)
+        if not waiter.run():
+            metrics.WAIT_TIMEOUTS.inc()
+            raise TimeoutError("Wait timed out")
+
+    @traced()
     def wait_for(self, predicate, timeout=None):
         """
         Wait for a given predicate to be true, waiting up to :attr:`timeout`
         seconds.  If the operaton times out, then a :class:`TimeoutError` will
         be raised.
 
+        The predicate is re-checked whenever the page signals that it has
+        changed, and at most every :attr:`poll_interval` seconds otherwise.
+
         :param predicate: a callable that is called to determine if the wait
                           operation has succeeded.
         :param timeout: a timeout value, in seconds.  Fractional seconds (as
                         a float) are accepted.
         """
+        self._wait(predicate, timeout, self._change_signals(),
+                   self.poll_interval)
+
+    def _wait_quiet(self, quiet, timeout=None, signals=(), busy=None,
+                    source=None):
+        """
+        Wait until none of the given signals have fired for :attr:`quiet`
+        seconds.  If given, the :attr:`busy` callable must also return False
+        for the wait to finish.  If a source is given, signals whose first
+        argument is some other object are ignored.
+        """
+        last = [time.time()]
+
+        def changed(*args):
+            if source is None or (args and args[0] is source):
+                last[0] = time.time()
+
+        def settled():
+            if busy is not None and busy():
+                # Any change will be signalled, but check again once the
+                # quiet period has passed anyway, in case it was missed.
+                waiter.wake_in(quiet)
+                return False
+
+            remaining = quiet - (time.time() - last[0])
+            if remaining > 0:
+                waiter.wake_in(remaining + 0.001)
+                return False
+            return True
+
         if timeout is None:
             timeout = self._timeout
+        waiter = EventWaiter(settled, timeout)
 
-        start = time.time()
-        while time.time() < (start + timeout):
-            if predicate():
-                return
-            self.app.processEvents()
-            time.sleep(0.01)
+        for signal in signals:
+            signal.connect(changed)
+        try:
+            if not waiter.run():
+                metrics.WAIT_TIMEOUTS.inc()
+                raise TimeoutError("Wait timed out")
+        finally:
+            for signal in signals:
+                signal.disconnect(changed)
+
+    @traced()
+    def wait_for_layout(self, quiet=0.1, timeout=None):
+        """
+        Wait for the layout of the page to settle - i.e. until the size of its
+        contents hasn't changed for :attr:`quiet` seconds.  Repaints are
+        ignored, since animations, spinners and the like repaint
+        continuously without affecting the layout.
 
-        raise TimeoutError("Wait timed out")
+        :param quiet: the length of the quiet period, in seconds.
+        :param timeout: a timeout value, in seconds.
+        """
+        self._wait_quiet(quiet, timeout, [self._frame.contentsSizeChanged])
+
+    @traced()
+    def wait_for_network_idle(self, idle_ms=500, max_inflight=0,
+                              timeout=None):
+        """
+        Wait until the page's network activity has died down - i.e. until no
+        more than :attr:`max_inflight` requests have been in progress, and no
+        request has started or finished, for :attr:`idle_ms` milliseconds.
+        This is useful for pages that keep fetching data with XHR after they
+        have finished loading.
+
+        :param idle_ms: the length of the idle period, in milliseconds.
+        :param max_inflight: the number of requests that may still be in
+                             progress (e.g. long-polling connections).
+        :param timeout: a timeout value, in seconds.
+        """
+        page = self._frame.page()
+        manager = page.networkAccessManager()
+        stats = getattr(page, 'network_stats', None)
+        if stats is None or not hasattr(manager, 'activityChanged'):
+            raise SpecterError("Network activity isn't tracked for this page")
+
+        self._wait_quiet(idle_ms / 1000.0, timeout, [manager.activityChanged],
+                         lambda: stats.in_flight > max_inflight, source=page)
+
+    @traced()
+    def wait_for_response(self, pattern, timeout=None):
+        """
+        Wait for a response whose URL matches the given pattern to finish
+        loading, and return it as a :class:`CapturedResponse`.  The response
+        must be captured (see :class:`ResponseCapture`), which lets data that
+        a page fetches with XHR be read directly, rather than being scraped
+        back out of the DOM.
+
+        Responses that finished before this is called are returned too, but
+        each response is only returned once.
+
+        :param pattern: a glob-style URL pattern, or a compiled regular
+                        expression.
+        :param timeout: a timeout value, in seconds.
+        """
+        page = self._frame.page()
+        manager = page.networkAccessManager()
+        capture = getattr(manager, 'capture', None)
+        if capture is None:
+            raise SpecterError("Response capture isn't enabled")
+
+        pattern = compile_url_pattern(pattern)
+        found = []
+
+        def predicate():
+            for response in capture.responses:
+                if (response.finished and not response.claimed and
+                        response.page is page and
+                        pattern.search(response.url)):
+                    found.append(response)
+                    return True
+            return False
+
+        self._wait(predicate, timeout, [manager.responseCaptured])
+        found[0].claimed = True
+        return found[0]
 
     def sleep(self, duration):
         """
@@ -250,10 +1420,7 @@ class SpecterWebFrame(object):
 
         :param duration: the time to sleep for, in seconds.
         """
-        try:
-            self.wait_for(lambda: False, duration)
-        except TimeoutError:
-            pass
+        EventWaiter(lambda: False, duration).run()
 
     def exists(self, selector):
         """
@@ -270,6 +1437,7 @@ class SpecterWebFrame(object):
         'time', 'url', 'week',
     ])
 
+    @traced()
     def set_field_value(self, selector, value, blur=True):
         """
         Set the value of a field matching the given CSS selector the given
@@ -352,15 +1520,73 @@ class SpecterWebFrame(object):
         if blur:
             self.fire_on(selector, 'blur')
 
+    # Evaluates each script in the global scope, and returns all the results
+    # as a single JSON string, so that they cross into Python in one transfer
+    # rather than through a recursive QVariant conversion.  Values that can't
+    # be serialized (e.g. cyclic structures) are converted to strings.
+    _evaluate_wrapper = """(function(scripts) {
+        var parts = [];
+        for (var i = 0; i < scripts.length; i++) {
+            var result;
+            try {
+                result = {v: (0, eval)(scripts[i])};
+            } catch (e) {
+                result = {e: String(e)};
+            }
+
+            try {
+                parts.push(JSON.stringify(result));
+            } catch (e) {
+                parts.push(JSON.stringify({v: String(result.v)}));
+            }
+        }
+        return '[' + parts.join(',') + ']';
+    })(%s)"""
+
+    def _evaluate(self, scripts):
+        raw = self._frame.evaluateJavaScript(
+            self._evaluate_wrapper % (json.dumps(scripts),))
+        if raw is None:
+            # JavaScript is disabled, or the frame has no document.
+            return [None] * len(scripts)
+
+        ret = []
+        for i, result in enumerate(json.loads(raw)):
+            if 'e' in result:
+                raise JavaScriptError("Error evaluating script %d: %s" % (
+                    i, result['e']))
+            ret.append(result.get('v'))
+
+        return ret
+
+    @traced()
     def evaluate(self, script):
         """
-        Evaluate the given JavaScript in the context of the current frame.
+        Evaluate the given JavaScript in the context of the current frame, and
+        return the result as a native Python object - dictionaries, lists,
+        numbers, strings, booleans and None are supported.  Values that can't
+        be represented as JSON (e.g. functions) are returned as None.  If the
+        script throws an exception, a :class:`JavaScriptError` is raised.
 
         :param script: The JavaScript to execute.
         """
-        self._frame.evaluateJavaScript(str(script))
-        # TODO: handle return value
+        return self._evaluate([str(script)])[0]
 
+    @traced()
+    def evaluate_many(self, scripts):
+        """
+        Evaluate a number of scripts in the context of the current frame in a
+        single call, and return a list containing the result of each.  This is
+        much faster than calling :meth:`evaluate` repeatedly.
+
+        :param scripts: an iterable of JavaScript snippets to execute.
+        """
+        scripts = [str(script) for script in scripts]
+        if not scripts:
+            return []
+        return self._evaluate(scripts)
+
+    @traced()
     def fire_on(self, selector, event):
         """
         Trigger an event on the given selector.
@@ -370,38 +1596,271 @@ class SpecterWebFrame(object):
         """
         self.evaluate('document.querySelector("%s").%s();' % (selector, event))
 
-    def wait_for_selector(self, selector):
+    def _wait_for_selector_state(self, selector, present, timeout):
+        watcher = self.selector_watcher
+        with watcher.watching(selector) as ident:
+            if watcher.present(ident) is None:
+                # The watcher isn't available in this frame (for example,
+                # JavaScript is disabled), so fall back to polling.
+                return self.wait_for(
+                    lambda: self.exists(selector) is present, timeout)
+
+            page = self._frame.page()
+            return self._wait(lambda: watcher.present(ident) is present,
+                              timeout,
+                              [watcher.bridge.selectorChanged,
+                               page.loadFinished])
+
+    @traced()
+    def wait_for_selector(self, selector, timeout=None):
         """
         Wait for an element matching the given CSS selector to exist in the
-        current frame.
+        current frame.  Rather than repeatedly querying the DOM, this watches
+        for changes to the page and is woken up when a match appears.
 
         :param selector: a CSS selector.
+        :param timeout: a timeout value, in seconds.
         """
-        return self.wait_for(lambda: self.exists(selector))
+        return self._wait_for_selector_state(selector, True, timeout)
 
-    def wait_while_selector(self, selector):
+    @traced()
+    def wait_while_selector(self, selector, timeout=None):
         """
         Wait until an element matching the given CSS selector does not exist in
         the current frame.
 
         :param selector: a CSS selector.
+        :param timeout: a timeout value, in seconds.
+        """
+        return self._wait_for_selector_state(selector, False, timeout)
+
+    def _match_content(self, patterns):
+        content = self._frame.toPlainText()
+        for pattern in patterns:
+            if hasattr(pattern, 'search'):
+                if pattern.search(content):
+                    return pattern
+            elif pattern in content:
+                return pattern
+        return None
+
+    @traced()
+    def wait_for_text(self, text, timeout=None):
+        """
+        Waits until the given text is present in the current frame, and
+        returns the pattern that matched.  The text content of the document
+        is searched (as with ``textContent``), not its HTML, so markup and
+        attribute values aren't matched.  While waiting, only the text of
+        elements whose children were added or changed is checked, so the
+        document isn't re-serialized; text that only appears when combined
+        with text outside of such an element (e.g. in a parent's other
+        children) isn't found.  For example::
+
+            found = s.wait_for_text(['Logged in', re.compile(r'[Ee]rror')])
+
+        :param text: the text to search for.  This may either be a string, a
+                     compiled regular expression, or a list of these, in
+                     which case the wait ends when any of them is present.
+                     Regular expressions are evaluated by JavaScript, so a
+                     ValueError is raised for flags other than IGNORECASE and
+                     MULTILINE, or for Python-only syntax such as named
+                     groups.
+        :param timeout: a timeout value, in seconds.
         """
-        return self.wait_for(lambda: not self.exists(selector))
+        patterns = _text_patterns(text)
+
+        watcher = self.text_watcher
+        with watcher.watching(patterns) as ident:
+            if watcher.matched(ident) is None:
+                # The watcher isn't available in this frame, so fall back to
+                # polling the content.
+                found = []
+
+                def predicate():
+                    found[:] = [self._match_content(patterns)]
+                    return found[0] is not None
+
+                self.wait_for(predicate, timeout)
+                return found[0]
 
-    def wait_for_text(self, text):
+            page = self._frame.page()
+            self._wait(lambda: watcher.matched(ident) != -1, timeout,
+                       [watcher.bridge.textMatched, page.loadFinished])
+            return patterns[watcher.matched(ident)]
+
+    @traced()
+    def wait_for_page_load(self, timeout=None):
         """
-        Waits until the given text is present in the current frame.
+        Wait until the current frame has finished loading.  This returns as
+        soon as the page signals that loading has finished, with the
+        :class:`LoadResult` for the load.
 
-        :param text: the text to search for.
+        :param timeout: a timeout value, in seconds.
         """
-        return self.wait_for(lambda: text in self.content)
+        page = self._frame.page()
+        self._wait(lambda: page.loaded is True, timeout, [page.loadFinished])
+        return getattr(page, 'load_result', None)
 
-    def wait_for_page_load(self):
+    @contextmanager
+    def _capture_area(self, selector=None, full_page=False):
         """
-        Wait until the current frame has finished loading.
+        A context manager that yields the rectangle, in viewport coordinates,
+        to capture.  For full-page and element captures, the page's viewport
+        is temporarily expanded to the size of the whole document, so that
+        parts of it that are scrolled out of view are rendered too.
         """
         page = self._frame.page()
-        return self.wait_for(lambda: page.loaded is True)
+        if not (full_page or selector is not None):
+            yield QRect(QPoint(0, 0), page.viewportSize())
+            return
+
+        old_size = page.viewportSize()
+        old_scroll = self._frame.scrollPosition()
+        contents = self._frame.contentsSize()
+        page.setViewportSize(QSize(max(old_size.width(), contents.width()),
+                                   max(old_size.height(), contents.height())))
+        self._frame.setScrollPosition(QPoint(0, 0))
+        try:
+            if selector is None:
+                yield QRect(QPoint(0, 0), page.viewportSize())
+            else:
+                el = self._frame.findFirstElement(selector)
+                if el.isNull():
+                    raise ElementError("Unable to find element for "
+                                       "selector: %s" % (selector,))
+                yield el.geometry()
+        finally:
+            page.setViewportSize(old_size)
+            self._frame.setScrollPosition(old_scroll)
+
+    def _render(self, rect, image=None):
+        """
+        Render the given rectangle of the frame into a QImage, creating one if
+        none is given.
+        """
+        if image is None:
+            image = QImage(rect.size(), QImage.Format_ARGB32)
+        image.fill(0xffffffff)
+
+        painter = QPainter(image)
+        painter.translate(-rect.x(), -rect.y())
+        self._frame.render(painter, QRegion(rect))
+        painter.end()
+        return image
+
+    def _tiles(self, rect):
+        """
+        Render the given rectangle as a series of horizontal strips, each at
+        most :attr:`screenshot_tile_height` pixels high.
+        """
+        tile_height = max(1, self.screenshot_tile_height)
+        y = rect.top()
+        while y <= rect.bottom():
+            height = min(tile_height, rect.bottom() - y + 1)
+            yield self._render(QRect(rect.x(), y, rect.width(), height))
+            y += height
+
+    @traced()
+    def screenshot_array(self, out=None, selector=None, full_page=False):
+        """
+        Render the frame into an H x W x 4 NumPy array of uint8, without
+        encoding it.  The frame is painted straight into the array's memory,
+        so no copies are made.  Pixels are stored as 32-bit ARGB values, so
+        on little-endian machines the channels are in B, G, R, A order.
+
+        :param out: a preallocated array to render into, so that repeated
+                    captures don't allocate.  Its shape must match the size of
+                    the captured area.  If not given, a new array is created.
+        :param selector: a CSS selector for an element to capture, instead of
+                         the viewport.
+        :param full_page: capture the whole document, rather than just the
+                          visible part of it.
+        """
+        if numpy is None:
+            raise SpecterError("NumPy is required for array screenshots")
+
+        with self._capture_area(selector, full_page) as rect:
+            if rect.isEmpty():
+                raise SpecterError("Nothing to capture")
+
+            shape = (rect.height(), rect.width(), 4)
+            if out is None:
+                out = numpy.empty(shape, dtype=numpy.uint8)
+            elif out.shape != shape:
+                raise ValueError("Expected an array of shape %r, not %r" % (
+                    shape, out.shape))
+
+            self._render(rect, array_image(out))
+
+        return out
+
+    @traced()
+    def screenshot_async(self, path=None, selector=None, full_page=False,
+                         format='png', quality=-1, encoder=None):
+        """
+        Like :meth:`screenshot`, but only renders the image before returning,
+        and encodes it on a background thread.  Returns a
+        :class:`concurrent.futures.Future`, whose result is the encoded bytes,
+        or the path if one was given.  The capture is rendered in one piece,
+        so for very tall pages, :meth:`screenshot` uses less memory.
+
+        :param encoder: the :class:`ImageEncoder` to use.  Defaults to the
+                        shared one.
+        """
+        if encoder is None:
+            encoder = ImageEncoder.shared()
+
+        with self._capture_area(selector, full_page) as rect:
+            if rect.isEmpty():
+                raise SpecterError("Nothing to capture")
+            image = self._render(rect)
+
+        return encoder.submit(image, path, format.lower(), quality)
+
+    @traced()
+    def screenshot(self, path=None, selector=None, full_page=False,
+                   format='png', quality=-1):
+        """
+        Take a screenshot of the frame.  By default, only the visible part of
+        the frame is captured.  PNG screenshots are rendered and compressed
+        in strips, so memory use stays bounded however tall the page is;
+        other formats are rendered in one piece.
+
+        :param path: a file to write the image to.  If not given, the encoded
+                     image is returned as bytes.
+        :param selector: a CSS selector for an element to capture, instead of
+                         the viewport.
+        :param full_page: capture the whole document, rather than just the
+                          visible part of it.
+        :param format: the image format - 'png', or any other format that Qt
+                       can write (e.g. 'jpg').
+        :param quality: the quality to encode lossy formats with, from 0 to
+                        100, or -1 for the default.
+        """
+        format = format.lower()
+        if path is None:
+            out = io.BytesIO()
+            self._write_screenshot(out, selector, full_page, format, quality)
+            return out.getvalue()
+
+        # The file is only created once the capture has succeeded, so that a
+        # missing element doesn't leave an empty file behind.
+        with _atomic_file(path) as out:
+            self._write_screenshot(out, selector, full_page, format, quality)
+
+    def _write_screenshot(self, out, selector, full_page, format, quality):
+        with self._capture_area(selector, full_page) as rect:
+            if rect.isEmpty():
+                raise SpecterError("Nothing to capture")
+
+            if format == 'png':
+                writer = PNGWriter(out, rect.width(), rect.height())
+                for tile in self._tiles(rect):
+                    tile = tile.convertToFormat(QImage.Format_RGB888)
+                    writer.write_rows(image_buffer(tile), tile.bytesPerLine())
+                writer.close()
+            else:
+                out.write(encode_image(self._render(rect), format, quality))
 
 
 class FrameRegistry(object):
@@ -433,11 +1892,215 @@ class FrameRegistry(object):
     def clear(self):
         self._registry.clear()
 
+    def purge(self, page):
+        """
+        Forget the wrapped frames that belong to the given page (or whose
+        underlying frame has already been deleted), so that they can be freed
+        along with the page.
+        """
+        for frame in list(self._registry.keys()):
+            try:
+                owner = frame.page()
+            except RuntimeError:
+                # The underlying C++ object is gone.
+                owner = None
+
+            if owner is None or owner is page:
+                self._registry.pop(frame, None)
+
 
 # FIXME: This won't handle custom classes
 frame_proxy = proxy_factory(SpecterWebFrame, lambda self: self._main_frame)
 
 
+# Collects the Navigation Timing and Resource Timing data for a frame.
+_TIMING_JS = """
+(function() {
+    var perf = window.performance;
+    if (!perf || !perf.timing) {
+        return null;
+    }
+
+    var timing = {};
+    for (var key in perf.timing) {
+        if (typeof perf.timing[key] === 'number') {
+            timing[key] = perf.timing[key];
+        }
+    }
+
+    var resources = [];
+    var entries = perf.getEntriesByType ? perf.getEntriesByType('resource')
+                                        : [];
+    for (var i = 0; i < entries.length; i++) {
+        var e = entries[i];
+        resources.push({
+            name: e.name,
+            initiatorType: e.initiatorType,
+            startTime: e.startTime,
+            duration: e.duration,
+            domainLookupStart: e.domainLookupStart,
+            domainLookupEnd: e.domainLookupEnd,
+            connectStart: e.connectStart,
+            connectEnd: e.connectEnd,
+            requestStart: e.requestStart,
+            responseStart: e.responseStart,
+            responseEnd: e.responseEnd
+        });
+    }
+
+    return {url: window.location.href, timing: timing, resources: resources};
+})()
+"""
+
+
+class LoadResult(object):
+    """
+    The outcome of loading a page.  This is returned by
+    :meth:`SpecterWebFrame.open` before the load has finished, and filled in
+    when it does - :meth:`SpecterWebFrame.wait_for_page_load` returns the same
+    object.
+
+    If timing collection is enabled on the page, :attr:`timing` holds the
+    main frame's ``window.performance.timing`` values (in milliseconds since
+    the epoch), :attr:`resources` its resource timing entries (where the
+    browser supports them), and :attr:`frames` the same information for each
+    child frame.
+
+    For loads that the page starts itself (e.g. by following a link),
+    :attr:`requested_url` is None until the main frame's request is made.
+    """
+    def __init__(self, requested_url=None):
+        self.requested_url = requested_url
+        self.url = None
+        self.ok = None
+        self.finished = False
+        self.started = time.time()
+        self.elapsed = None
+
+        self.timing = {}
+        self.resources = []
+        self.frames = []
+
+    def _phase(self, start, end):
+        start = self.timing.get(start)
+        end = self.timing.get(end)
+        if not start or not end:
+            return None
+        return end - start
+
+    @property
+    def phases(self):
+        """
+        Returns a dictionary of the main phases of the load, in milliseconds,
+        or None where the browser didn't record the phase.  'ttfb',
+        'dom_ready' and 'load' are measured from the start of navigation.
+        """
+        return {
+            'dns': self._phase('domainLookupStart', 'domainLookupEnd'),
+            'connect': self._phase('connectStart', 'connectEnd'),
+            'request': self._phase('requestStart', 'responseStart'),
+            'response': self._phase('responseStart', 'responseEnd'),
+            'ttfb': self._phase('navigationStart', 'responseStart'),
+            'dom_ready': self._phase('navigationStart',
+                                     'domContentLoadedEventEnd'),
+            'load': self._phase('navigationStart', 'loadEventEnd'),
+        }
+
+    def __repr__(self):
+        return "LoadResult(%r, ok=%r)" % (self.url or self.requested_url,
+                                          self.ok)
+
+
+# Counts the DOM nodes in a frame, and reads the size of its JavaScript heap
+# where the engine exposes it (QtWebKit doesn't).
+_MEMORY_JS = """
+(function() {
+    var memory = window.performance && window.performance.memory;
+    return {
+        dom_nodes: document.getElementsByTagName('*').length,
+        js_heap: memory ? memory.usedJSHeapSize : null
+    };
+})()
+"""
+
+
+def process_rss():
+    """
+    Returns the current resident set size of this process, in bytes, or None
+    if it can't be determined.  This is read from ``/proc`` where available,
+    and otherwise requires psutil.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    if psutil is None:                                      # pragma: no cover
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class MemoryLimits(object):
+    """
+    Thresholds on memory use.  Any of the limits may be None, in which case
+    it isn't checked.
+
+    The DOM node and JavaScript heap limits apply to individual pages: a page
+    that goes over them is recycled (see :meth:`Specter.check_memory`).  The
+    RSS limit applies to the whole process.  Freeing a page rarely shrinks a
+    process, so going over it only clears WebKit's memory caches (see
+    :meth:`Specter.check_process_memory`).  Only a :class:`WorkerFarm`
+    recycles a process that's still over it.
+
+    :param rss: the maximum resident set size of the process, in bytes.
+    :param dom_nodes: the maximum number of DOM nodes in a page, across all
+                      of its frames.
+    :param js_heap: the maximum size of a page's JavaScript heap, in bytes.
+                    This is only checked where the page reports
+                    ``performance.memory``, which QtWebKit doesn't.
+    """
+    NAMES = ('rss', 'dom_nodes', 'js_heap')
+
+    # The limits that a single page can be held responsible for.
+    PAGE_NAMES = ('dom_nodes', 'js_heap')
+
+    def __init__(self, rss=None, dom_nodes=None, js_heap=None):
+        self.rss = rss
+        self.dom_nodes = dom_nodes
+        self.js_heap = js_heap
+
+    @classmethod
+    def coerce(cls, value):
+        """
+        Returns the given value as a MemoryLimits instance.  Dictionaries of
+        keyword arguments are accepted, and None is passed through.
+        """
+        if value is None or isinstance(value, cls):
+            return value
+        return cls(**value)
+
+    def exceeded(self, usage, names=NAMES):
+        """
+        Returns a list of the names of the limits that the given usage (see
+        :meth:`SpecterWebPage.memory_usage`) is over.
+
+        :param names: the names of the limits to check.  Defaults to all.
+        """
+        over = []
+        for name in names:
+            limit = getattr(self, name)
+            value = usage.get(name)
+            if limit is not None and value is not None and value > limit:
+                over.append(name)
+        return over
+
+    def __repr__(self):
+        return "MemoryLimits(rss=%r, dom_nodes=%r, js_heap=%r)" % (
+            self.rss, self.dom_nodes, self.js_heap)
+
+
 class SpecterWebPage(QtWebKit.QWebPage):
     def __init__(self, app, registry):
         super(SpecterWebPage, self).__init__(app)
@@ -446,6 +2109,14 @@ class SpecterWebPage(QtWebKit.QWebPage):
         self.registry = registry
         self.loaded = False
 
+        # The LoadResult for the current (or last) load, and whether to
+        # collect timing information for it when it finishes.
+        self.load_result = None
+        self.collect_timing = True
+
+        # Updated by the NetworkAccessManager.
+        self.network_stats = NetworkStats()
+
         # This gets patched by sub-frames.  Sadly, no nicer way.
         self._file_to_upload = None
 
@@ -465,15 +2136,58 @@ class SpecterWebPage(QtWebKit.QWebPage):
 
     def onLoadStarted(self):
         self.loaded = False
+
+        # Loads started with open() already have a result.  For others, the
+        # main frame's URL is still the previous page's, so the requested URL
+        # is filled in when the request is made.
+        if self.load_result is None or self.load_result.finished:
+            self.load_result = LoadResult()
+
+        recorder = getattr(self.networkAccessManager(), 'recorder', None)
+        if recorder is not None:
+            recorder.load_started(self)
+
         load_started.emit(self)
 
     def onLoadProgress(self, progress):
         load_progress.emit(self, progress)
 
     def onLoadFinished(self, ok):
+        result = self.load_result
+        if result is None or result.finished:
+            result = self.load_result = LoadResult(
+                self.mainFrame().requestedUrl().toString())
+
+        if result.requested_url is None:
+            result.requested_url = self.mainFrame().requestedUrl().toString()
+        result.url = self.mainFrame().url().toString()
+        result.ok = ok
+        result.elapsed = time.time() - result.started
+        if self.collect_timing:
+            self._collect_timing(result)
+        result.finished = True
+
         self.loaded = True
         load_finished.emit(self, ok)
 
+    def _collect_timing(self, result):
+        frames = [self.mainFrame()]
+        for frame in frames:
+            frames.extend(frame.childFrames())
+
+            try:
+                data = self.registry.wrap(frame)._evaluate([_TIMING_JS])[0]
+            except JavaScriptError:
+                data = None
+            if data is None:
+                continue
+
+            if frame is frames[0]:
+                result.timing = data['timing']
+                result.resources = data['resources']
+            else:
+                result.frames.append(data)
+
     def onUnsupportedContent(self, reply):
         # TODO: fix
         pass
@@ -541,6 +2255,120 @@ class SpecterWebPage(QtWebKit.QWebPage):
         """
         self.triggerAction(QtWebKit.QWebPage.Reload)
 
+    def reset(self, timeout=None):
+        """
+        Reset this page to a blank state, so that it can be reused for another
+        job.  Any in-progress load is stopped, the page is navigated to
+        ``about:blank`` and the history is cleared.
+
+        :param timeout: a timeout value, in seconds, for the blank page to
+                        load.
+        """
+        self.stop()
+
+        # Otherwise the wait would return immediately, and the blank page's
+        # load would finish during the next job.
+        self.loaded = False
+        self.mainFrame().setUrl(QUrl('about:blank'))
+        self.wait_for_page_load(timeout)
+        self.history().clear()
+        self._file_to_upload = None
+
+    def memory_usage(self):
+        """
+        Returns a dictionary describing the memory used by this page: 'rss' is
+        the resident set size of the process in bytes, 'dom_nodes' the number
+        of DOM nodes in all of the page's frames, and 'js_heap' the size of the
+        JavaScript heap in bytes.  Values that can't be determined are None.
+        """
+        usage = {'rss': process_rss(), 'dom_nodes': 0, 'js_heap': None}
+
+        frames = [self.mainFrame()]
+        while frames:
+            frame = frames.pop()
+            frames.extend(frame.childFrames())
+
+            try:
+                counts = self.registry.wrap(frame).evaluate(_MEMORY_JS)
+            except JavaScriptError:
+                continue
+            if not counts:
+                continue
+
+            usage['dom_nodes'] += counts.get('dom_nodes') or 0
+            if counts.get('js_heap') is not None:
+                usage['js_heap'] = (usage['js_heap'] or 0) + counts['js_heap']
+
+        return usage
+
+    def check_memory(self, limits):
+        """
+        Compare this page's memory usage against the per-page limits of the
+        given :class:`MemoryLimits` (i.e. not the process-wide RSS limit).
+
+        Returns 'ok' if the page is within the limits, or 'exceeded' if it's
+        over them, and should be recycled.
+        """
+        usage = self.memory_usage()
+        if limits.exceeded(usage, MemoryLimits.PAGE_NAMES):
+            return 'exceeded'
+        return 'ok'
+
+    def capture_viewports(self, sizes, capture=None, quiet=0.1,
+                          timeout=None):
+        """
+        Capture the current page at a number of viewport sizes, without
+        reloading it.  For each size, the viewport is resized, the layout is
+        left to settle (see :meth:`SpecterWebFrame.wait_for_layout`), and the
+        capture function is called.  The original viewport size is restored
+        afterwards.  For example::
+
+            page.open(url)
+            page.wait_for_page_load()
+            mobile, desktop = page.capture_viewports([(375, 667),
+                                                      (1280, 800)])
+
+        :param sizes: a list of (width, height) tuples.
+        :param capture: a callable that's given the page, and returns the
+                        capture.  Defaults to taking a full-page PNG
+                        screenshot.
+        :param quiet: how long the layout must be unchanged for, in seconds,
+                      before it's captured.
+        :param timeout: the maximum time, in seconds, to wait for the layout
+                        to settle at each size.  If it hasn't settled by then,
+                        the page is captured anyway.
+
+        Returns a list of the captures, in the same order as the sizes.
+        """
+        if capture is None:
+            capture = lambda page: page.screenshot(full_page=True)
+
+        original = self.viewportSize()
+        results = []
+        try:
+            for size in sizes:
+                self.setViewportSize(QSize(*size))
+                try:
+                    self.main_frame.wait_for_layout(quiet, timeout)
+                except TimeoutError:
+                    logger.warning("Layout didn't settle at %dx%d, "
+                                   "capturing anyway", size[0], size[1])
+                results.append(capture(self))
+        finally:
+            self.setViewportSize(original)
+
+        return results
+
+    def render_pdf(self, path, page_size='A4', margins=10, landscape=False):
+        """
+        Print the current page to a PDF file.  See :class:`PDFPrinter` for the
+        print settings.
+
+        :param path: the file to write the PDF to.
+        """
+        PDFPrinter.get(page_size, margins, landscape).print_frame(
+            self.mainFrame(), path)
+
     _mouse_mapping = {
         'mousedown': QtCore.QEvent.MouseButtonPress,
         'mouseup': QtCore.QEvent.MouseButtonRelease,
@@ -648,10 +2476,17 @@ class SpecterWebPage(QtWebKit.QWebPage):
     wait_while_selector = frame_proxy('wait_while_selector')
     wait_for_text       = frame_proxy('wait_for_text')
     wait_for_page_load  = frame_proxy('wait_for_page_load')
+    wait_for_layout     = frame_proxy('wait_for_layout')
+    wait_for_network_idle = frame_proxy('wait_for_network_idle')
+    wait_for_response   = frame_proxy('wait_for_response')
     exists              = frame_proxy('exists')
     evaluate            = frame_proxy('evaluate')
+    evaluate_many       = frame_proxy('evaluate_many')
     set_field_value     = frame_proxy('set_field_value')
     fire_on             = frame_proxy('fire_on')
+    screenshot          = frame_proxy('screenshot')
+    screenshot_array    = frame_proxy('screenshot_array')
+    screenshot_async    = frame_proxy('screenshot_async')
 
     # Proxy properties
     url             = frame_proxy('url')
@@ -704,12 +2539,52 @@ class Specter(object):
 
     def __init__(self, **options):
         self.webview = None
+        self.options = options
+        metrics.install()
+        if options.get('metrics_port') is not None:
+            self.metrics_server = metrics.serve(options['metrics_port'])
         self.manager = NetworkAccessManager()
+        self.manager.block_rules = options.get('block_rules')
+
+        recorder = options.get('har_recorder')
+        if recorder is True:
+            recorder = HARRecorder()
+        self.manager.recorder = recorder or None
+
+        capture = options.get('capture_responses')
+        if capture is not None and not isinstance(capture, ResponseCapture):
+            capture = ResponseCapture(capture)
+        self.manager.capture = capture
+
+        force_cache = options.get('force_cache', ())
+        if options.get('memory_cache_size') and options.get('cache_dir'):
+            raise SpecterError("Only one of the memory_cache_size and "
+                               "cache_dir options may be given")
+
+        if options.get('memory_cache_size'):
+            self.manager.setCache(MemoryCache(
+                CacheStore.shared(options['memory_cache_size']),
+                force_cache))
+        elif options.get('cache_dir'):
+            self.manager.setCache(SharedDiskCache(
+                options['cache_dir'],
+                options.get('cache_size', 50 * 1024 * 1024),
+                force_cache))
+
+        self.manager.force_cache = [compile_url_pattern(p)
+                                    for p in force_cache]
+
+        if options.get('cookie_jar'):
+            self.manager.setCookieJar(SQLiteCookieJar(options['cookie_jar']))
+
+        self.manager.headers.update(options.get('headers', {}))
+
+        if options.get('proxy') is not None:
+            self.manager.proxy = options['proxy']
+
         self.FrameClass = options.get('frame_class', SpecterWebFrame)
         self.PageClass = options.get('page_class', SpecterWebPage)
         self.frame_registry = FrameRegistry(self.FrameClass, self.app)
-        self.page = self.PageClass(self.app, self.frame_registry)
-        self.page.setNetworkAccessManager(self.manager)
 
         QtWebKit.QWebSettings.setMaximumPagesInCache(0)
         QtWebKit.QWebSettings.setObjectCacheCapacities(0, 0, 0)
@@ -718,20 +2593,9 @@ class Specter(object):
             options.get('local_storage', True)
         )
 
-        self.page.setForwardUnsupportedContent(True)
+        self.memory_limits = MemoryLimits.coerce(options.get('memory_limits'))
 
-        self.page.settings().setAttribute(
-            QtWebKit.QWebSettings.AutoLoadImages,
-            options.get('load_images', True)
-        )
-        self.page.settings().setAttribute(
-            QtWebKit.QWebSettings.PluginsEnabled,
-            options.get('enable_plugins', True)
-        )
-        self.page.settings().setAttribute(
-            QtWebKit.QWebSettings.JavaEnabled,
-            options.get('enable_java', True)
-        )
+        self.page = self.new_page()
 
         # Size
         self.viewport_size = options.get('viewport_size', (800, 600))
@@ -747,6 +2611,250 @@ class Specter(object):
             self.webview.close()
         del self.page
 
+    def new_page(self):
+        """
+        Create a new page with the same configuration as this instance's main
+        page.  The new page shares this instance's network manager (and thus
+        its cookies and connections) and frame registry, and is driven by the
+        same event loop, so loads in several pages can be in flight at once.
+        """
+        page = self.PageClass(self.app, self.frame_registry)
+        page.setNetworkAccessManager(self.manager)
+        page.setForwardUnsupportedContent(True)
+
+        page.settings().setAttribute(
+            QtWebKit.QWebSettings.AutoLoadImages,
+            self.options.get('load_images', True)
+        )
+        page.settings().setAttribute(
+            QtWebKit.QWebSettings.PluginsEnabled,
+            self.options.get('enable_plugins', True)
+        )
+        page.settings().setAttribute(
+            QtWebKit.QWebSettings.JavaEnabled,
+            self.options.get('enable_java', True)
+        )
+
+        if self.options.get('local_storage_path'):
+            page.settings().setLocalStoragePath(
+                self.options['local_storage_path'])
+
+        page.collect_timing = self.options.get('collect_timing', True)
+        page.setViewportSize(QSize(*getattr(
+            self, '_viewport_size',
+            self.options.get('viewport_size', (800, 600)))))
+        return page
+
+    def recycle_page(self, page=None):
+        """
+        Replace a page with a fresh one, so that the memory WebKit holds for
+        the old page can be freed.  The new page is created by
+        :meth:`new_page`, so it has the same settings, and shares the network
+        manager - cookies, caches, headers, proxies and block rules all carry
+        over.  Returns the new page.
+
+        :param page: the page to replace.  Defaults to the main page, in which
+                     case :attr:`page` is updated.  Anything else holding a
+                     reference to the old page must switch to the new one.
+        """
+        if page is None:
+            page = self.page
+
+        new = self.new_page()
+        if page is self.page:
+            self.page = new
+            if self.webview is not None:                    # pragma: no cover
+                self.webview.setPage(new)
+
+        page.stop()
+
+        # A page takes ownership of a network manager that has no parent, and
+        # would delete it along with itself.
+        if self.manager.parent() is page:
+            self.manager.setParent(None)
+
+        self.frame_registry.purge(page)
+        page.deleteLater()
+        QtWebKit.QWebSettings.clearMemoryCaches()
+        metrics.PAGES_RECYCLED.inc()
+        return new
+
+    def check_memory(self, limits=None, recycle=True):
+        """
+        Check the main page's memory usage against the per-page limits of the
+        given :class:`MemoryLimits` (defaulting to the ``memory_limits``
+        option), and replace it with :meth:`recycle_page` if it's over them.
+        This is best called between jobs.
+
+        Returns 'ok', 'recycled', or 'exceeded' if the limits were exceeded
+        but ``recycle`` is False.
+        """
+        limits = MemoryLimits.coerce(limits) or self.memory_limits
+        if limits is None:
+            return 'ok'
+
+        status = self.page.check_memory(limits)
+        if status == 'exceeded' and recycle:
+            self.recycle_page()
+            status = 'recycled'
+        return status
+
+    def check_process_memory(self, limits=None):
+        """
+        Check the resident set size of this process against the RSS limit of
+        the given :class:`MemoryLimits` (defaulting to the ``memory_limits``
+        option).  If it's over, WebKit's memory caches are cleared and the
+        size is measured again.
+
+        Returns 'ok' if the process is within the limit (or its size can't be
+        measured), 'cleared' if clearing the caches brought it back within
+        it, or 'exceeded' if it's still over, in which case only replacing
+        the process will help.
+        """
+        limits = MemoryLimits.coerce(limits) or self.memory_limits
+        if limits is None or limits.rss is None:
+            return 'ok'
+
+        rss = process_rss()
+        if rss is None or rss <= limits.rss:
+            return 'ok'
+
+        QtWebKit.QWebSettings.clearMemoryCaches()
+        metrics.MEMORY_CACHE_CLEARS.inc()
+        rss = process_rss()
+        if rss is None or rss <= limits.rss:
+            return 'cleared'
+        return 'exceeded'
+
+    @property
+    def headers(self):
+        """
+        Returns the dictionary of headers that are sent with every request.
+        This can be modified in-place.
+        """
+        return self.manager.headers
+
+    @property
+    def local_storage_path(self):
+        """
+        Returns the directory that local storage is saved in.
+        """
+        return self.page.settings().localStoragePath()
+
+    # Version of the session file format.
+    SESSION_VERSION = 1
+
+    def save_session(self, path, local_storage=True):
+        """
+        Save a snapshot of this instance's session - its cookies, the contents
+        of the local storage directory, and the configured headers - to the
+        given file, so that it can be restored with :meth:`load_session`.
+        This allows skipping log-in flows and the like in new instances.
+
+        Note that WebKit writes local storage to disk periodically, so very
+        recent changes may not be captured.
+
+        :param path: the file to write.
+        :param local_storage: whether to save local storage.  This requires
+                              the ``local_storage_path`` option to be set, and
+                              a :class:`SpecterError` is raised if it isn't.
+        """
+        if local_storage and not self.options.get('local_storage_path'):
+            raise SpecterError("Local storage can only be saved when the "
+                               "local_storage_path option is set (pass "
+                               "local_storage=False to save without it)")
+
+        cookies = [
+            base64.b64encode(bytes(cookie.toRawForm())).decode('ascii')
+            for cookie in self.manager.cookieJar().allCookies()
+        ]
+
+        storage = {}
+        root = self.local_storage_path
+        if local_storage and os.path.isdir(root):
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    full = os.path.join(dirpath, filename)
+                    rel = os.path.relpath(full, root)
+                    with open(full, 'rb') as f:
+                        storage[rel] = base64.b64encode(f.read()).decode(
+                            'ascii')
+
+        session = {
+            'version': self.SESSION_VERSION,
+            'cookies': cookies,
+            'headers': dict(self.manager.headers),
+            'local_storage': storage,
+        }
+
+        # Write atomically, so that concurrent readers never see a partial
+        # file.
+        with _atomic_file(path) as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                f.write(json.dumps(session).encode('utf-8'))
+
+    def load_session(self, path, local_storage=True):
+        """
+        Restore a session saved with :meth:`save_session` into this instance.
+        Cookies and headers are merged with the current ones.  Local storage
+        is written into the local storage directory, so it should be restored
+        before any page from the same origin has been opened.
+
+        :param path: the file to read.
+        :param local_storage: whether to restore local storage.  As with
+                              :meth:`save_session`, this requires the
+                              ``local_storage_path`` option to be set (so that
+                              WebKit's shared default directory is never
+                              written to), and a :class:`SpecterError` is
+                              raised if the session has local storage and it
+                              isn't.
+        """
+        with gzip.open(path, 'rb') as f:
+            session = json.loads(f.read().decode('utf-8'))
+
+        if session.get('version') != self.SESSION_VERSION:
+            raise SpecterError("Unsupported session version: %r" % (
+                session.get('version'),))
+
+        storage = session['local_storage'] if local_storage else {}
+        if storage and not self.options.get('local_storage_path'):
+            raise SpecterError("Local storage can only be restored when the "
+                               "local_storage_path option is set (pass "
+                               "local_storage=False to restore without it)")
+
+        cookies = []
+        for raw in session['cookies']:
+            cookies.extend(QNetworkCookie.parseCookies(
+                QByteArray(base64.b64decode(raw))))
+
+        jar = self.manager.cookieJar()
+        if isinstance(jar, SQLiteCookieJar):
+            jar.add_cookies(cookies)
+        else:
+            keys = set((c.domain(), c.path(), bytes(c.name()))
+                       for c in cookies)
+            existing = [c for c in jar.allCookies()
+                        if (c.domain(), c.path(), bytes(c.name())) not in keys]
+            jar.setAllCookies(existing + cookies)
+
+        self.manager.headers.update(session['headers'])
+
+        root = self.local_storage_path
+        if storage:
+            for rel, data in storage.items():
+                full = os.path.join(root, rel)
+                if not os.path.abspath(full).startswith(
+                        os.path.abspath(root) + os.sep):
+                    raise SpecterError("Invalid local storage path: %s" % (
+                        rel,))
+
+                dirname = os.path.dirname(full)
+                if not os.path.isdir(dirname):
+                    os.makedirs(dirname)
+
+                with _atomic_file(full) as f:
+                    f.write(base64.b64decode(data))
+
     @property
     def viewport_size(self):
         """
@@ -764,6 +2872,10 @@ class Specter(object):
     go_forward          = page_proxy('go_forward')
     stop                = page_proxy('stop')
     reload              = page_proxy('reload')
+    reset               = page_proxy('reset')
+    render_pdf          = page_proxy('render_pdf')
+    memory_usage        = page_proxy('memory_usage')
+    capture_viewports   = page_proxy('capture_viewports')
     send_mouse_event    = page_proxy('send_mouse_event')
     send_keyboard_event = page_proxy('send_keyboard_event')
 
@@ -775,10 +2887,17 @@ class Specter(object):
     wait_while_selector = page_frame_proxy('wait_while_selector')
     wait_for_text       = page_frame_proxy('wait_for_text')
     wait_for_page_load  = page_frame_proxy('wait_for_page_load')
+    wait_for_layout     = page_frame_proxy('wait_for_layout')
+    wait_for_network_idle = page_frame_proxy('wait_for_network_idle')
+    wait_for_response   = page_frame_proxy('wait_for_response')
     exists              = page_frame_proxy('exists')
     evaluate            = page_frame_proxy('evaluate')
+    evaluate_many       = page_frame_proxy('evaluate_many')
     set_field_value     = page_frame_proxy('set_field_value')
     fire_on             = page_frame_proxy('fire_on')
+    screenshot          = page_frame_proxy('screenshot')
+    screenshot_array    = page_frame_proxy('screenshot_array')
+    screenshot_async    = page_frame_proxy('screenshot_async')
 
     # Proxy properties
     url             = page_frame_proxy('url')
@@ -1,19 +1,38 @@
 import unittest
 
 # Import test modules.
+from .test_aio import *
+from .test_blocking import *
+from .test_cache import *
+from .test_capture import *
+from .test_cookies import *
+from .test_evaluate import *
 from .test_events import *
 from .test_forms import *
 from .test_frames import *
+from .test_har import *
+from .test_memory import *
+from .test_metrics import *
 from .test_navigation import *
+from .test_network import *
 from .test_open import *
+from .test_pdf import *
+from .test_pool import *
+from .test_proxy import *
 from .test_qtmessage import *
 from .test_redirection import *
 from .test_registry import *
+from .test_screenshot import *
 from .test_selectors import *
+from .test_session import *
 from .test_signals import *
 from .test_simple import *
 from .test_ssl import *
+from .test_text import *
+from .test_timing import *
+from .test_tracing import *
 from .test_util import *
+from .test_workers import *
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+from specter.specter import TimeoutError
+from .util import StaticSpecterTestCase, skip_if
+
+try:
+    from specter.aio import AsyncPage, asyncio
+except ImportError:                                         # pragma: no cover
+    asyncio = None
+
+
+@skip_if(asyncio is None, 'asyncio (or trollius) is not installed')
+class TestAsyncPage(StaticSpecterTestCase):
+    STATIC_FILE = 'selectors.html'
+
+    def setup(self):
+        super(TestAsyncPage, self).setup()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.page = AsyncPage(self.s)
+
+    def teardown(self):
+        self.page.pump.stop()
+        self.loop.close()
+        super(TestAsyncPage, self).teardown()
+
+    def run_sync(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_open(self):
+        self.run_sync(self.page.open(self.baseUrl + '/'))
+        self.assert_true(self.s.page.loaded)
+        self.assert_true(self.s.exists('#the_id'))
+
+    def test_wait_for_selector(self):
+        self.run_sync(self.page.open(self.baseUrl + '/'))
+        self.run_sync(self.page.wait_for_selector('#created_id'))
+        self.assert_true(self.s.exists('#created_id'))
+
+    def test_wait_while_selector(self):
+        self.run_sync(self.page.open(self.baseUrl + '/'))
+        self.run_sync(self.page.wait_while_selector('#deleteme'))
+        self.assert_false(self.s.exists('#deleteme'))
+
+    def test_wait_for_text(self):
+        self.run_sync(self.page.open(self.baseUrl + '/'))
+        self.assert_equal(self.run_sync(self.page.wait_for_text('Content 2')),
+                          'Content 2')
+
+    def test_evaluate(self):
+        self.run_sync(self.page.open(self.baseUrl + '/'))
+        self.assert_equal(self.run_sync(self.page.evaluate('1 + 1')), 2)
+
+    def test_screenshot(self):
+        self.run_sync(self.page.open(self.baseUrl + '/'))
+        data = self.run_sync(self.page.screenshot())
+        self.assert_true(data.startswith(b'\x89PNG'))
+
+    def test_timeout(self):
+        self.run_sync(self.page.open(self.baseUrl + '/'))
+        with self.assert_raises(TimeoutError):
+            self.run_sync(self.page.wait_for_selector('#never', timeout=0.1))
+
+    def test_concurrent_pages(self):
+        pages = [AsyncPage(self.s.new_page()) for _ in range(3)]
+        self.run_sync(asyncio.gather(*[
+            p.open(self.baseUrl + '/') for p in pages
+        ]))
+        self.run_sync(asyncio.gather(*[
+            p.wait_for_selector('#created_id') for p in pages
+        ]))
+
+        for p in pages:
+            self.assert_true(p.exists('#created_id'))
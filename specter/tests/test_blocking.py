@@ -0,0 +1,94 @@
+import os
+import re
+
+from specter.specter import BlockRules
+from .util import SpecterTestCase
+from .bottle import static_file
+
+
+root = os.path.join(
+    os.path.abspath(os.path.dirname(__file__)),
+    'static'
+)
+
+
+class TestBlockRules(SpecterTestCase):
+    def setup_app(self, app):
+        self.served = []
+
+        @app.route('/')
+        def index():
+            self.served.append('/')
+            return static_file('resources.html', root=root)
+
+        @app.route('/<name>')
+        def resource(name):
+            self.served.append('/' + name)
+            return 'x' * 100
+
+    def load(self, rules):
+        self.s.manager.block_rules = rules
+        self.open('/')
+
+    def test_no_rules(self):
+        self.open('/')
+        self.assert_equal(sorted(self.served), [
+            '/', '/image.png', '/other.gif', '/style.css', '/tracker.js',
+        ])
+        self.assert_equal(self.s.page.network_stats.blocked, 0)
+
+    def test_block_glob(self):
+        self.load(BlockRules(patterns=['*/tracker.js']))
+        self.assert_false('/tracker.js' in self.served)
+        self.assert_true('/style.css' in self.served)
+        self.assert_equal(self.s.page.network_stats.blocked, 1)
+
+    def test_block_regex(self):
+        self.load(BlockRules(patterns=[re.compile(r'.*\.(png|gif)$')]))
+        self.assert_false('/image.png' in self.served)
+        self.assert_false('/other.gif' in self.served)
+        self.assert_equal(self.s.page.network_stats.blocked, 2)
+
+    def test_block_regex_substring(self):
+        # Regular expressions aren't anchored to the start of the URL.
+        self.load(BlockRules(patterns=[re.compile('tracker')]))
+        self.assert_false('/tracker.js' in self.served)
+        self.assert_equal(self.s.page.network_stats.blocked, 1)
+
+    def test_glob_matches_whole_url(self):
+        self.load(BlockRules(patterns=['tracker.js']))
+        self.assert_true('/tracker.js' in self.served)
+        self.assert_equal(self.s.page.network_stats.blocked, 0)
+
+    def test_block_resource_types(self):
+        self.load(BlockRules(resource_types=['image', 'stylesheet']))
+        self.assert_equal(sorted(self.served), ['/', '/tracker.js'])
+        self.assert_equal(self.s.content.count('Content'), 1)
+
+    def test_unknown_resource_type(self):
+        with self.assert_raises(ValueError):
+            BlockRules(resource_types=['bogus'])
+
+    def test_deny_domains(self):
+        self.load(BlockRules(deny_domains=['example.com']))
+        self.assert_equal(len(self.served), 5)
+
+        self.load(BlockRules(deny_domains=[self.host]))
+        self.assert_equal(len(self.served), 5)
+        self.assert_false(self.s.page.loaded and 'Content' in self.s.content)
+
+    def test_allow_domains(self):
+        self.load(BlockRules(allow_domains=['example.com']))
+        self.assert_equal(self.served, [])
+
+    def test_bytes_saved(self):
+        self.open('/')
+        self.assert_true(self.s.page.network_stats.bytes_received > 0)
+
+        self.load(BlockRules(patterns=['*/image.png']))
+        self.assert_equal(self.s.page.network_stats.bytes_saved, 100)
+
+    def test_manager_stats(self):
+        self.load(BlockRules(patterns=['*.gif']))
+        self.assert_equal(self.s.manager.stats.requests, 5)
+        self.assert_equal(self.s.manager.stats.blocked, 1)
@@ -0,0 +1,163 @@
+import fcntl
+import os
+import shutil
+import tempfile
+
+from specter import Specter, SpecterError
+from specter.cache import CacheStore, MemoryCache, SharedDiskCache
+from .util import SpecterTestCase, BaseTestCase
+from .bottle import response
+
+
+PAGE = '''<html>
+  <head><link rel="stylesheet" href="/%s.css"></head>
+  <body>Cached</body>
+</html>'''
+
+
+class TestMemoryCache(SpecterTestCase):
+    def setup_app(self, app):
+        self.served = {}
+
+        @app.route('/page/<name>')
+        def page(name):
+            response.set_header('Cache-Control', 'no-store')
+            return PAGE % (name,)
+
+        @app.route('/<name>.css')
+        def css(name):
+            self.served[name] = self.served.get(name, 0) + 1
+            if name == 'cacheable':
+                response.set_header('Cache-Control', 'max-age=3600')
+            else:
+                response.set_header('Cache-Control', 'no-store')
+            response.set_header('Content-Type', 'text/css')
+            return 'body { color: red; }'
+
+    def setup(self):
+        super(TestMemoryCache, self).setup()
+        self.store = CacheStore(1024 * 1024)
+        self.cache = MemoryCache(self.store, force_cache=['*/forced.css'])
+        self.s.manager.setCache(self.cache)
+        self.s.manager.force_cache = self.cache.force_cache
+
+    def load_twice(self, name):
+        self.open('/page/' + name)
+        self.open('/page/' + name)
+
+    def test_caches_cacheable(self):
+        self.load_twice('cacheable')
+        self.assert_equal(self.served['cacheable'], 1)
+        self.assert_true(self.store.hits >= 1)
+
+    def test_respects_no_store(self):
+        self.load_twice('uncacheable')
+        self.assert_equal(self.served['uncacheable'], 2)
+
+    def test_force_cache(self):
+        self.load_twice('forced')
+        self.assert_equal(self.served['forced'], 1)
+
+    def test_shared_between_managers(self):
+        self.open('/page/cacheable')
+
+        other = Specter()
+        other.manager.setCache(MemoryCache(self.store))
+        other.open(self.baseUrl + '/page/cacheable')
+        other.wait_for_page_load()
+
+        self.assert_equal(self.served['cacheable'], 1)
+
+    def test_stats(self):
+        self.load_twice('cacheable')
+        stats = self.store.stats
+        self.assert_equal(stats['entries'], 1)
+        self.assert_equal(stats['size'], len('body { color: red; }'))
+        self.assert_true(stats['misses'] >= 1)
+
+
+class TestDiskCache(TestMemoryCache):
+    def setup(self):
+        self.cache_dir = tempfile.mkdtemp()
+        SpecterTestCase.setup(self)
+
+        self.s = Specter(cache_dir=self.cache_dir,
+                         force_cache=['*/forced.css'])
+
+    def teardown(self):
+        super(TestDiskCache, self).teardown()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_caches_cacheable(self):
+        self.load_twice('cacheable')
+        self.assert_equal(self.served['cacheable'], 1)
+        self.assert_true(len(os.listdir(self.cache_dir)) > 0)
+
+    def test_shared_between_managers(self):
+        self.open('/page/cacheable')
+
+        # A second instance using the same directory behaves like another
+        # worker process sharing the cache.
+        other = Specter(cache_dir=self.cache_dir)
+        other.open(self.baseUrl + '/page/cacheable')
+        other.wait_for_page_load()
+
+        self.assert_equal(self.served['cacheable'], 1)
+
+    def test_stats(self):
+        self.load_twice('cacheable')
+        self.assert_true(self.s.manager.cache().cacheSize() > 0)
+
+    def test_expire(self):
+        self.load_twice('cacheable')
+        cache = self.s.manager.cache()
+        cache.setMaximumCacheSize(0)
+        cache.expire()
+        self.assert_equal(cache.cacheSize(), 0)
+
+    def test_lock_held_by_another_process(self):
+        # A cold-start cache doesn't know its size yet, and mustn't recurse
+        # while another process is evicting entries.
+        lock_path = os.path.join(self.cache_dir, SharedDiskCache.LOCK_NAME)
+        with open(lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                other = Specter(cache_dir=self.cache_dir)
+                other.open(self.baseUrl + '/page/cacheable')
+                other.wait_for_page_load()
+                self.assert_true(other.manager.cache().cacheSize() >= 0)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+        self.assert_equal(self.served['cacheable'], 1)
+
+    def test_both_caches(self):
+        with self.assert_raises(SpecterError):
+            Specter(cache_dir=self.cache_dir, memory_cache_size=1024)
+
+
+class TestCacheStore(BaseTestCase):
+    def test_lru_eviction(self):
+        store = CacheStore(10)
+        store.put('a', None, b'12345')
+        store.put('b', None, b'12345')
+        store.get('a')
+        store.put('c', None, b'12345')
+
+        self.assert_true('a' in store)
+        self.assert_false('b' in store)
+        self.assert_true('c' in store)
+        self.assert_equal(store.evictions, 1)
+        self.assert_equal(store.size, 10)
+
+    def test_too_large(self):
+        store = CacheStore(4)
+        store.put('a', None, b'12345')
+        self.assert_equal(len(store), 0)
+
+    def test_remove(self):
+        store = CacheStore(10)
+        store.put('a', None, b'123')
+        self.assert_true(store.remove('a'))
+        self.assert_false(store.remove('a'))
+        self.assert_equal(store.size, 0)
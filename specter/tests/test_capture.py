@@ -0,0 +1,80 @@
+import json
+
+from specter.specter import ResponseCapture, TimeoutError, SpecterError
+from .util import SpecterTestCase
+
+
+XHR_PAGE = """
+<html>
+  <body>
+    <div id='results'></div>
+    <script>
+      var xhr = new XMLHttpRequest();
+      xhr.open('GET', '/api/items');
+      xhr.onload = function() {
+          var items = JSON.parse(xhr.responseText).items;
+          document.getElementById('results').innerHTML = items.join(',');
+      };
+      xhr.send();
+    </script>
+  </body>
+</html>
+"""
+
+ITEMS = {'items': ['a', 'b', 'c']}
+
+
+class TestResponseCapture(SpecterTestCase):
+    SPECTER_OPTIONS = {'capture_responses': ['*/api/*']}
+
+    def setup_app(self, app):
+        @app.route('/')
+        def index():
+            return XHR_PAGE
+
+        @app.route('/api/items')
+        def items():
+            return json.dumps(ITEMS)
+
+    def test_wait_for_response(self):
+        self.open('/')
+        response = self.s.wait_for_response('*/api/items')
+        self.assert_equal(response.status, 200)
+        self.assert_equal(response.json(), ITEMS)
+        self.assert_false(response.truncated)
+
+        # The page still receives the data.
+        self.s.wait_for(lambda: self.s.evaluate(
+            "document.getElementById('results').innerHTML") == 'a,b,c')
+
+    def test_only_matching_responses(self):
+        self.open('/')
+        self.s.wait_for_response('*/api/items')
+        urls = [r.url for r in self.s.manager.capture.responses]
+        self.assert_equal(len(urls), 1)
+        self.assert_true(urls[0].endswith('/api/items'))
+
+    def test_each_response_returned_once(self):
+        self.open('/')
+        self.s.wait_for_response('*/api/items')
+        with self.assert_raises(TimeoutError):
+            self.s.wait_for_response('*/api/items', timeout=0.2)
+
+    def test_truncation(self):
+        self.s.manager.capture = ResponseCapture(['*/api/*'], max_body_size=5)
+        self.open('/')
+        response = self.s.wait_for_response('*/api/items')
+        self.assert_true(response.truncated)
+        self.assert_equal(response.body, json.dumps(ITEMS)[:5].encode())
+
+    def test_max_responses(self):
+        capture = self.s.manager.capture = ResponseCapture(['*'],
+                                                           max_responses=1)
+        self.open('/')
+        self.s.wait_for_response('*/api/items')
+        self.assert_equal(len(capture.responses), 1)
+
+    def test_not_enabled(self):
+        self.s.manager.capture = None
+        with self.assert_raises(SpecterError):
+            self.s.wait_for_response('*')
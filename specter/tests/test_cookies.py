@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+
+from specter import Specter
+from specter.cookies import SQLiteCookieJar
+from .util import SpecterTestCase
+from .bottle import request, response
+
+
+class TestSQLiteCookieJar(SpecterTestCase):
+    def setup_app(self, app):
+        self.received = []
+
+        @app.route('/login')
+        def login():
+            response.set_cookie('session', 'abc123')
+            response.set_cookie('persistent', 'yes', max_age=3600)
+            return 'logged in'
+
+        @app.route('/logout')
+        def logout():
+            response.delete_cookie('session')
+            return 'logged out'
+
+        @app.route('/check')
+        def check():
+            self.received.append(dict(request.cookies))
+            return 'checked'
+
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.db = os.path.join(self.dir, 'cookies.db')
+        super(TestSQLiteCookieJar, self).setup()
+        self.s = Specter(cookie_jar=self.db)
+
+    def teardown(self):
+        super(TestSQLiteCookieJar, self).teardown()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def fresh(self, **options):
+        other = Specter(cookie_jar=self.db, **options)
+        other.open(self.baseUrl + '/check')
+        other.wait_for_page_load()
+        return other
+
+    def test_sends_cookies(self):
+        self.open('/login')
+        self.open('/check')
+        self.assert_equal(self.received[-1].get('session'), 'abc123')
+
+    def test_persisted_to_new_instance(self):
+        self.open('/login')
+        self.fresh()
+        self.assert_equal(self.received[-1].get('session'), 'abc123')
+        self.assert_equal(self.received[-1].get('persistent'), 'yes')
+
+    def test_deleted_cookies(self):
+        self.open('/login')
+        self.open('/logout')
+        self.fresh()
+        self.assert_false('session' in self.received[-1])
+        self.assert_equal(self.received[-1].get('persistent'), 'yes')
+
+    def test_changes_from_other_jar(self):
+        other = self.fresh()
+        self.assert_equal(self.received[-1], {})
+
+        # Log in with the first instance, and the second picks it up.
+        self.open('/login')
+        other.open(self.baseUrl + '/check')
+        other.wait_for_page_load()
+        self.assert_equal(self.received[-1].get('session'), 'abc123')
+
+    def test_no_session_cookies(self):
+        self.s.manager.setCookieJar(
+            SQLiteCookieJar(self.db, session_cookies=False))
+        self.open('/login')
+        self.fresh()
+        self.assert_false('session' in self.received[-1])
+        self.assert_equal(self.received[-1].get('persistent'), 'yes')
+
+    def test_session_cookies_survive_reload(self):
+        # Session cookies that aren't persisted mustn't be lost when another
+        # jar changes the database, and this jar re-loads from it.
+        self.s.manager.setCookieJar(
+            SQLiteCookieJar(self.db, session_cookies=False))
+        self.open('/login')
+
+        other = self.fresh()
+        other.evaluate("document.cookie = 'other=1; max-age=3600'")
+
+        self.open('/check')
+        self.assert_equal(self.received[-1].get('session'), 'abc123')
+        self.assert_equal(self.received[-1].get('persistent'), 'yes')
+        self.assert_equal(self.received[-1].get('other'), '1')
+
+    def test_clear(self):
+        self.open('/login')
+        self.s.manager.cookieJar().clear()
+        self.fresh()
+        self.assert_equal(self.received[-1], {})
@@ -0,0 +1,50 @@
+from specter import JavaScriptError
+from .util import StaticSpecterTestCase
+
+
+class TestEvaluate(StaticSpecterTestCase):
+    STATIC_FILE = 'simple.html'
+
+    def test_numbers(self):
+        self.open('/')
+        self.assert_equal(self.s.evaluate('1 + 2'), 3)
+        self.assert_equal(self.s.evaluate('1.5'), 1.5)
+
+    def test_string(self):
+        self.open('/')
+        self.assert_equal(self.s.evaluate('document.title'),
+                          'This is a title')
+
+    def test_structures(self):
+        self.open('/')
+        ret = self.s.evaluate('({a: [1, "two", null], b: {c: true}})')
+        self.assert_equal(ret, {'a': [1, 'two', None], 'b': {'c': True}})
+
+    def test_undefined(self):
+        self.open('/')
+        self.assert_equal(self.s.evaluate('undefined'), None)
+        self.assert_equal(self.s.evaluate('var x = 1;'), None)
+
+    def test_global_scope(self):
+        self.open('/')
+        self.s.evaluate('var shared = 42;')
+        self.assert_equal(self.s.evaluate('shared'), 42)
+
+    def test_unserializable(self):
+        self.open('/')
+        ret = self.s.evaluate('var o = {}; o.self = o; o')
+        self.assert_equal(ret, '[object Object]')
+
+    def test_error(self):
+        self.open('/')
+        with self.assert_raises(JavaScriptError):
+            self.s.evaluate('throw new Error("oops")')
+
+    def test_evaluate_many(self):
+        self.open('/')
+        ret = self.s.evaluate_many(['1', 'document.title', '[1, 2]'])
+        self.assert_equal(ret, [1, 'This is a title', [1, 2]])
+
+    def test_evaluate_many_empty(self):
+        self.open('/')
+        self.assert_equal(self.s.evaluate_many([]), [])
@@ -0,0 +1,86 @@
+import io
+import os
+import json
+import tempfile
+
+from specter.har import HARRecorder
+from .util import SpecterTestCase
+from .bottle import static_file
+
+
+root = os.path.join(
+    os.path.abspath(os.path.dirname(__file__)),
+    'static'
+)
+
+
+class TestHARRecorder(SpecterTestCase):
+    def setup_app(self, app):
+        @app.route('/')
+        def index():
+            return static_file('resources.html', root=root)
+
+        @app.route('/<name>')
+        def resource(name):
+            return 'x' * 100
+
+    def record(self, recorder):
+        self.s.manager.recorder = recorder
+        self.open('/')
+        return recorder
+
+    def test_disabled_by_default(self):
+        self.assert_true(self.s.manager.recorder is None)
+
+    def test_entries(self):
+        recorder = self.record(HARRecorder())
+        entries = list(recorder.entries)
+        self.assert_equal(len(entries), 5)
+
+        first = entries[0]
+        self.assert_equal(first['request']['method'], 'GET')
+        self.assert_true(first['request']['url'].endswith('/'))
+        self.assert_equal(first['response']['status'], 200)
+        self.assert_true(first['time'] >= 0)
+        self.assert_equal(first['pageref'], recorder.pages[0]['id'])
+
+        sizes = [e['response']['bodySize'] for e in entries[1:]]
+        self.assert_equal(sizes, [100] * 4)
+
+    def test_page_per_load(self):
+        recorder = self.record(HARRecorder())
+        self.open('/?again')
+
+        pages = recorder.pages
+        self.assert_equal(len(pages), 2)
+        self.assert_true(pages[1]['title'].endswith('/?again'))
+        self.assert_equal([e['pageref'] for e in recorder.entries],
+                          [pages[0]['id']] * 5 + [pages[1]['id']] * 5)
+
+    def test_max_entries(self):
+        recorder = self.record(HARRecorder(max_entries=2))
+        self.assert_equal(len(recorder.entries), 2)
+
+    def test_save(self):
+        recorder = self.record(HARRecorder())
+        fd, path = tempfile.mkstemp(suffix='.har')
+        os.close(fd)
+        try:
+            recorder.save(path)
+            with open(path) as f:
+                har = json.load(f)
+        finally:
+            os.remove(path)
+
+        self.assert_equal(har['log']['version'], '1.2')
+        self.assert_equal(len(har['log']['entries']), 5)
+        self.assert_equal(len(har['log']['pages']), 1)
+
+    def test_stream(self):
+        out = io.StringIO()
+        recorder = self.record(HARRecorder(max_entries=1, stream=out))
+        recorder.close()
+
+        har = json.loads(out.getvalue())
+        self.assert_equal(len(har['log']['entries']), 5)
+        self.assert_equal(len(recorder.entries), 1)
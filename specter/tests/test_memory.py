@@ -0,0 +1,83 @@
+from specter import SpecterPool
+from specter.specter import MemoryLimits, process_rss
+from .util import BaseTestCase, StaticSpecterTestCase
+
+
+class TestMemoryLimits(BaseTestCase):
+    def test_exceeded(self):
+        limits = MemoryLimits(rss=100, dom_nodes=10)
+        usage = {'rss': 200, 'dom_nodes': 5, 'js_heap': 10 ** 9}
+        self.assert_equal(limits.exceeded(usage), ['rss'])
+
+    def test_unknown_values_are_ignored(self):
+        limits = MemoryLimits(js_heap=100)
+        self.assert_equal(limits.exceeded({'js_heap': None}), [])
+
+    def test_coerce(self):
+        limits = MemoryLimits.coerce({'dom_nodes': 10})
+        self.assert_equal(limits.dom_nodes, 10)
+        self.assert_true(MemoryLimits.coerce(limits) is limits)
+        self.assert_true(MemoryLimits.coerce(None) is None)
+
+    def test_process_rss(self):
+        self.assert_true(process_rss() > 0)
+
+
+class TestMemory(StaticSpecterTestCase):
+    STATIC_FILE = 'simple.html'
+
+    def test_memory_usage(self):
+        self.open('/')
+        usage = self.s.memory_usage()
+        self.assert_true(usage['rss'] > 0)
+        # <html>, <head>, <title> and <body>.
+        self.assert_equal(usage['dom_nodes'], 4)
+
+    def test_within_limits(self):
+        self.open('/')
+        self.assert_equal(self.s.check_memory(), 'ok')
+        self.assert_equal(self.s.check_memory({'dom_nodes': 100}), 'ok')
+
+    def test_recycle(self):
+        self.open('/')
+        self.s.evaluate("document.cookie = 'kept=yes'")
+        old = self.s.page
+
+        self.assert_equal(self.s.check_memory({'dom_nodes': 1},
+                                              recycle=False), 'exceeded')
+        self.assert_true(self.s.page is old)
+
+        self.assert_equal(self.s.check_memory({'dom_nodes': 1}), 'recycled')
+        self.assert_true(self.s.page is not old)
+        self.assert_equal(self.s.viewport_size, (800, 600))
+
+        # The new page shares the old one's cookies.
+        self.open('/')
+        self.assert_equal(self.s.evaluate('document.cookie'), 'kept=yes')
+
+    def test_rss_limit_doesnt_recycle_pages(self):
+        self.open('/')
+        page = self.s.page
+
+        # The process can't get back under this, and replacing the page
+        # wouldn't help.
+        self.assert_equal(self.s.check_memory({'rss': 1}), 'ok')
+        self.assert_true(self.s.page is page)
+
+        self.assert_equal(self.s.check_process_memory({'rss': 1}),
+                          'exceeded')
+        self.assert_equal(self.s.check_process_memory({'rss': 10 ** 15}),
+                          'ok')
+
+    def test_pool_recycles_pages(self):
+        pool = SpecterPool(2, specter=self.s)
+        self.s.memory_limits = MemoryLimits(dom_nodes=1)
+
+        page = pool.checkout()
+        page.open(self.baseUrl + '/')
+        page.wait_for_page_load()
+        pool.checkin(page)
+
+        self.assert_equal(pool.size, 2)
+        self.assert_equal(pool.available, 2)
+        self.assert_true(page not in pool.pages)
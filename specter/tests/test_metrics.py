@@ -0,0 +1,85 @@
+from specter import metrics
+from specter.specter import TimeoutError
+from .util import BaseTestCase, StaticSpecterTestCase
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+
+class TestRegistry(BaseTestCase):
+    def setup(self):
+        self.registry = metrics.MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter('things_total', 'Things.', ['kind'])
+        counter.inc(kind='a')
+        counter.inc(2, kind='a')
+        self.assert_equal(counter.value(kind='a'), 3)
+        self.assert_equal(self.registry.as_dict(),
+                          {'things_total{kind="a"}': 3})
+
+    def test_wrong_labels(self):
+        counter = self.registry.counter('things_total', 'Things.', ['kind'])
+        with self.assert_raises(ValueError):
+            counter.inc(other='a')
+
+    def test_histogram(self):
+        hist = self.registry.histogram('work_seconds', 'Work.',
+                                       buckets=(1, 5))
+        hist.observe(0.5)
+        hist.observe(3)
+        self.assert_equal(hist.count(), 2)
+        self.assert_equal(hist.sum(), 3.5)
+
+        text = self.registry.exposition()
+        self.assert_true('# TYPE work_seconds histogram' in text)
+        self.assert_true('work_seconds_bucket{le="1"} 1' in text)
+        self.assert_true('work_seconds_bucket{le="5"} 2' in text)
+        self.assert_true('work_seconds_bucket{le="+Inf"} 2' in text)
+
+    def test_duplicate(self):
+        self.registry.counter('things_total', 'Things.')
+        with self.assert_raises(ValueError):
+            self.registry.counter('things_total', 'Things.')
+
+    def test_serve(self):
+        self.registry.counter('things_total', 'Things.').inc()
+        server = metrics.serve(0, registry=self.registry)
+        try:
+            url = 'http://127.0.0.1:%d/metrics' % (server.server_address[1],)
+            body = urlopen(url).read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assert_true('things_total 1' in body)
+
+
+class TestSpecterMetrics(StaticSpecterTestCase):
+    STATIC_FILE = 'simple.html'
+
+    def test_page_loads(self):
+        loads = metrics.PAGE_LOADS.value(result='success')
+        observed = metrics.LOAD_SECONDS.count()
+        received = metrics.BYTES_RECEIVED.value()
+
+        self.open('/')
+        self.assert_equal(metrics.PAGE_LOADS.value(result='success'),
+                          loads + 1)
+        self.assert_equal(metrics.LOAD_SECONDS.count(), observed + 1)
+        self.assert_true(metrics.BYTES_RECEIVED.value() > received)
+
+    def test_timeouts(self):
+        timeouts = metrics.WAIT_TIMEOUTS.value()
+        self.open('/')
+        with self.assert_raises(TimeoutError):
+            self.s.wait_for_selector('#missing', timeout=0.1)
+        self.assert_equal(metrics.WAIT_TIMEOUTS.value(), timeouts + 1)
+
+    def test_console_messages(self):
+        messages = metrics.CONSOLE_MESSAGES.value()
+        self.open('/')
+        self.s.evaluate('console.log("hello")')
+        self.assert_equal(metrics.CONSOLE_MESSAGES.value(), messages + 1)
@@ -0,0 +1,89 @@
+import time
+
+from specter.specter import TimeoutError
+from .util import SpecterTestCase
+
+
+XHR_PAGE = """
+<html>
+  <body>
+    <div id='results'></div>
+    <script>
+      function fetch(n) {
+          var xhr = new XMLHttpRequest();
+          xhr.open('GET', '/data/' + n);
+          xhr.onload = function() {
+              document.getElementById('results').innerHTML += xhr.responseText;
+              if (n < 3) {
+                  setTimeout(function() { fetch(n + 1); }, 50);
+              }
+          };
+          xhr.send();
+      }
+      window.onload = function() { fetch(1); };
+    </script>
+  </body>
+</html>
+"""
+
+
+class TestNetworkIdle(SpecterTestCase):
+    def setup_app(self, app):
+        self.fetched = []
+
+        @app.route('/')
+        def index():
+            return XHR_PAGE
+
+        @app.route('/data/<n>')
+        def data(n):
+            time.sleep(0.1)
+            self.fetched.append(n)
+            return '<p>%s</p>' % (n,)
+
+        @app.route('/slow')
+        def slow():
+            time.sleep(1)
+            return 'slow'
+
+    def test_waits_for_xhr(self):
+        self.open('/')
+        self.s.wait_for_network_idle(idle_ms=300)
+        self.assert_equal(self.fetched, ['1', '2', '3'])
+        self.assert_equal(self.s.page.network_stats.in_flight, 0)
+
+    def test_in_flight_counted(self):
+        self.open('/')
+        self.s.evaluate("""
+            var xhr = new XMLHttpRequest();
+            xhr.open('GET', '/slow');
+            xhr.send();
+        """)
+        stats = self.s.page.network_stats
+        self.s.wait_for(lambda: stats.in_flight >= 1, timeout=1)
+        self.s.wait_for_network_idle(idle_ms=100)
+        self.assert_equal(stats.in_flight, 0)
+
+    def test_max_inflight(self):
+        self.open('/')
+        self.s.wait_for_network_idle(idle_ms=300)
+        self.s.evaluate("""
+            var xhr = new XMLHttpRequest();
+            xhr.open('GET', '/slow');
+            xhr.send();
+        """)
+
+        # One long-running request is allowed, so this doesn't wait for it.
+        start = time.time()
+        self.s.wait_for_network_idle(idle_ms=100, max_inflight=1)
+        self.assert_true(time.time() - start < 0.9)
+
+    def test_timeout(self):
+        self.open('/')
+        self.s.evaluate("""
+            var xhr = new XMLHttpRequest();
+            xhr.open('GET', '/slow');
+            xhr.send();
+        """)
+        with self.assert_raises(TimeoutError):
+            self.s.wait_for_network_idle(idle_ms=100, timeout=0.2)
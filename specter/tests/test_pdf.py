@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+
+from specter import SpecterPool
+from specter.pdf import PDFPrinter
+from .util import StaticSpecterTestCase
+
+
+class TestPDF(StaticSpecterTestCase):
+    STATIC_FILE = 'simple.html'
+
+    def setup(self):
+        super(TestPDF, self).setup()
+        self.dir = tempfile.mkdtemp()
+
+    def teardown(self):
+        shutil.rmtree(self.dir)
+        super(TestPDF, self).teardown()
+
+    def assert_pdf(self, path):
+        with open(path, 'rb') as f:
+            self.assert_true(f.read().startswith(b'%PDF'))
+
+    def test_render_pdf(self):
+        self.open('/')
+        path = os.path.join(self.dir, 'out.pdf')
+        self.s.render_pdf(path)
+        self.assert_pdf(path)
+
+    def test_custom_settings(self):
+        self.open('/')
+        path = os.path.join(self.dir, 'out.pdf')
+        self.s.render_pdf(path, page_size=(100, 150), margins=(5, 5, 5, 5),
+                          landscape=True)
+        self.assert_pdf(path)
+
+    def test_unknown_page_size(self):
+        with self.assert_raises(ValueError):
+            PDFPrinter('bogus')
+
+    def test_printers_are_shared(self):
+        self.assert_true(PDFPrinter.get('A4', 10) is PDFPrinter.get('A4', 10))
+        self.assert_true(PDFPrinter.get('Letter', [1, 2, 3, 4]) is
+                         PDFPrinter.get('Letter', (1, 2, 3, 4)))
+
+    def test_batch(self):
+        pool = SpecterPool(2, specter=self.s)
+        urls = [self.baseUrl + '/'] * 3
+        paths = [os.path.join(self.dir, '%d.pdf' % i) for i in range(3)]
+
+        self.assert_equal(pool.render_pdfs(urls, paths), paths)
+        for path in paths:
+            self.assert_pdf(path)
@@ -0,0 +1,98 @@
+from specter import SpecterPool, SpecterError
+from specter.specter import QtCore, TimeoutError
+from .util import StaticSpecterTestCase
+
+
+class TestPool(StaticSpecterTestCase):
+    STATIC_FILE = 'simple.html'
+
+    def setup(self):
+        super(TestPool, self).setup()
+        self.pool = SpecterPool(3, specter=self.s)
+
+    def url(self, path):
+        return self.baseUrl + path
+
+    def test_size(self):
+        self.assert_equal(self.pool.size, 3)
+        self.assert_equal(self.pool.available, 3)
+
+    def test_checkout_and_checkin(self):
+        page = self.pool.checkout()
+        self.assert_equal(self.pool.available, 2)
+        self.assert_true(page is not self.s.page)
+
+        self.pool.checkin(page)
+        self.assert_equal(self.pool.available, 3)
+
+    def test_checkin_twice(self):
+        page = self.pool.checkout()
+        self.pool.checkin(page)
+        with self.assert_raises(SpecterError):
+            self.pool.checkin(page)
+
+    def test_checkin_foreign_page(self):
+        with self.assert_raises(SpecterError):
+            self.pool.checkin(self.s.page)
+
+    def test_checkout_timeout(self):
+        pages = [self.pool.checkout() for _ in range(3)]
+        with self.assert_raises(TimeoutError):
+            self.pool.checkout(timeout=0.05)
+
+        for page in pages:
+            self.pool.checkin(page)
+
+    def test_context_manager_resets(self):
+        with self.pool.page() as page:
+            page.open(self.url('/'))
+            page.wait_for_page_load()
+            self.assert_equal(page.title, 'This is a title')
+
+        self.assert_equal(self.pool.available, 3)
+        self.assert_equal(page.url, 'about:blank')
+
+    def test_map(self):
+        urls = [self.url('/simple.html'), self.url('/nav1.html'),
+                self.url('/nav2.html'), self.url('/nav3.html'),
+                self.url('/selectors.html')]
+        results = self.pool.map(lambda page: page.url, urls)
+
+        self.assert_equal(results, urls)
+        self.assert_equal(self.pool.available, 3)
+
+    def test_map_reuses_loaded_pages(self):
+        # More jobs than pages, so each page is reset and reused.
+        urls = [self.url('/nav1.html'), self.url('/nav2.html'),
+                self.url('/nav3.html')] * 3
+
+        def location(page):
+            return page.main_frame.evaluate('window.location.href')
+
+        self.assert_equal(self.pool.map(location, urls), urls)
+        for page in self.pool.pages:
+            self.assert_true(page.loaded)
+            self.assert_equal(page.url, 'about:blank')
+
+    def test_map_with_all_pages_checked_out(self):
+        pages = [self.pool.checkout() for _ in range(3)]
+        with self.assert_raises(TimeoutError):
+            self.pool.map(lambda page: page.url, [self.url('/')],
+                          timeout=0.05)
+
+        # Once a page comes back, the URLs are loaded in it.
+        QtCore.QTimer.singleShot(50, lambda: self.pool.checkin(pages.pop()))
+        urls = [self.url('/nav1.html'), self.url('/nav2.html')]
+        self.assert_equal(self.pool.map(lambda page: page.url, urls), urls)
+
+        for page in pages:
+            self.pool.checkin(page)
+        self.assert_equal(self.pool.available, 3)
+
+    def test_map_error_returns_pages(self):
+        def fail(page):
+            raise ValueError("oops")
+
+        with self.assert_raises(ValueError):
+            self.pool.map(fail, [self.url('/'), self.url('/nav1.html')])
+        self.assert_equal(self.pool.available, 3)
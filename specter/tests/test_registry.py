@@ -55,3 +55,18 @@ class TestFrameRegistry(BaseTestCase):
         two = self.r.wrap(self.o)
 
         self.assert_true(one is not two)
+
+    def test_purge(self):
+        self.create()
+
+        page, other = RefMe(), RefMe()
+        self.o.page = lambda: page
+        kept = RefMe()
+        kept.page = lambda: other
+
+        self.r.wrap(self.o)
+        wrapped = self.r.wrap(kept)
+        self.r.purge(page)
+
+        self.assert_true(self.r.wrap(kept) is wrapped)
+        self.assert_equal(len(self.r._registry), 1)
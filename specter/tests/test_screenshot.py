@@ -0,0 +1,263 @@
+import io
+import os
+import sys
+import zlib
+import struct
+import tempfile
+
+from specter.specter import ElementError
+from specter.imaging import ImageEncoder, PNGWriter, PNG_SIGNATURE, \
+    ThreadPoolExecutor, numpy
+from .util import BaseTestCase, SpecterTestCase, StaticSpecterTestCase, \
+    skip_if
+
+
+def png_size(data):
+    assert data.startswith(PNG_SIGNATURE)
+    return struct.unpack('>II', data[16:24])
+
+
+def png_pixels(data):
+    """
+    Decompress the (unfiltered) image data of a PNG written by PNGWriter.
+    """
+    pos = len(PNG_SIGNATURE)
+    idat = []
+    while pos < len(data):
+        length, = struct.unpack('>I', data[pos:pos + 4])
+        tag = data[pos + 4:pos + 8]
+        if tag == b'IDAT':
+            idat.append(data[pos + 8:pos + 8 + length])
+        pos += length + 12
+    return zlib.decompress(b''.join(idat))
+
+
+class TestPNGWriter(BaseTestCase):
+    def test_write_in_strips(self):
+        out = io.BytesIO()
+        writer = PNGWriter(out, 2, 3)
+        writer.write_rows(b'\x01\x02\x03\x04\x05\x06' * 2)
+        writer.write_rows(b'\x07\x08\x09\x0a\x0b\x0c')
+        writer.close()
+
+        data = out.getvalue()
+        self.assert_equal(png_size(data), (2, 3))
+        self.assert_equal(png_pixels(data),
+                          b'\x00\x01\x02\x03\x04\x05\x06' * 2 +
+                          b'\x00\x07\x08\x09\x0a\x0b\x0c')
+
+    def test_stride(self):
+        out = io.BytesIO()
+        writer = PNGWriter(out, 1, 2)
+        writer.write_rows(b'\x01\x02\x03\xff\x04\x05\x06', stride=4)
+        writer.close()
+        self.assert_equal(png_pixels(out.getvalue()),
+                          b'\x00\x01\x02\x03\x00\x04\x05\x06')
+
+    def test_incomplete(self):
+        writer = PNGWriter(io.BytesIO(), 1, 2)
+        writer.write_rows(b'\x01\x02\x03')
+        with self.assert_raises(ValueError):
+            writer.close()
+
+    def test_too_many_rows(self):
+        writer = PNGWriter(io.BytesIO(), 1, 1)
+        with self.assert_raises(ValueError):
+            writer.write_rows(b'\x01\x02\x03' * 2)
+
+
+class TestScreenshot(StaticSpecterTestCase):
+    STATIC_FILE = 'screenshot.html'
+
+    def test_viewport(self):
+        self.open('/')
+        self.assert_equal(png_size(self.s.screenshot()), (800, 600))
+
+    def test_full_page(self):
+        self.open('/')
+        self.s.page.main_frame.screenshot_tile_height = 500
+        width, height = png_size(self.s.screenshot(full_page=True))
+        self.assert_equal(width, 800)
+        self.assert_true(height >= 3000)
+
+        # The viewport is restored afterwards.
+        self.assert_equal(png_size(self.s.screenshot()), (800, 600))
+
+    def test_element(self):
+        self.open('/')
+        data = self.s.screenshot(selector='#box')
+        self.assert_equal(png_size(data), (120, 80))
+
+        # Every pixel of the box is red.
+        pixels = png_pixels(data)
+        self.assert_equal(pixels[:4], b'\x00\xff\x00\x00')
+
+    def test_missing_element(self):
+        self.open('/')
+        with self.assert_raises(ElementError):
+            self.s.screenshot(selector='#missing')
+
+    def test_missing_element_leaves_no_file(self):
+        self.open('/')
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, 'shot.png')
+        try:
+            with self.assert_raises(ElementError):
+                self.s.screenshot(path, selector='#missing')
+            self.assert_equal(os.listdir(tmpdir), [])
+        finally:
+            os.rmdir(tmpdir)
+
+    def test_write_to_file(self):
+        self.open('/')
+        fd, path = tempfile.mkstemp(suffix='.png')
+        os.close(fd)
+        try:
+            self.assert_true(self.s.screenshot(path) is None)
+            with open(path, 'rb') as f:
+                self.assert_equal(png_size(f.read()), (800, 600))
+        finally:
+            os.remove(path)
+
+    def test_jpeg(self):
+        self.open('/')
+        data = self.s.screenshot(format='jpg', quality=50)
+        self.assert_true(data.startswith(b'\xff\xd8'))
+
+
+RESPONSIVE_PAGE = """
+<html>
+  <head>
+    <style>
+      #layout:after { content: 'desktop'; }
+      @media (max-width: 600px) {
+        #layout:after { content: 'mobile'; }
+      }
+    </style>
+  </head>
+  <body><div id='layout'></div></body>
+</html>
+"""
+
+# Repaints continuously, without its layout changing.
+ANIMATED_PAGE = """
+<html>
+  <body>
+    <div id='spinner' style='width: 20px; height: 20px'></div>
+    <script>
+      var on = false;
+      setInterval(function() {
+          on = !on;
+          document.getElementById('spinner').style.background =
+              on ? 'red' : 'blue';
+      }, 10);
+    </script>
+  </body>
+</html>
+"""
+
+
+class TestCaptureViewports(SpecterTestCase):
+    def setup_app(self, app):
+        self.loads = 0
+
+        @app.route('/')
+        def index():
+            self.loads += 1
+            return RESPONSIVE_PAGE
+
+        @app.route('/animated')
+        def animated():
+            return ANIMATED_PAGE
+
+    def test_screenshots(self):
+        self.open('/')
+        shots = self.s.capture_viewports([(375, 667), (1280, 800)])
+        self.assert_equal([png_size(shot)[0] for shot in shots], [375, 1280])
+        self.assert_equal(self.loads, 1)
+
+    def test_custom_capture(self):
+        self.open('/')
+        widths = self.s.capture_viewports(
+            [(375, 667), (1024, 768)],
+            capture=lambda page: page.evaluate('window.innerWidth'))
+        self.assert_equal(widths, [375, 1024])
+
+    def test_animated_page_settles(self):
+        self.open('/animated')
+        widths = self.s.capture_viewports(
+            [(375, 667), (1024, 768)],
+            capture=lambda page: page.evaluate('window.innerWidth'),
+            timeout=5)
+        self.assert_equal(widths, [375, 1024])
+
+    def test_restores_viewport(self):
+        self.open('/')
+        self.s.capture_viewports([(375, 667)])
+        self.assert_equal(png_size(self.s.screenshot()), (800, 600))
+
+
+@skip_if(ThreadPoolExecutor is None, 'concurrent.futures is not available')
+class TestScreenshotAsync(StaticSpecterTestCase):
+    STATIC_FILE = 'screenshot.html'
+
+    def test_returns_future(self):
+        self.open('/')
+        future = self.s.screenshot_async(selector='#box')
+        self.assert_equal(png_size(future.result(5)), (120, 80))
+
+    def test_write_to_file(self):
+        self.open('/')
+        fd, path = tempfile.mkstemp(suffix='.png')
+        os.close(fd)
+        try:
+            future = self.s.screenshot_async(path)
+            self.assert_equal(future.result(5), path)
+            with open(path, 'rb') as f:
+                self.assert_equal(png_size(f.read()), (800, 600))
+        finally:
+            os.remove(path)
+
+    def test_own_encoder(self):
+        self.open('/')
+        encoder = ImageEncoder(workers=1)
+        try:
+            futures = [self.s.screenshot_async(format='jpg', encoder=encoder)
+                       for _ in range(3)]
+            for future in futures:
+                self.assert_true(future.result(5).startswith(b'\xff\xd8'))
+        finally:
+            encoder.shutdown()
+
+
+@skip_if(numpy is None, 'NumPy is not installed')
+class TestScreenshotArray(StaticSpecterTestCase):
+    STATIC_FILE = 'screenshot.html'
+
+    def test_viewport(self):
+        self.open('/')
+        arr = self.s.screenshot_array()
+        self.assert_equal(arr.shape, (600, 800, 4))
+        self.assert_equal(arr.dtype, numpy.uint8)
+
+    def test_element(self):
+        self.open('/')
+        arr = self.s.screenshot_array(selector='#box')
+        self.assert_equal(arr.shape, (80, 120, 4))
+
+        # ARGB32 is stored as BGRA on little-endian machines.
+        if sys.byteorder == 'little':
+            self.assert_equal(list(arr[0, 0]), [0, 0, 255, 255])
+
+    def test_preallocated(self):
+        self.open('/')
+        out = numpy.zeros((80, 120, 4), dtype=numpy.uint8)
+        arr = self.s.screenshot_array(out, selector='#box')
+        self.assert_true(arr is out)
+        self.assert_true(out.any())
+
+    def test_wrong_shape(self):
+        self.open('/')
+        out = numpy.zeros((10, 10, 4), dtype=numpy.uint8)
+        with self.assert_raises(ValueError):
+            self.s.screenshot_array(out)
@@ -1,3 +1,5 @@
+from specter.specter import TimeoutError
+
 from .util import StaticSpecterTestCase
 
 
@@ -23,3 +25,51 @@ class TestSelectors(StaticSpecterTestCase):
         self.assert_true(self.s.exists('#deleteme'))
         self.s.wait_while_selector('#deleteme')
         self.assert_false(self.s.exists('#deleteme'))
+
+    def test_wait_for_selector_after_removal(self):
+        self.open('/')
+        self.assert_false(self.s.exists('#the_id:empty'))
+        self.s.evaluate(
+            "setTimeout(function() {"
+            "    var el = document.getElementById('the_id');"
+            "    el.removeChild(el.firstChild);"
+            "}, 100)")
+        self.s.wait_for_selector('#the_id:empty', timeout=5)
+
+    def test_wait_for_selector_timeout(self):
+        self.open('/')
+        with self.assert_raises(TimeoutError):
+            self.s.wait_for_selector('#never_created', timeout=0.1)
+
+    def test_wait_for_existing_selector(self):
+        self.open('/')
+        self.s.wait_for_selector('#the_id', timeout=0.1)
+
+    def test_watch_many_selectors(self):
+        self.open('/')
+        watcher = self.s.page.main_frame.selector_watcher
+
+        ids = [watcher.watch(sel) for sel in
+               ('#the_id', '.created_class', '#deleteme')]
+        self.assert_equal([watcher.present(i) for i in ids],
+                          [True, False, True])
+
+        self.s.wait_for_selector('#created_id')
+        self.assert_equal([watcher.present(i) for i in ids],
+                          [True, True, False])
+
+        for i in ids:
+            watcher.unwatch(i)
+
+    def test_watch_is_shared(self):
+        self.open('/')
+        watcher = self.s.page.main_frame.selector_watcher
+
+        one = watcher.watch('#the_id')
+        two = watcher.watch('#the_id')
+        self.assert_equal(one, two)
+
+        watcher.unwatch(one)
+        self.assert_true(watcher.present(two))
+        watcher.unwatch(two)
+        self.assert_equal(watcher.present(two), None)
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+
+from specter import Specter, SpecterError
+from .util import SpecterTestCase
+from .bottle import request, response
+
+
+class TestSession(SpecterTestCase):
+    def setup_app(self, app):
+        self.received = []
+
+        @app.route('/login')
+        def login():
+            response.set_cookie('session', 'abc123')
+            return 'logged in'
+
+        @app.route('/check')
+        def check():
+            self.received.append((dict(request.cookies),
+                                  request.headers.get('X-Token')))
+            return 'checked'
+
+        @app.route('/storage')
+        def storage():
+            return '<script>localStorage.setItem("seen", "yes");</script>'
+
+        @app.route('/read')
+        def read():
+            return ('<div id="out"></div><script>'
+                    'document.getElementById("out").textContent = '
+                    'localStorage.getItem("seen");</script>')
+
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'session.gz')
+        super(TestSession, self).setup()
+        self.s = Specter(
+            headers={'X-Token': 'secret'},
+            local_storage_path=os.path.join(self.dir, 'storage1'),
+        )
+
+    def teardown(self):
+        super(TestSession, self).teardown()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def restored(self):
+        other = Specter(local_storage_path=os.path.join(self.dir, 'storage2'))
+        other.load_session(self.path)
+        return other
+
+    def test_headers_option(self):
+        self.open('/check')
+        self.assert_equal(self.received[-1][1], 'secret')
+
+    def test_open_headers_take_precedence(self):
+        self.s.open(self.baseUrl + '/check', headers={'X-Token': 'other'})
+        self.s.wait_for_page_load()
+        self.assert_equal(self.received[-1][1], 'other')
+
+    def test_restores_cookies_and_headers(self):
+        self.open('/login')
+        self.s.save_session(self.path)
+
+        other = self.restored()
+        other.open(self.baseUrl + '/check')
+        other.wait_for_page_load()
+
+        self.assert_equal(self.received[-1],
+                          ({'session': 'abc123'}, 'secret'))
+
+    def test_restores_local_storage(self):
+        self.open('/storage')
+        # WebKit writes local storage to disk asynchronously.
+        self.s.sleep(1.5)
+        self.s.save_session(self.path)
+
+        other = self.restored()
+        other.open(self.baseUrl + '/read')
+        other.wait_for_page_load()
+        self.assert_equal(other.evaluate(
+            'document.getElementById("out").textContent'), 'yes')
+
+    def test_local_storage_requires_path(self):
+        other = Specter()
+        with self.assert_raises(SpecterError):
+            other.save_session(self.path)
+        self.assert_false(os.path.exists(self.path))
+
+        other.save_session(self.path, local_storage=False)
+        self.assert_true(os.path.exists(self.path))
+
+    def test_restoring_local_storage_requires_path(self):
+        storage = os.path.join(self.dir, 'storage1')
+        os.makedirs(storage)
+        with open(os.path.join(storage, 'origin.localstorage'), 'wb') as f:
+            f.write(b'data')
+        self.s.save_session(self.path)
+
+        other = Specter()
+        with self.assert_raises(SpecterError):
+            other.load_session(self.path)
+        self.assert_equal(other.manager.headers, {})
+
+        other.load_session(self.path, local_storage=False)
+        self.assert_equal(other.manager.headers, {'X-Token': 'secret'})
+
+    def test_no_temporary_files_left(self):
+        self.s.save_session(self.path)
+        self.assert_equal([f for f in os.listdir(self.dir)
+                           if f.endswith('.tmp')], [])
+
+    def test_bad_version(self):
+        self.s.save_session(self.path)
+        self.s.SESSION_VERSION = 2
+        with self.assert_raises(SpecterError):
+            self.s.load_session(self.path)
@@ -48,6 +48,25 @@ class TestSimple(StaticSpecterTestCase):
         diff = (end - start) - 0.05
         self.assert_true(diff < 0.02)
 
+    def test_wait_for_predicate_error(self):
+        def predicate():
+            raise ValueError("bad predicate")
+
+        with self.assert_raises(ValueError):
+            self.s.wait_for(predicate, timeout=1)
+
+    def test_wait_for_page_load_returns_promptly(self):
+        self.open('/', wait=False)
+        start = time.time()
+        self.s.wait_for_page_load(timeout=5)
+        self.assert_true(self.s.page.loaded)
+        self.assert_true(time.time() - start < 5)
+
+    def test_wait_for_page_load_timeout(self):
+        self.s.page.loaded = False
+        with self.assert_raises(TimeoutError):
+            self.s.wait_for_page_load(timeout=0.05)
+
     def test_default_viewport(self):
         self.assert_equal(self.s.viewport_size, (800, 600))
 
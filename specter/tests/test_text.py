@@ -0,0 +1,66 @@
+import re
+
+from specter.specter import TimeoutError
+from .util import StaticSpecterTestCase
+
+
+class TestWaitForText(StaticSpecterTestCase):
+    STATIC_FILE = 'text.html'
+
+    def test_existing_text(self):
+        self.open('/')
+        self.assert_equal(self.s.wait_for_text('Loading'), 'Loading')
+
+    def test_added_text(self):
+        self.open('/')
+        self.assert_equal(self.s.wait_for_text('confirmed'), 'confirmed')
+
+    def test_changed_text(self):
+        self.open('/')
+        self.assert_equal(self.s.wait_for_text('Done'), 'Done')
+
+    def test_text_split_across_nodes(self):
+        # 'world' is added as a separate text node after 'Hello, '.
+        self.open('/')
+        self.assert_equal(self.s.wait_for_text('Hello, world'),
+                          'Hello, world')
+
+    def test_returns_matching_pattern(self):
+        self.open('/')
+        found = self.s.wait_for_text(['never appears', 'confirmed'])
+        self.assert_equal(found, 'confirmed')
+
+    def test_regex(self):
+        self.open('/')
+        pattern = re.compile(r'order \d+', re.IGNORECASE)
+        self.assert_true(self.s.wait_for_text(pattern) is pattern)
+
+    def test_timeout(self):
+        self.open('/')
+        with self.assert_raises(TimeoutError):
+            self.s.wait_for_text('never appears', timeout=0.1)
+
+    def test_positional_timeout(self):
+        self.open('/')
+        with self.assert_raises(TimeoutError):
+            self.s.wait_for_text('never appears', 0.1)
+
+    def test_no_patterns(self):
+        self.open('/')
+        with self.assert_raises(ValueError):
+            self.s.wait_for_text([])
+
+    def test_invalid_pattern(self):
+        self.open('/')
+        with self.assert_raises(TypeError):
+            self.s.wait_for_text(['Loading', 5])
+
+    def test_unsupported_regex(self):
+        self.open('/')
+        for pattern in [re.compile('Load.ng', re.DOTALL),
+                        re.compile('Load ing', re.VERBOSE),
+                        re.compile('(?P<word>Loading)'),
+                        re.compile(r'Loading\Z'),
+                        re.compile('(?i)loading')]:
+            with self.assert_raises(ValueError):
+                self.s.wait_for_text(pattern)
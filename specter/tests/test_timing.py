@@ -0,0 +1,69 @@
+from specter.specter import LoadResult
+from .util import BaseTestCase, StaticSpecterTestCase
+
+
+class TestLoadResult(BaseTestCase):
+    def test_phases(self):
+        result = LoadResult('http://example.com/')
+        result.timing = {
+            'navigationStart': 1000,
+            'domainLookupStart': 1010,
+            'domainLookupEnd': 1030,
+            'connectStart': 1030,
+            'connectEnd': 1050,
+            'requestStart': 1050,
+            'responseStart': 1100,
+            'responseEnd': 1150,
+            'domContentLoadedEventEnd': 1200,
+            'loadEventEnd': 0,
+        }
+
+        phases = result.phases
+        self.assert_equal(phases['dns'], 20)
+        self.assert_equal(phases['connect'], 20)
+        self.assert_equal(phases['ttfb'], 100)
+        self.assert_equal(phases['dom_ready'], 200)
+        self.assert_true(phases['load'] is None)
+
+
+class TestTiming(StaticSpecterTestCase):
+    STATIC_FILE = 'frames.html'
+
+    def test_open_returns_result(self):
+        result = self.open('/', wait=False)
+        self.assert_false(result.finished)
+
+        self.assert_true(self.s.wait_for_page_load() is result)
+        self.assert_true(result.finished)
+        self.assert_true(result.ok)
+        self.assert_equal(result.url, self.baseUrl + '/')
+        self.assert_true(result.elapsed >= 0)
+
+    def test_navigation_timing(self):
+        self.open('/')
+        result = self.s.page.load_result
+        self.assert_true(result.timing['navigationStart'] > 0)
+        self.assert_true(result.phases['ttfb'] is not None)
+
+    def test_child_frames(self):
+        self.open('/')
+        urls = sorted(f['url'] for f in self.s.page.load_result.frames)
+        self.assert_equal(urls, [self.baseUrl + '/frame_a.html',
+                                 self.baseUrl + '/frame_b.html'])
+
+    def test_navigation_started_by_page(self):
+        self.open('/')
+        page = self.s.page
+        first = page.load_result
+        target = self.baseUrl + '/nav1.html'
+
+        self.s.evaluate("window.location.href = '/nav1.html'")
+        self.s.wait_for(lambda: page.load_result is not first and
+                        page.load_result.finished)
+        self.assert_equal(page.load_result.requested_url, target)
+        self.assert_equal(page.load_result.url, target)
+
+    def test_disabled(self):
+        self.s.page.collect_timing = False
+        self.open('/')
+        self.assert_equal(self.s.page.load_result.timing, {})
@@ -0,0 +1,87 @@
+import os
+import json
+import tempfile
+
+from specter import tracing
+from .util import BaseTestCase, StaticSpecterTestCase
+
+
+class TestTracer(BaseTestCase):
+    def test_span(self):
+        tracer = tracing.Tracer()
+        with tracer.span('work', 'test', size=3):
+            pass
+
+        event, = tracer.events
+        self.assert_equal(event['name'], 'work')
+        self.assert_equal(event['cat'], 'test')
+        self.assert_equal(event['ph'], 'X')
+        self.assert_equal(event['args'], {'size': 3})
+        self.assert_true(event['dur'] >= 0)
+
+    def test_max_events(self):
+        tracer = tracing.Tracer(max_events=2)
+        for i in range(5):
+            tracer.instant('event %d' % (i,))
+        self.assert_equal([e['name'] for e in tracer.events],
+                          ['event 3', 'event 4'])
+
+    def test_disabled(self):
+        tracing.stop_tracing()
+
+        @tracing.traced()
+        def func(self, arg):
+            return arg
+
+        self.assert_equal(func(None, 'x'), 'x')
+        self.assert_true(tracing.current_tracer() is None)
+
+        # No per-call context manager is built while tracing is off.
+        self.assert_true(tracing.span('a') is tracing.span('b'))
+        with tracing.span('a'):
+            pass
+
+    def test_save(self):
+        tracer = tracing.Tracer()
+        tracer.instant('event')
+
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            tracer.save(path)
+            with open(path) as f:
+                trace = json.load(f)
+        finally:
+            os.remove(path)
+
+        phases = [e['ph'] for e in trace['traceEvents']]
+        self.assert_equal(sorted(phases), ['M', 'i'])
+
+
+class TestTracing(StaticSpecterTestCase):
+    STATIC_FILE = 'simple.html'
+
+    def teardown(self):
+        tracing.stop_tracing()
+        super(TestTracing, self).teardown()
+
+    def test_operations_traced(self):
+        tracer = tracing.start_tracing()
+        self.open('/')
+        self.s.evaluate('1 + 1')
+        tracing.stop_tracing()
+
+        names = set(e['name'] for e in tracer.events)
+        for name in ['open', 'wait_for_page_load', 'evaluate', 'event-loop',
+                     'signal:load-finished']:
+            self.assert_true(name in names, name)
+
+        opens = [e for e in tracer.events if e['name'] == 'open']
+        self.assert_true(opens[0]['args']['arg'].startswith(self.baseUrl))
+        self.assert_true(tracer.total('qt') > 0)
+
+    def test_stopped(self):
+        tracer = tracing.start_tracing()
+        tracing.stop_tracing()
+        self.open('/')
+        self.assert_equal(len(tracer.events), 0)
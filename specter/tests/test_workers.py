@@ -0,0 +1,125 @@
+import os
+import time
+
+from specter import WorkerError
+from specter.workers import WorkerFarm
+from .util import StaticSpecterTestCase
+
+
+# Tasks need to be importable by the worker processes, so they're defined at
+# the top level of this module.
+def get_title(specter):
+    return specter.title
+
+
+def get_pid(specter):
+    return os.getpid()
+
+
+def add(specter, a, b):
+    return a + b
+
+
+def crash(specter):
+    os._exit(1)
+
+
+def hang(specter):
+    time.sleep(60)
+
+
+class TestWorkerFarm(StaticSpecterTestCase):
+    STATIC_FILE = 'simple.html'
+
+    def setup(self):
+        super(TestWorkerFarm, self).setup()
+        self.farm = WorkerFarm(workers=2, jobs_per_worker=2, job_timeout=10,
+                               max_retries=0)
+
+    def teardown(self):
+        self.farm.close()
+        super(TestWorkerFarm, self).teardown()
+
+    def test_map_callable(self):
+        urls = [self.baseUrl + '/'] * 3
+        self.assert_equal(self.farm.map(get_title, urls),
+                          ['This is a title'] * 3)
+
+    def test_map_script(self):
+        urls = [self.baseUrl + '/']
+        self.assert_equal(self.farm.map('document.title', urls),
+                          ['This is a title'])
+
+    def test_submit_args(self):
+        job_id = self.farm.submit(add, 1, 2)
+        result = next(self.farm.results())
+        self.assert_equal(result.job_id, job_id)
+        self.assert_equal(result.get(), 3)
+
+        self.farm.submit(get_title, url=self.baseUrl + '/')
+        self.assert_equal(next(self.farm.results()).get(), 'This is a title')
+
+    def test_map_empty(self):
+        job_id = self.farm.submit(get_title, url=self.baseUrl + '/')
+        self.assert_equal(self.farm.map(get_title, []), [])
+
+        # The outstanding job's result is still delivered.
+        self.assert_equal(next(self.farm.results()).job_id, job_id)
+
+    def test_error_result(self):
+        job_id = self.farm.submit('throw new Error("oops")')
+        result = next(self.farm.results())
+
+        self.assert_equal(result.job_id, job_id)
+        self.assert_false(result.ok)
+        with self.assert_raises(WorkerError):
+            result.get()
+
+    def test_unpicklable_task(self):
+        with self.assert_raises(WorkerError):
+            self.farm.submit(lambda specter: 1)
+
+        # Nothing was queued, so the farm carries on as normal.
+        self.assert_equal(list(self.farm.results(timeout=1)), [])
+        self.assert_equal(self.farm.map('1 + 1', [None]), [2])
+
+    def test_crash_restarts_worker(self):
+        self.farm.submit(crash)
+        result = next(self.farm.results())
+        self.assert_false(result.ok)
+        self.assert_equal(self.farm.restarts, 1)
+
+        # The farm still works afterwards.
+        self.assert_equal(self.farm.map('1 + 1', [None]), [2])
+
+    def test_hung_worker_is_restarted(self):
+        self.farm.job_timeout = 0.5
+        self.farm.submit(hang)
+        result = next(self.farm.results())
+        self.assert_false(result.ok)
+        self.assert_true(self.farm.restarts >= 1)
+
+    def test_workers_are_recycled(self):
+        pids = self.farm.map(get_pid, [None] * 6)
+        self.assert_true(len(set(pids)) > 2)
+
+    def test_rss_limit_recycles_workers(self):
+        farm = WorkerFarm(workers=1, jobs_per_worker=None, job_timeout=10,
+                          max_retries=0, memory_limits={'rss': 1})
+        try:
+            pids = farm.map(get_pid, [self.baseUrl + '/'] * 3)
+            self.assert_equal(len(set(pids)), 3)
+            self.assert_equal(farm.recycles, 3)
+            self.assert_equal(farm.restarts, 0)
+        finally:
+            farm.close()
+
+    def test_page_limits_recycle_pages(self):
+        farm = WorkerFarm(workers=1, jobs_per_worker=None, job_timeout=10,
+                          max_retries=0, memory_limits={'dom_nodes': 1})
+        try:
+            pids = farm.map(get_pid, [self.baseUrl + '/'] * 3)
+            self.assert_equal(len(set(pids)), 1)
+            self.assert_equal(farm.recycles, 0)
+        finally:
+            farm.close()
@@ -0,0 +1,204 @@
+"""
+Records a timeline of Specter operations in Chrome's trace-event format, which
+can be loaded into ``chrome://tracing`` or Perfetto::
+
+    from specter import tracing
+
+    tracer = tracing.start_tracing()
+    ...
+    tracing.stop_tracing()
+    tracer.save('job.trace.json')
+
+Page operations (opening, waiting, evaluating, screenshots and so on) and
+Specter's signals are recorded as spans in the 'specter' category.  Time spent
+running the Qt event loop is recorded as nested spans in the 'qt' category, so
+a trace viewer's "self time" for an operation is the time spent in Python,
+while its 'qt' children show the time spent waiting on WebKit.
+
+When tracing is off, an instrumented call costs a global lookup, plus
+entering a shared no-op context manager for :func:`span`.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from .six import string_types
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+# The active tracer, or None.
+_tracer = None
+
+
+class Tracer(object):
+    """
+    Collects trace events.  At most :attr:`max_events` events are kept, with
+    the oldest being discarded first.
+    """
+    # Longest string argument recorded for a span.
+    MAX_ARG_LENGTH = 200
+
+    def __init__(self, max_events=100000):
+        self.events = deque(maxlen=max_events)
+        self.pid = os.getpid()
+        self._start = _clock()
+        self._threads = {}
+
+    def _now(self):
+        # Trace timestamps are in microseconds.
+        return (_clock() - self._start) * 1e6
+
+    def _tid(self):
+        thread = threading.current_thread()
+        tid = thread.ident
+        if tid not in self._threads:
+            self._threads[tid] = thread.name
+        return tid
+
+    @contextmanager
+    def span(self, name, category='specter', **args):
+        """
+        A context manager that records the block it wraps as a span.
+        """
+        start = self._now()
+        try:
+            yield
+        finally:
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': start,
+                'dur': self._now() - start,
+                'pid': self.pid,
+                'tid': self._tid(),
+            }
+            if args:
+                event['args'] = args
+            self.events.append(event)
+
+    def instant(self, name, category='specter', **args):
+        """
+        Record an event that has no duration.
+        """
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'i',
+            's': 't',
+            'ts': self._now(),
+            'pid': self.pid,
+            'tid': self._tid(),
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def total(self, category):
+        """
+        Returns the total time, in seconds, of the spans in the given
+        category.  Nested spans in the same category are counted twice.
+        """
+        return sum(e['dur'] for e in self.events
+                   if e['ph'] == 'X' and e['cat'] == category) / 1e6
+
+    def trace(self):
+        """
+        Returns the trace as a dictionary, in the trace-event format.
+        """
+        metadata = [{
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': self.pid,
+            'tid': tid,
+            'args': {'name': name},
+        } for tid, name in self._threads.items()]
+
+        return {
+            'traceEvents': metadata + list(self.events),
+            'displayTimeUnit': 'ms',
+        }
+
+    def save(self, path):
+        """
+        Write the trace to a JSON file.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.trace(), f)
+
+
+def start_tracing(tracer=None):
+    """
+    Start recording to the given tracer (or a new one), and return it.
+    """
+    global _tracer
+    _tracer = tracer or Tracer()
+    return _tracer
+
+
+def stop_tracing():
+    """
+    Stop recording, and return the tracer that was in use, if any.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def current_tracer():
+    return _tracer
+
+
+class _NullSpan(object):
+    """
+    The context manager returned by :func:`span` when tracing is off.
+    """
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, category='specter', **args):
+    """
+    Returns a context manager that records the wrapped block as a span, if
+    tracing is on.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, **args)
+
+
+def traced(name=None, category='specter'):
+    """
+    A decorator that records each call to a method as a span, if tracing is
+    on.  If the first argument is a string (e.g. a URL or selector), it's
+    recorded with the span.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+
+            extra = {}
+            if len(args) > 1 and isinstance(args[1], string_types):
+                extra['arg'] = args[1][:tracer.MAX_ARG_LENGTH]
+            with tracer.span(span_name, category, **extra):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
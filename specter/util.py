@@ -1,3 +1,5 @@
+import re
+import fnmatch
 from functools import wraps
 from contextlib import contextmanager
 
@@ -61,3 +63,22 @@ def patch(obj, attr, value):
         setattr(obj, attr, old)
     else:
         delattr(obj, attr)
+
+
+def compile_url_pattern(pattern):
+    """
+    Compile a URL pattern, which is either a glob-style string that must match
+    the whole URL, or an already-compiled regular expression, which may match
+    anywhere in it (use ``^`` and ``$`` to anchor it).  Either way, the result
+    should be tested with ``search()``.
+    """
+    if hasattr(pattern, 'search'):
+        return pattern
+    return re.compile(r'\A' + fnmatch.translate(pattern))
+
+
+def _matches_any(patterns, url):
+    for pattern in patterns:
+        if pattern.search(url):
+            return True
+    return False
@@ -0,0 +1,304 @@
+// Injected into every frame by Specter.  This watches the DOM for changes and
+// notifies Python (through the bridge object added to the window by Specter)
+// when something that Python is waiting on changes, so that Python doesn't
+// need to poll the page.
+(function() {
+    if (window.__specterWatcher) {
+        return;
+    }
+
+    var bridge = window.__specterBridge;
+    var proto = window.Element && Element.prototype;
+    var nativeMatches = proto && (proto.matches || proto.webkitMatchesSelector ||
+                                  proto.mozMatchesSelector ||
+                                  proto.msMatchesSelector);
+
+    // id -> {selector: string, element: Element or null, combinators: bool}
+    var selectors = {};
+
+    // id -> array of patterns, each either a string or a RegExp.  Watches are
+    // removed from here once they have matched.
+    var texts = {};
+
+    function matches(node, selector) {
+        try {
+            return nativeMatches.call(node, selector);
+        } catch (e) {
+            return false;
+        }
+    }
+
+    function query(root, selector) {
+        try {
+            return root.querySelector(selector);
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function connected(el) {
+        var root = document.documentElement;
+        return !!root && (root === el || root.contains(el));
+    }
+
+    // Find an element matching the given selector within the given (newly
+    // added or modified) nodes, without re-querying the whole document.
+    function findIn(nodes, selector) {
+        for (var i = 0; i < nodes.length; i++) {
+            var node = nodes[i];
+            if (matches(node, selector)) {
+                return node;
+            }
+
+            var found = query(node, selector);
+            if (found) {
+                return found;
+            }
+        }
+        return null;
+    }
+
+    function notify(id, present) {
+        if (bridge) {
+            bridge.notifySelector(id, present);
+        }
+    }
+
+    // Returns the index of the first pattern that matches the given string,
+    // or -1 if none do.
+    function matchPatterns(patterns, str) {
+        if (!str) {
+            return -1;
+        }
+
+        for (var i = 0; i < patterns.length; i++) {
+            var pattern = patterns[i];
+            if (typeof pattern === 'string') {
+                if (str.indexOf(pattern) !== -1) {
+                    return i;
+                }
+            } else if (pattern.test(str)) {
+                return i;
+            }
+        }
+        return -1;
+    }
+
+    // Returns the elements whose text should be checked after the given
+    // nodes were added or changed.  Text can be split between a changed node
+    // and its siblings (e.g. a text node appended after an existing one), so
+    // this is each node's parent, without duplicates.
+    function textRoots(nodes) {
+        var roots = [];
+        for (var i = 0; i < nodes.length; i++) {
+            var node = nodes[i];
+            var parent = node.parentNode;
+            var root = (parent && parent.nodeType === 1) ? parent : node;
+            if (roots.indexOf(root) === -1) {
+                roots.push(root);
+            }
+        }
+        return roots;
+    }
+
+    function scanText(id, nodes) {
+        var patterns = texts[id];
+        for (var i = 0; i < nodes.length; i++) {
+            var index = matchPatterns(patterns, nodes[i].textContent);
+            if (index !== -1) {
+                delete texts[id];
+                if (bridge) {
+                    bridge.notifyText(+id, index);
+                }
+                return index;
+            }
+        }
+        return -1;
+    }
+
+    // Called with the elements that were added or had their attributes
+    // changed, the nodes whose text was added or changed, and whether any
+    // nodes were removed or had their character data changed.  Changes of the
+    // latter kind can make a selector start matching elements outside of the
+    // changed nodes (e.g. ':empty', ':last-child' or ':not(...)'), so they
+    // require a full query.
+    function process(changed, textNodes, removed) {
+        if (textNodes.length) {
+            var roots = textRoots(textNodes);
+            for (var textId in texts) {
+                if (texts.hasOwnProperty(textId)) {
+                    scanText(textId, roots);
+                }
+            }
+        }
+
+        for (var id in selectors) {
+            if (!selectors.hasOwnProperty(id)) {
+                continue;
+            }
+
+            var entry = selectors[id];
+            var el = entry.element;
+
+            if (el) {
+                // Currently present: only re-query if the element we know
+                // about has gone away, or no longer matches.
+                if ((removed || changed.length) &&
+                    !(connected(el) && matches(el, entry.selector))) {
+                    entry.element = query(document, entry.selector);
+                    if (!entry.element) {
+                        notify(+id, false);
+                    }
+                }
+            } else if (removed || changed.length) {
+                // Currently absent: only look at the nodes that changed.
+                // Sibling combinators can match due to changes outside of
+                // the changed subtrees, as can any selector after a removal,
+                // so these fall back to a full query.
+                if (removed || entry.combinators) {
+                    entry.element = query(document, entry.selector);
+                } else {
+                    entry.element = findIn(changed, entry.selector);
+                }
+
+                if (entry.element) {
+                    notify(+id, true);
+                }
+            }
+        }
+    }
+
+    function isElement(node) {
+        return node && node.nodeType === 1;
+    }
+
+    var Observer = window.MutationObserver || window.WebKitMutationObserver;
+    if (Observer) {
+        new Observer(function(records) {
+            var changed = [];
+            var textNodes = [];
+            var removed = false;
+
+            for (var i = 0; i < records.length; i++) {
+                var record = records[i];
+                if (record.type === 'childList') {
+                    for (var j = 0; j < record.addedNodes.length; j++) {
+                        var node = record.addedNodes[j];
+                        if (isElement(node)) {
+                            changed.push(node);
+                        }
+                        textNodes.push(node);
+                    }
+                    removed = removed || record.removedNodes.length > 0;
+                } else if (record.type === 'characterData') {
+                    textNodes.push(record.target);
+                    removed = true;
+                } else if (isElement(record.target)) {
+                    changed.push(record.target);
+                }
+            }
+
+            process(changed, textNodes, removed);
+        }).observe(document, {
+            childList: true,
+            subtree: true,
+            attributes: true,
+            characterData: true
+        });
+    } else {
+        // Older versions of WebKit don't have MutationObserver, so use DOM
+        // mutation events instead, and batch them up into a single check.
+        var pending = [];
+        var pendingText = [];
+        var pendingRemoval = false;
+        var scheduled = false;
+
+        var flush = function() {
+            var changed = pending;
+            var textNodes = pendingText;
+            var removed = pendingRemoval;
+            pending = [];
+            pendingText = [];
+            pendingRemoval = false;
+            scheduled = false;
+
+            process(changed, textNodes, removed);
+        };
+
+        var schedule = function() {
+            if (!scheduled) {
+                scheduled = true;
+                setTimeout(flush, 0);
+            }
+        };
+
+        document.addEventListener('DOMNodeInserted', function(evt) {
+            if (isElement(evt.target)) {
+                pending.push(evt.target);
+            }
+            pendingText.push(evt.target);
+            schedule();
+        }, true);
+        document.addEventListener('DOMCharacterDataModified', function(evt) {
+            pendingText.push(evt.target);
+            pendingRemoval = true;
+            schedule();
+        }, true);
+        document.addEventListener('DOMNodeRemoved', function(evt) {
+            pendingRemoval = true;
+            schedule();
+        }, true);
+        document.addEventListener('DOMAttrModified', function(evt) {
+            if (isElement(evt.target)) {
+                pending.push(evt.target);
+                schedule();
+            }
+        }, true);
+    }
+
+    window.__specterWatcher = {
+        // Start watching the given selector, returning whether or not it
+        // currently matches anything.
+        watch: function(id, selector) {
+            var el = query(document, selector);
+            selectors[id] = {
+                selector: selector,
+                element: el,
+                combinators: /[+~]/.test(selector)
+            };
+            return !!el;
+        },
+
+        unwatch: function(id) {
+            delete selectors[id];
+        },
+
+        // Start watching for any of the given patterns to appear in the text
+        // of the document.  Each pattern is either {text: string}, or
+        // {regex: string, flags: string}.  The document is scanned once, and
+        // afterwards only the text of elements whose children were added or
+        // changed is checked.
+        // Returns the index of the pattern that matched immediately, or -1.
+        watchText: function(id, specs) {
+            var patterns = [];
+            for (var i = 0; i < specs.length; i++) {
+                if (specs[i].regex !== undefined) {
+                    patterns.push(new RegExp(specs[i].regex, specs[i].flags));
+                } else {
+                    patterns.push(specs[i].text);
+                }
+            }
+
+            var root = document.documentElement;
+            var index = matchPatterns(patterns, root && root.textContent);
+            if (index === -1) {
+                texts[id] = patterns;
+            }
+            return index;
+        },
+
+        unwatchText: function(id) {
+            delete texts[id];
+        }
+    };
+})();
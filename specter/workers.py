@@ -0,0 +1,431 @@
+"""
+A farm of worker processes, each running its own Specter instance.
+
+A single process can only have one Qt GUI thread, so a :class:`Specter`
+instance can't make use of more than one core.  The :class:`WorkerFarm` in this
+module runs a number of worker processes, hands jobs to them, and streams the
+results back over pipes.  Workers that crash or hang are restarted
+automatically, and each worker is recycled after a configurable number of jobs
+to bound the amount of memory WebKit can accumulate.  If the ``memory_limits``
+option is given, a worker is also recycled as soon as it goes over its RSS
+limit.
+
+Jobs and their results are sent between processes with pickle, so callables
+must be defined at the top level of a module, and return picklable values.
+Where supported, workers are started with the 'spawn' method, so the main
+module must be importable (i.e. guarded with ``if __name__ == '__main__'``).
+"""
+
+import sys
+import time
+import pickle
+import select
+import itertools
+import traceback
+import multiprocessing
+from collections import deque
+
+from .exceptions import SpecterError, WorkerError
+
+try:
+    from multiprocessing.connection import wait as _wait_connections
+except ImportError:                                         # pragma: no cover
+    def _wait_connections(conns, timeout=None):
+        readable, _, _ = select.select(conns, [], [], timeout)
+        return readable
+
+
+class Job(object):
+    """
+    A unit of work for a worker.  If a URL is given, it will be opened (and
+    waited on) before the task is run.  The task can either be a callable,
+    which is called with the worker's :class:`Specter` instance and any extra
+    arguments, or a string of JavaScript, which is evaluated in the page.
+    """
+    def __init__(self, id, task, url=None, args=(), kwargs=None):
+        self.id = id
+        self.task = task
+        self.url = url
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.attempts = 0
+
+        # The pickled job, as sent to workers.
+        self.payload = None
+
+    def dumps(self):
+        """
+        Returns the job pickled for sending to a worker, or raises a
+        :class:`WorkerError` if it can't be pickled (e.g. if the task is a
+        lambda or a closure).
+        """
+        try:
+            return pickle.dumps(self, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            raise WorkerError("Unable to send job %r: %s" % (
+                self.id, sys.exc_info()[1]))
+
+    def run(self, specter):
+        if self.url is not None:
+            specter.open(self.url)
+            specter.wait_for_page_load()
+
+        if callable(self.task):
+            return self.task(specter, *self.args, **self.kwargs)
+        return specter.evaluate(self.task)
+
+    def __repr__(self):
+        return "Job(%r, %r)" % (self.id, self.url)
+
+
+class JobResult(object):
+    """
+    The result of a job.  If the job failed, :attr:`error` will contain a
+    description of the error, and :attr:`value` will be None.
+    """
+    def __init__(self, job_id, value=None, error=None):
+        self.job_id = job_id
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def get(self):
+        """
+        Returns the value of the job, or raises a :class:`WorkerError` if the
+        job failed.
+        """
+        if self.error is not None:
+            raise WorkerError("Job %r failed: %s" % (self.job_id, self.error))
+        return self.value
+
+    def __repr__(self):
+        if self.ok:
+            return "JobResult(%r, value=%r)" % (self.job_id, self.value)
+        return "JobResult(%r, error=%r)" % (self.job_id, self.error)
+
+
+def _worker_main(conn, options, jobs_per_worker):
+    """
+    The entry point for worker processes.  Runs jobs received over the given
+    connection until told to stop, until it's done the given number of jobs,
+    or until it's over its RSS limit, at which point it exits so it can be
+    replaced with a fresh process.
+    """
+    from .specter import Specter
+
+    specter = Specter(**options)
+    done = 0
+
+    while jobs_per_worker is None or done < jobs_per_worker:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+
+        try:
+            msg = ('ok', job.id, job.run(specter))
+        except Exception:
+            msg = ('error', job.id, ''.join(
+                traceback.format_exception(*sys.exc_info())))
+
+        # Pages that are over their limits can be recycled in-process, but
+        # only a fresh process gives back memory once the process as a whole
+        # is over its limit.
+        try:
+            specter.check_memory()
+            recycle = specter.check_process_memory() == 'exceeded'
+        except Exception:
+            recycle = True
+
+        try:
+            conn.send(msg + (recycle,))
+        except Exception:
+            # The result couldn't be pickled.
+            conn.send(('error', job.id, 'Unable to send result: %s' % (
+                sys.exc_info()[1],), recycle))
+
+        if recycle:
+            break
+
+        done += 1
+        specter.page.reset()
+
+    conn.close()
+
+
+class _Worker(object):
+    def __init__(self, context, options, jobs_per_worker):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, options, jobs_per_worker)
+        )
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+
+        self.job = None
+        self.started = None
+        self.jobs_done = 0
+
+    def assign(self, job):
+        # Only mark the worker as busy once the job has actually been sent.
+        self.conn.send_bytes(job.payload)
+        job.attempts += 1
+        self.job = job
+        self.started = time.time()
+
+    def finish(self):
+        job = self.job
+        self.job = None
+        self.started = None
+        self.jobs_done += 1
+        return job
+
+    def stop(self, timeout=1):
+        try:
+            self.conn.send(None)
+        except (IOError, OSError, EOFError):
+            pass
+
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class WorkerFarm(object):
+    """
+    Runs jobs across a number of worker processes, each with its own
+    :class:`Specter` instance::
+
+        farm = WorkerFarm(workers=4)
+        for result in farm.map(scrape, urls):
+            print(result)
+        farm.close()
+
+    :param workers: the number of worker processes.  Defaults to the number of
+                    CPUs.
+    :param jobs_per_worker: the number of jobs a worker runs before it's
+                            replaced by a fresh process.  None means workers
+                            are never recycled.
+    :param job_timeout: the number of seconds a job may run for before its
+                        worker is considered hung, and is restarted.
+    :param max_retries: the number of times a job is retried if its worker
+                        crashes or hangs.
+    :param options: keyword options given to each worker's :class:`Specter`.
+                    If these include ``memory_limits``, a worker whose page is
+                    over the per-page limits after a job gets a fresh page,
+                    and a worker that's still over the RSS limit after
+                    clearing WebKit's caches is replaced.  Cookies only
+                    survive the latter if the ``cookie_jar`` option is used.
+    """
+    def __init__(self, workers=None, jobs_per_worker=100, job_timeout=300,
+                 max_retries=1, **options):
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers < 1:
+            raise ValueError("Must have at least one worker")
+
+        if hasattr(multiprocessing, 'get_context'):
+            self._context = multiprocessing.get_context('spawn')
+        else:                                               # pragma: no cover
+            self._context = multiprocessing
+
+        self.num_workers = workers
+        self.jobs_per_worker = jobs_per_worker
+        self.job_timeout = job_timeout
+        self.max_retries = max_retries
+        self.options = options
+
+        self._ids = itertools.count()
+        self._pending = deque()
+        self._results = deque()
+        self._outstanding = 0
+        self._closed = False
+        self.restarts = 0
+        self.recycles = 0
+
+        self._workers = [self._spawn() for _ in range(workers)]
+
+    def _spawn(self):
+        return _Worker(self._context, self.options, self.jobs_per_worker)
+
+    def _replace(self, worker, restart=True):
+        worker.kill()
+        index = self._workers.index(worker)
+        self._workers[index] = self._spawn()
+        if restart:
+            self.restarts += 1
+
+    def submit(self, task, *args, **kwargs):
+        """
+        Submit a job, returning its ID.
+
+        :param task: a callable, which is called with the worker's
+                     :class:`Specter` instance and any extra arguments, or a
+                     string of JavaScript to evaluate.
+        :param url: (keyword-only) a URL to open and wait for before running
+                    the task.
+        """
+        url = kwargs.pop('url', None)
+        if self._closed:
+            raise SpecterError("Farm has been closed")
+
+        job = Job(next(self._ids), task, url, args, kwargs)
+
+        # Fail now, rather than leaving a worker waiting for a job that can
+        # never be sent.
+        job.payload = job.dumps()
+
+        self._pending.append(job)
+        self._outstanding += 1
+        self._dispatch()
+        return job.id
+
+    def _dispatch(self):
+        for worker in self._workers:
+            if not self._pending:
+                break
+            if worker.job is not None:
+                continue
+
+            job = self._pending.popleft()
+            try:
+                worker.assign(job)
+            except (IOError, OSError):
+                # The worker has died, or exited after finishing its quota of
+                # jobs - replace it, and try again with the new worker.
+                self._pending.appendleft(job)
+                self._replace(worker, restart=False)
+                return self._dispatch()
+
+    def _fail(self, worker, reason):
+        job = worker.finish()
+        self._replace(worker)
+
+        if job.attempts <= self.max_retries:
+            self._pending.appendleft(job)
+        else:
+            self._results.append(JobResult(job.id, error=reason))
+            self._outstanding -= 1
+
+    def _poll(self, timeout):
+        busy = [w for w in self._workers if w.job is not None]
+        if not busy:
+            return
+
+        # Don't sleep past the point where a job will have timed out.
+        now = time.time()
+        if self.job_timeout is not None:
+            deadline = min(w.started for w in busy) + self.job_timeout
+            remaining = max(0, deadline - now)
+            timeout = remaining if timeout is None else min(timeout,
+                                                            remaining)
+
+        ready = _wait_connections([w.conn for w in busy], timeout)
+        for worker in busy:
+            if worker.conn not in ready:
+                continue
+
+            try:
+                status, job_id, value, recycle = worker.conn.recv()
+            except (EOFError, IOError, OSError):
+                self._fail(worker, "Worker process exited unexpectedly")
+                continue
+
+            worker.finish()
+            self._outstanding -= 1
+            if status == 'ok':
+                self._results.append(JobResult(job_id, value=value))
+            else:
+                self._results.append(JobResult(job_id, error=value))
+
+            if recycle:
+                self.recycles += 1
+                self._replace(worker, restart=False)
+            elif (self.jobs_per_worker is not None and
+                    worker.jobs_done >= self.jobs_per_worker):
+                self._replace(worker, restart=False)
+
+        if self.job_timeout is not None:
+            now = time.time()
+            for worker in self._workers:
+                if (worker.job is not None and
+                        now - worker.started > self.job_timeout):
+                    self._fail(worker, "Job timed out after %s seconds" % (
+                        self.job_timeout,))
+
+        self._dispatch()
+
+    def results(self, timeout=None):
+        """
+        A generator that yields a :class:`JobResult` for each submitted job,
+        in the order that they complete.
+
+        :param timeout: the maximum number of seconds to wait for each result.
+                        If this expires, a :class:`WorkerError` is raised.
+        """
+        while self._results or self._outstanding:
+            if not self._results:
+                start = time.time()
+                while not self._results:
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (time.time() - start)
+                        if remaining <= 0:
+                            raise WorkerError("Timed out waiting for result")
+                    self._poll(remaining)
+
+            yield self._results.popleft()
+
+    def map(self, task, urls, timeout=None):
+        """
+        Run the given task against each of the given URLs, returning a list of
+        the results in the same order as the URLs.  If any job fails, a
+        :class:`WorkerError` is raised.
+        """
+        ids = [self.submit(task, url=url) for url in urls]
+        if not ids:
+            return []
+
+        wanted = set(ids)
+        by_id = {}
+        others = []
+
+        for result in self.results(timeout):
+            if result.job_id not in wanted:
+                others.append(result)
+                continue
+
+            by_id[result.job_id] = result
+            if len(by_id) == len(wanted):
+                break
+
+        # Keep results for jobs that weren't submitted by us.
+        self._results.extendleft(reversed(others))
+        return [by_id[i].get() for i in ids]
+
+    def close(self):
+        """
+        Stop all worker processes.  Any outstanding jobs are abandoned.
+        """
+        self._closed = True
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()